@@ -0,0 +1,135 @@
+"""Requests per second through the Lambda event path and the WSGI and ASGI
+adapters, for a small JSON view and a 64 KiB binary view.
+
+The event path is measured with a prebuilt event, and with the event built
+from the HTTP request and the base64 body decoded again, as a container
+serving the event path would have to.
+
+Usage: python -m benchmarks.bench_adapters
+"""
+import argparse
+import asyncio
+import base64
+import io
+import os
+import timeit
+from typing import Any, Callable, Dict, List
+
+from pitcher import Application, Request, Response, Route
+from pitcher.adapters.asgi import ASGIAdapter
+from pitcher.adapters.wsgi import WSGIAdapter
+from pitcher.server import build_event
+
+BLOB = os.urandom(64 * 1024)
+LOOPS: List[asyncio.AbstractEventLoop] = []
+ASGI_BATCH = 100
+HEADERS = [
+    ("Host", "api.example.com"),
+    ("Accept", "application/json"),
+    ("User-Agent", "bench"),
+    ("Cookie", "session=abc123"),
+]
+
+
+def item(request: Request, app: Any) -> dict:
+    return {"id": request.params["id"], "page": request.query.get("page")}
+
+
+def blob(request: Request, app: Any) -> Response:
+    return Response(200, BLOB, content_type="application/octet-stream")
+
+
+app = Application(
+    name="bench", routes=[Route("/items/{id:int}", item), Route("/blob", blob)]
+)
+
+
+def event_path(path: str, query: str) -> Callable[[], Any]:
+    event = build_event("GET", f"{path}?{query}", HEADERS, b"")
+    return lambda: app(event, None)
+
+
+def event_path_from_http(path: str, query: str) -> Callable[[], Any]:
+    def call() -> Any:
+        event = build_event("GET", f"{path}?{query}", HEADERS, b"")
+        rendered = app(event, None)
+        if rendered["isBase64Encoded"]:
+            return base64.b64decode(rendered["body"])
+        return rendered["body"].encode("utf-8")
+
+    return call
+
+
+def wsgi_path(path: str, query: str) -> Callable[[], Any]:
+    adapter = WSGIAdapter(app)
+    environ: Dict[str, Any] = {
+        "REQUEST_METHOD": "GET",
+        "PATH_INFO": path,
+        "QUERY_STRING": query,
+        "wsgi.input": io.BytesIO(),
+        **{"HTTP_" + k.upper().replace("-", "_"): v for k, v in HEADERS},
+    }
+
+    def start_response(status: str, headers: Any) -> None:
+        pass
+
+    return lambda: b"".join(adapter(dict(environ), start_response))
+
+
+def asgi_path(path: str, query: str, threadpool: bool = True) -> Callable[[], Any]:
+    adapter = ASGIAdapter(app, threadpool=threadpool)
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "query_string": query.encode(),
+        "headers": [(k.lower().encode(), v.encode()) for k, v in HEADERS],
+    }
+    loop = asyncio.new_event_loop()
+    LOOPS.append(loop)
+
+    async def receive() -> dict:
+        return {"type": "http.request", "body": b""}
+
+    async def send(message: dict) -> None:
+        pass
+
+    async def requests() -> None:
+        # a batch per call so the loop's own start up isn't measured
+        for _ in range(ASGI_BATCH):
+            await adapter(scope, receive, send)
+
+    return lambda: loop.run_until_complete(requests())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=5000)
+    args = parser.parse_args()
+
+    paths = {
+        "event": event_path,
+        "event from http": event_path_from_http,
+        "wsgi": wsgi_path,
+        "asgi": asgi_path,
+        "asgi, no pool": lambda path, query: asgi_path(path, query, False),
+    }
+    views = {"json": ("/items/42", "page=2"), "64k binary": ("/blob", "")}
+
+    print(f"{'path':<16} " + " ".join(f"{name + ' (req/s)':>18}" for name in views))
+    for name, make_call in paths.items():
+        results = []
+        for path, query in views.values():
+            call = make_call(path, query)
+            batch = ASGI_BATCH if name.startswith("asgi") else 1
+            number = args.number // batch
+            elapsed = min(timeit.repeat(call, number=number, repeat=3))
+            results.append(number * batch / elapsed)
+        print(f"{name:<16} " + " ".join(f"{result:>18.0f}" for result in results))
+
+    for loop in LOOPS:
+        loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Peak memory per MB of binary payload with tracemalloc, for decoding request
+bodies and encoding response bodies, comparing the base64 module calls used
+before against the binascii, streamed and memory mapped paths.
+
+The event and the in-memory payload exist before measuring, as they would
+in a handler, so only the copies made by each path are counted.
+
+Usage: python -m benchmarks.bench_binary_memory [--sizes 1 5]
+"""
+import argparse
+import base64
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Tuple
+
+from pitcher.request import Request
+from pitcher.response import FileResponse, Response
+
+
+def measure(func: Callable[[], Any]) -> Tuple[float, float]:
+    """Return peak traced memory in MB and seconds."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1e6, elapsed
+
+
+def read_stream(request: Request) -> int:
+    stream = request.stream()
+    size = 0
+    while True:
+        chunk = stream.read(64 * 1024)
+        if not chunk:
+            return size
+        size += len(chunk)
+
+
+def read_file(path: str) -> bytes:
+    with open(path, "rb") as fh:
+        return fh.read()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 5])
+    args = parser.parse_args()
+
+    print(f"{'case':<28} {'MB':>4} {'peak (MB)':>10} {'per MB':>7} {'ms':>8}")
+    for size in args.sizes:
+        data = os.urandom(size * 1024 * 1024)
+        event = {
+            "version": "2.0",
+            "requestContext": {"http": {"method": "POST", "path": "/upload"}},
+            "body": base64.b64encode(data).decode("ascii"),
+            "isBase64Encoded": True,
+        }
+        with tempfile.NamedTemporaryFile(suffix=".bin", delete=False) as fh:
+            fh.write(data)
+            path = fh.name
+
+        cases: Dict[str, Callable[[], Any]] = {
+            "request b64decode (before)": lambda: base64.b64decode(event["body"]),
+            "request.body": lambda: Request(event, None).body,
+            "request.stream()": lambda: read_stream(Request(event, None)),
+            "response b64encode (before)": lambda: base64.b64encode(data).decode(
+                "ascii"
+            ),
+            "Response(bytes).render": lambda: Response(200, data).render(),
+            "read file + render": lambda: Response(200, read_file(path)).render(),
+            "FileResponse.render": lambda: FileResponse(200, path).render(),
+            "FileResponse.to_http": lambda: sum(
+                len(chunk) for chunk in FileResponse(200, path).to_http()[2]
+            ),
+            "FileResponse.iter_body": lambda: sum(
+                len(chunk) for chunk in FileResponse(200, path).iter_body()
+            ),
+        }
+        try:
+            for label, func in cases.items():
+                # warm up lazy imports and the mimetypes table
+                func()
+                peak, elapsed = measure(func)
+                print(
+                    f"{label:<28} {size:>4} {peak:>10.2f} {peak / size:>7.2f} "
+                    f"{elapsed * 1000:>8.1f}"
+                )
+        finally:
+            os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Peak memory and throughput of parsing multipart/form-data uploads of 1 MB
+to 20 MB from base64 encoded v2.0 events, comparing request.files() against
+decoding the whole body and splitting it on the boundary.
+
+Usage: python -m benchmarks.bench_forms [--sizes 1 5 20]
+"""
+import argparse
+import base64
+import os
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+from pitcher.request import Request
+
+BOUNDARY = "----pitcherBoundary7MA4YWxkTrZu0gW"
+
+
+def build_body(size: int) -> bytes:
+    delimiter = f"--{BOUNDARY}\r\n".encode()
+    body = b""
+    for name in ("title", "description", "tags"):
+        body += delimiter
+        body += f'Content-Disposition: form-data; name="{name}"\r\n\r\n'.encode()
+        body += f"{name} value\r\n".encode()
+    body += delimiter
+    body += b'Content-Disposition: form-data; name="file"; filename="photo.jpg"\r\n'
+    body += b"Content-Type: image/jpeg\r\n\r\n"
+    body += os.urandom(size) + b"\r\n"
+    return body + f"--{BOUNDARY}--\r\n".encode()
+
+
+def build_event(body: bytes) -> Dict[str, Any]:
+    return {
+        "version": "2.0",
+        "routeKey": "POST /upload",
+        "headers": {"content-type": f"multipart/form-data; boundary={BOUNDARY}"},
+        "requestContext": {"http": {"method": "POST", "path": "/upload"}},
+        "body": base64.b64encode(body).decode("ascii"),
+        "isBase64Encoded": True,
+    }
+
+
+def split_parts(event: Dict[str, Any]) -> List[Tuple[bytes, bytes]]:
+    # decode the whole body and split it on the boundary
+    body = base64.b64decode(event["body"])
+    parts = []
+    for part in body.split(b"--" + BOUNDARY.encode())[1:-1]:
+        headers, _, content = part[2:].partition(b"\r\n\r\n")
+        parts.append((headers, content[:-2]))
+    return parts
+
+
+def parse_files(event: Dict[str, Any]) -> int:
+    request = Request(event, None)
+    size = request.files()["file"].size
+    for upload in request.files().values():
+        upload.close()
+    return size
+
+
+def measure(func: Callable[[], Any]) -> Tuple[float, float]:
+    """Return peak traced memory in MB and seconds."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1e6, elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 5, 20])
+    args = parser.parse_args()
+
+    cases: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+        "decode and split": split_parts,
+        "request.files()": parse_files,
+    }
+
+    print(f"{'case':<18} {'MB':>4} {'peak (MB)':>10} {'per MB':>7} {'MB/s':>7}")
+    for size in args.sizes:
+        # the event exists before the handler runs, so it isn't measured
+        event = build_event(build_body(size * 1024 * 1024))
+        for label, func in cases.items():
+            func(event)
+            peak, elapsed = measure(lambda: func(event))
+            print(
+                f"{label:<18} {size:>4} {peak:>10.2f} {peak / size:>7.2f} "
+                f"{size / elapsed:>7.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
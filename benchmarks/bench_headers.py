@@ -0,0 +1,50 @@
+"""Compare Headers with the previous CaseInsensitiveDict header mapping.
+
+Usage: python -m benchmarks.bench_headers
+"""
+import argparse
+import timeit
+from types import MappingProxyType
+
+from pitcher.request import CaseInsensitiveDict, Headers
+
+from .bench_request import HEADERS
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=100000)
+    args = parser.parse_args()
+
+    multi_headers = {k.title(): [v] for k, v in HEADERS.items()}
+    headers = {k.title(): v for k, v in HEADERS.items()}
+
+    legacy = MappingProxyType(CaseInsensitiveDict(headers))
+    fast = Headers(headers, multi_headers)
+
+    cases = {
+        "construct": (
+            lambda: MappingProxyType(CaseInsensitiveDict(headers)),
+            lambda: Headers(headers, multi_headers),
+        ),
+        "get hit": (
+            lambda: legacy.get("content-type"),
+            lambda: fast.get("content-type"),
+        ),
+        "get miss": (lambda: legacy.get("x-missing"), lambda: fast.get("x-missing")),
+        "getitem": (lambda: legacy["Origin"], lambda: fast["Origin"]),
+    }
+
+    print(f"{len(headers)} headers, {args.number} calls per case")
+    print(f"{'case':<10} {'CaseInsensitiveDict (us)':>25} {'Headers (us)':>13}")
+    for label, (legacy_case, fast_case) in cases.items():
+        legacy_time = timeit.timeit(legacy_case, number=args.number)
+        fast_time = timeit.timeit(fast_case, number=args.number)
+        print(
+            f"{label:<10} {legacy_time / args.number * 1e6:>25.3f}"
+            f" {fast_time / args.number * 1e6:>13.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Allowed host matching against a large allowlist, comparing the indexed
+HostIndex with a linear scan of the host list.
+
+Usage: python -m benchmarks.bench_hosts [--hosts 10000]
+"""
+import argparse
+import timeit
+from typing import List
+
+from pitcher.middleware import HostIndex
+
+
+def build_hosts(count: int) -> List[str]:
+    # half custom domains, half wildcard tenant domains
+    hosts = []
+    for i in range(count):
+        if i % 2:
+            hosts.append(f"*.tenant{i}.example.com")
+        else:
+            hosts.append(f"api.customer{i}.com")
+    return hosts
+
+
+def linear_match(allowed_hosts: List[str], request_host: str) -> bool:
+    for allowed_host in allowed_hosts:
+        if allowed_host == "*":
+            return True
+        elif (
+            request_host == allowed_host
+            or allowed_host.startswith("*.")
+            and request_host.endswith(allowed_host[2:])
+        ):
+            return True
+    return False
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hosts", type=int, default=10000)
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    hosts = build_hosts(args.hosts)
+    last = args.hosts - 1 if (args.hosts - 1) % 2 else args.hosts - 2
+    requests = {
+        "first exact": "api.customer0.com",
+        "last wildcard": f"app.tenant{last}.example.com",
+        "not allowed": "api.unknown.net",
+    }
+
+    build = timeit.timeit(lambda: HostIndex(hosts), number=5) / 5
+    index = HostIndex(hosts)
+
+    print(f"{args.hosts} hosts, index built in {build * 1e3:.2f} ms")
+    print(f"{'host':<14} {'index (us)':>11} {'linear (us)':>12}")
+    for label, host in requests.items():
+        assert (host in index) == linear_match(hosts, host)
+        indexed = timeit.timeit(lambda: host in index, number=args.number)
+        linear = timeit.timeit(lambda: linear_match(hosts, host), number=args.number)
+        print(
+            f"{label:<14} {indexed / args.number * 1e6:>11.2f}"
+            f" {linear / args.number * 1e6:>12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Cold-start import cost of pitcher, measured with python -X importtime.
+
+Each run imports pitcher in a fresh interpreter that has already imported
+the modules the Lambda runtime loads itself, so only the cost added by
+pitcher is counted. Exits with status 1 when the median is over budget.
+
+Usage: python -m benchmarks.bench_import [--budget-ms 40]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# already imported by the Lambda python runtime before the handler module
+RUNTIME_MODULES = "import json, logging, typing"
+
+STATEMENT = "import pitcher; from pitcher import Application, Middleware, Route"
+
+BUDGET_MS = 40.0
+
+
+def import_times() -> Tuple[int, List[Tuple[str, int]]]:
+    """Return pitcher's cumulative import time and (module, self time) pairs."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"{RUNTIME_MODULES}; {STATEMENT}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    lines = [
+        line[len("import time:") :].split("|")
+        for line in result.stderr.splitlines()
+        if line.startswith("import time:") and "self [us]" not in line
+    ]
+
+    # nested imports are indented and reported before their parent, so
+    # pitcher's imports are everything after the last runtime module
+    start = 0
+    for index, (_, _, name) in enumerate(lines):
+        if name.startswith(" pitcher"):
+            break
+        if not name.startswith("  "):
+            start = index + 1
+
+    cumulative = 0
+    modules: List[Tuple[str, int]] = []
+    for self_us, _, name in lines[start:]:
+        modules.append((name.strip(), int(self_us)))
+        cumulative += int(self_us)
+
+    return cumulative, modules
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=9)
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    totals = []
+    self_times: Dict[str, List[int]] = {}
+    for _ in range(args.repeat):
+        total, modules = import_times()
+        totals.append(total)
+        for name, self_us in modules:
+            self_times.setdefault(name, []).append(self_us)
+
+    median_ms = statistics.median(totals) / 1000
+
+    print(f"{'module':<40} {'self (ms)':>10}")
+    slowest = sorted(
+        self_times.items(), key=lambda item: statistics.median(item[1]), reverse=True
+    )
+    for name, times in slowest[: args.top]:
+        print(f"{name:<40} {statistics.median(times) / 1000:>10.2f}")
+    print(f"\n{len(self_times)} modules imported")
+    print(f"median import time {median_ms:.2f} ms, budget {args.budget_ms:.2f} ms")
+
+    if median_ms > args.budget_ms:
+        print("import time over budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
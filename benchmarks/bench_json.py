@@ -0,0 +1,72 @@
+"""Compare the JSON codecs available in this environment over payload sizes.
+
+Usage: python -m benchmarks.bench_json [--sizes 1 10 100 1000 5000]
+"""
+import argparse
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+import timeit
+from typing import Any, Dict, List
+
+from pitcher.json_codecs import AUTO_ORDER, CODECS, JSONCodec
+
+
+def record(i: int) -> Dict[str, Any]:
+    created = datetime(2020, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=i)
+    return {
+        "id": i,
+        "name": f"Product {i}",
+        "description": "A realistic description of a product " * 2,
+        "price": Decimal("19.99"),
+        "rating": 4.5,
+        "in_stock": i % 3 != 0,
+        "tags": ["new", "sale", "popular"],
+        "created_at": created,
+    }
+
+
+def payload(size_kb: int) -> List[Dict[str, Any]]:
+    # a record is ~330 bytes once encoded
+    return [record(i) for i in range(max(1, size_kb * 1024 // 330))]
+
+
+def available_codecs() -> Dict[str, JSONCodec]:
+    codecs = {}
+    for name in AUTO_ORDER:
+        try:
+            codecs[name] = CODECS[name]()
+        except ImportError:
+            continue
+    return codecs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1, 10, 100, 1000, 5000]
+    )
+    args = parser.parse_args()
+
+    codecs = available_codecs()
+    print(f"codecs: {', '.join(codecs)}")
+    print(f"{'size':>8} {'codec':<10} {'dumps (ms)':>11} {'loads (ms)':>11}")
+
+    for size_kb in args.sizes:
+        data = payload(size_kb)
+        encoded = codecs["json"].dumps(data)
+        number = max(1, 2000 // size_kb)
+        for name, codec in codecs.items():
+            dumps = min(
+                timeit.repeat(lambda: codec.dumps(data), number=number, repeat=3)
+            )
+            loads = min(
+                timeit.repeat(lambda: codec.loads(encoded), number=number, repeat=3)
+            )
+            print(
+                f"{size_kb:>6}KB {name:<10} {dumps / number * 1e3:>11.3f}"
+                f" {loads / number * 1e3:>11.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
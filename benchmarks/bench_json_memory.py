@@ -0,0 +1,74 @@
+"""Peak memory of encoding a 100k item list with tracemalloc, comparing one
+json codec call against the chunked encoder in buffered and streamed use.
+
+Usage: python -m benchmarks.bench_json_memory [--items 100000] [--codec json]
+"""
+import argparse
+from datetime import datetime, timezone
+import time
+import tracemalloc
+from typing import Any, Callable, List, Tuple
+
+from pitcher.json_codecs import JSONCodec, get_codec
+from pitcher.response import ChunkedJSONEncoder
+
+
+def build_items(count: int) -> List[dict]:
+    created = datetime(2020, 4, 1, tzinfo=timezone.utc)
+    return [
+        {"id": i, "name": f"item {i}", "tags": ["a", "b"], "created": created}
+        for i in range(count)
+    ]
+
+
+def measure(func: Callable[[], Any]) -> Tuple[float, float, int]:
+    """Return peak traced memory in MB, seconds and the output size."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1e6, elapsed, size
+
+
+def one_shot(codec: JSONCodec, items: List[dict]) -> int:
+    return len(codec.dumps(items))
+
+
+def chunked_buffered(codec: JSONCodec, items: List[dict]) -> int:
+    return len(ChunkedJSONEncoder(codec).encode(items).decode("utf-8"))
+
+
+def chunked_streamed(codec: JSONCodec, items: List[dict], ndjson: bool) -> int:
+    # the chunks are written out as they are produced
+    return sum(
+        len(chunk) for chunk in ChunkedJSONEncoder(codec, ndjson).iter_chunks(items)
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=100000)
+    parser.add_argument("--codec", default="json")
+    args = parser.parse_args()
+
+    codec = get_codec(args.codec)
+    items = build_items(args.items)
+
+    cases = {
+        "one call": lambda: one_shot(codec, items),
+        "chunked buffered": lambda: chunked_buffered(codec, items),
+        "chunked array stream": lambda: chunked_streamed(codec, items, False),
+        "chunked ndjson stream": lambda: chunked_streamed(codec, items, True),
+    }
+
+    print(f"{args.items} items, {codec.name} codec")
+    print(f"{'encoding':<22} {'peak (MB)':>10} {'time (ms)':>10} {'body (MB)':>10}")
+    for label, func in cases.items():
+        peak, elapsed, size = measure(func)
+        print(f"{label:<22} {peak:>10.2f} {elapsed * 1e3:>10.1f} {size / 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
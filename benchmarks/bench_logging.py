@@ -0,0 +1,69 @@
+"""Per request cost of logging at INFO level: a view that doesn't log, and
+views logging one record through the stdlib formatter and the JSON
+formatter.
+
+Usage: python -m benchmarks.bench_logging
+"""
+import argparse
+import io
+import logging
+import timeit
+from typing import Any, Optional
+
+from pitcher import Application, Request, Route
+from pitcher.log import JSONFormatter
+
+from benchmarks.bench_request import v2_event
+
+
+def quiet(request: Request, app: Any) -> dict:
+    return {"id": request.params["id"]}
+
+
+def chatty(request: Request, app: Any) -> dict:
+    app.logger.info("fetching item %s", request.params["id"])
+    return {"id": request.params["id"]}
+
+
+def build_app(view: Any, formatter: Optional[logging.Formatter]) -> Application:
+    logger = logging.getLogger(f"bench.{id(formatter)}")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    if formatter is not None:
+        handler = logging.StreamHandler(io.StringIO())
+        handler.setFormatter(formatter)
+        logger.addHandler(handler)
+
+    return Application(
+        name="bench",
+        routes=[Route("/items/{id}", view, methods=["POST"])],
+        logger=logger,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    event = v2_event()
+    configurations = {
+        "no records": (quiet, None),
+        "stdlib formatter": (chatty, logging.Formatter(logging.BASIC_FORMAT)),
+        "json formatter": (chatty, JSONFormatter(fields={"service": "bench"})),
+    }
+
+    print(f"{'configuration':<18} {'per request (us)':>17}")
+    for name, (view, formatter) in configurations.items():
+        app = build_app(view, formatter)
+        elapsed = min(
+            timeit.repeat(
+                lambda: app(event, None), number=args.number, repeat=args.repeat
+            )
+        )
+        print(f"{name:<18} {elapsed / args.number * 1e6:>17.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Request throughput through 0, 3 and 10 middleware layers, comparing the
+compiled middleware stack against plain nesting of every layer.
+
+Usage: python -m benchmarks.bench_middleware
+"""
+import argparse
+import timeit
+from typing import Any, Callable, List
+
+from pitcher import Application, Middleware, Request, Route
+from pitcher.middleware import (
+    BaseMiddleware,
+    CORSMiddleware,
+    SecureHeadersMiddleware,
+)
+
+from benchmarks.bench_request import v2_event
+
+LAYERS = [
+    Middleware(SecureHeadersMiddleware),
+    Middleware(CORSMiddleware, allow_origins=["https://app.example.com"]),
+    Middleware(BaseMiddleware),
+    Middleware(SecureHeadersMiddleware, csp=True),
+    Middleware(BaseMiddleware),
+]
+
+
+def view(request: Request, app: Any) -> dict:
+    return {"id": request.params["id"]}
+
+
+def nested_stack(app: Application) -> Callable:
+    func: Any = app.router
+    for cls, options in reversed(app.middleware):
+        func = cls(func, **options)
+    return func
+
+
+def build_app(layers: int, compiled: bool) -> Application:
+    middleware: List[Middleware] = [LAYERS[i % len(LAYERS)] for i in range(layers)]
+    app = Application(
+        name="bench",
+        routes=[Route("/items/{id}", view, methods=["POST"])],
+        middleware=middleware,
+    )
+    if not compiled:
+        app.middleware_stack = nested_stack(app)
+        app.default_headers = {}
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    event = v2_event()
+
+    print(f"{'layers':<7} {'nested (req/s)':>15} {'compiled (req/s)':>17} {'depth':>6}")
+    for layers in (0, 3, 10):
+        results = []
+        for compiled in (False, True):
+            app = build_app(layers, compiled)
+            elapsed = timeit.timeit(lambda: app(event, None), number=args.number)
+            results.append(args.number / elapsed)
+        print(
+            f"{layers:<7} {results[0]:>15.0f} {results[1]:>17.0f} {app.call_depth:>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Compare the compiled route tree against a naive regex-per-route scan, and
+router construction from Route objects against a route table snapshot.
+
+Usage: python -m benchmarks.bench_router [--resources 250]
+"""
+import argparse
+import re
+import timeit
+from typing import Any, Dict, List, Optional, Pattern, Tuple
+
+from pitcher.router import Route, Router
+from pitcher.snapshot import build_snapshot
+
+PARAM_PATTERNS = {
+    "int": r"\d+",
+    "str": r"[^/]+",
+    "slug": r"[-\w]+",
+    "path": r"[^?#]+",
+}
+
+
+def view(request, app):
+    return None
+
+
+def build_routes(resources: int) -> List[Route]:
+    routes = []
+    for i in range(resources):
+        routes.append(Route(f"/resource{i}", view))
+        routes.append(Route(f"/resource{i}/{{id:int}}", view))
+        routes.append(Route(f"/resource{i}/{{id:int}}/items", view))
+        routes.append(Route(f"/resource{i}/{{id:int}}/items/{{item:slug}}", view))
+    return routes
+
+
+class RegexScanRouter:
+    def __init__(self, routes: List[Route]) -> None:
+        self.patterns: List[Tuple[Pattern, str]] = []
+        for route in routes:
+            parts = []
+            for segment in route.path.strip("/").split("/"):
+                match = re.fullmatch(r"\{(\w+)\:(\w+)\}", segment)
+                if match:
+                    name, type_name = match.groups()
+                    parts.append(f"(?P<{name}>{PARAM_PATTERNS[type_name]})")
+                else:
+                    parts.append(re.escape(segment))
+            self.patterns.append((re.compile("/" + "/".join(parts)), route.path))
+
+    def match(self, path: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        for pattern, key in self.patterns:
+            match = pattern.fullmatch(path)
+            if match:
+                return key, match.groupdict()
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--resources", type=int, default=250)
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    routes = build_routes(args.resources)
+    last = args.resources - 1
+    paths = {
+        "first static": "/resource0",
+        "middle param": f"/resource{last // 2}/42/items",
+        "last params": f"/resource{last}/42/items/hello-world",
+        "not found": "/missing/42",
+    }
+
+    tree = Router(base="", routes=routes)
+    scan = RegexScanRouter(routes)
+
+    print(f"{len(routes)} routes, {args.number} lookups per path")
+    print(f"{'path':<14} {'tree (us)':>10} {'regex scan (us)':>16}")
+    for label, path in paths.items():
+        tree_time = timeit.timeit(lambda: tree.match(path), number=args.number)
+        scan_time = timeit.timeit(lambda: scan.match(path), number=args.number)
+        print(
+            f"{label:<14} {tree_time / args.number * 1e6:>10.2f}"
+            f" {scan_time / args.number * 1e6:>16.2f}"
+        )
+
+    snapshot = build_snapshot(routes)
+    number = max(args.number // 100, 5)
+    compile_time = timeit.timeit(lambda: Router(base="", routes=routes), number=number)
+    snapshot_time = timeit.timeit(
+        lambda: Router(base="", routes=routes, snapshot=snapshot), number=number
+    )
+    print(f"\n{'router init':<14} {'routes (ms)':>11} {'snapshot (ms)':>14}")
+    print(
+        f"{'':<14} {compile_time / number * 1e3:>11.2f}"
+        f" {snapshot_time / number * 1e3:>14.2f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""The JSON `default` hook on datetime heavy payloads, comparing the exact
+type dispatch table of to_serializable against functools.singledispatch.
+
+Usage: python -m benchmarks.bench_serializer [--rows 10000]
+"""
+import argparse
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from functools import singledispatch
+import json
+import timeit
+from typing import Any, Callable, Dict, List
+from uuid import UUID
+
+from pitcher.serializable import to_serializable
+
+
+@singledispatch
+def singledispatch_serializable(val):
+    return str(val)
+
+
+@singledispatch_serializable.register
+def _(val: date) -> str:
+    return val.isoformat()
+
+
+@singledispatch_serializable.register
+def _(val: time) -> str:
+    return val.isoformat(timespec="seconds")
+
+
+@singledispatch_serializable.register
+def _(val: datetime) -> str:
+    representation = val.isoformat(timespec="seconds")
+    if representation.endswith("+00:00"):
+        representation = representation[:-6] + "Z"
+    return representation
+
+
+@singledispatch_serializable.register(Decimal)
+def _(val) -> str:
+    return str(val)
+
+
+def build_rows(count: int) -> List[Dict[str, Any]]:
+    start = datetime(2020, 4, 1, tzinfo=timezone.utc)
+    return [
+        {
+            "id": UUID(int=i),
+            "created": start + timedelta(minutes=i),
+            "updated": start + timedelta(minutes=i, seconds=30),
+            "day": (start + timedelta(days=i % 30)).date(),
+            "price": Decimal(i) / 100,
+            "readings": [i * 0.5, i * 0.25, i * 0.125],
+        }
+        for i in range(count)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--number", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = build_rows(args.rows)
+    values = [
+        value for row in rows for value in row.values() if not isinstance(value, list)
+    ]
+
+    defaults: Dict[str, Callable[[Any], Any]] = {
+        "singledispatch": singledispatch_serializable,
+        "dispatch table": to_serializable,
+    }
+
+    encoders = {"json": lambda default: json.JSONEncoder(default=default).encode}
+    try:
+        import orjson
+
+        encoders["orjson"] = lambda default: lambda data: orjson.dumps(
+            data, default=default, option=orjson.OPT_PASSTHROUGH_DATETIME
+        )
+    except ImportError:
+        pass
+
+    print(f"{args.rows} rows, {len(values)} values through default")
+    print(
+        f"{'hook':<15} {'calls (ms)':>11} "
+        + " ".join(f"{name + ' (ms)':>12}" for name in encoders)
+    )
+    for label, default in defaults.items():
+        calls = timeit.timeit(
+            lambda: [default(value) for value in values], number=args.number
+        )
+        timings = []
+        for make_encoder in encoders.values():
+            encode = make_encoder(default)
+            timings.append(timeit.timeit(lambda: encode(rows), number=args.number))
+        print(
+            f"{label:<15} {calls / args.number * 1e3:>11.2f} "
+            + " ".join(f"{t / args.number * 1e3:>12.2f}" for t in timings)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Requests per second and latency through pitcher.server, loaded by
+keep-alive connections from an asyncio client in this process.
+
+Usage: python -m benchmarks.bench_server [--workers 2] [--connections 32]
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from typing import Any, List
+
+from pitcher import Application, Request, Route
+
+
+def item(request: Request, app: Any) -> dict:
+    return {"id": request.params["id"], "name": "widget"}
+
+
+app = Application(name="bench", routes=[Route("/items/{id:int}", item)])
+
+REQUEST = b"GET /items/42 HTTP/1.1\r\nHost: localhost\r\nUser-Agent: bench\r\n\r\n"
+
+
+async def connection(port: int, deadline: float, latencies: List[float]) -> None:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        writer.write(REQUEST)
+        head = await reader.readuntil(b"\r\n\r\n")
+        length = int(head.split(b"Content-Length: ")[1].split(b"\r\n")[0])
+        await reader.readexactly(length)
+        latencies.append(time.perf_counter() - started)
+    writer.close()
+
+
+async def load(port: int, connections: int, duration: float) -> List[float]:
+    latencies: List[float] = []
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(
+        *(connection(port, deadline, latencies) for _ in range(connections))
+    )
+    return latencies
+
+
+async def wait_for_port(port: int) -> None:
+    for _ in range(100):
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.05)
+    raise RuntimeError("server did not start")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=min(2, os.cpu_count() or 1))
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--event-version", choices=["1.0", "2.0"], default="2.0")
+    args = parser.parse_args()
+
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "pitcher.server",
+            "benchmarks.bench_server:app",
+            f"--port={args.port}",
+            f"--workers={args.workers}",
+            f"--event-version={args.event_version}",
+        ],
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        asyncio.run(wait_for_port(args.port))
+        latencies = sorted(
+            asyncio.run(load(args.port, args.connections, args.duration))
+        )
+    finally:
+        server.terminate()
+        server.wait()
+
+    def percentile(p: float) -> float:
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1e3
+
+    print(
+        f"{args.workers} workers, {args.connections} connections, "
+        f"v{args.event_version} events"
+    )
+    print(f"{'req/s':>10} {'p50 (ms)':>9} {'p99 (ms)':>9}")
+    print(
+        f"{len(latencies) / args.duration:>10.0f} "
+        f"{percentile(0.5):>9.2f} {percentile(0.99):>9.2f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
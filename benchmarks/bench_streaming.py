@@ -0,0 +1,81 @@
+"""Time to first byte of a streamed JSON export against a buffered response.
+
+Usage: python -m benchmarks.bench_streaming [--items 100000]
+"""
+import argparse
+import time
+from typing import Any, List, Optional
+
+from pitcher import Application, Request, Route
+from pitcher.response import StreamingResponse
+
+from benchmarks.bench_request import v2_event
+
+
+class TimingWriter:
+    def __init__(self, start: float) -> None:
+        self.start = start
+        self.first_byte: Optional[float] = None
+        self.size = 0
+
+    def write(self, data: bytes) -> None:
+        # the first write is the prelude, body bytes follow it
+        if self.size and self.first_byte is None:
+            self.first_byte = time.perf_counter() - self.start
+        self.size += len(data)
+
+
+def build_app(items: List[dict], codec: str) -> Application:
+    def export(request: Request, app: Any) -> StreamingResponse:
+        return StreamingResponse(200, iter(items), content_type="application/json")
+
+    def export_buffered(request: Request, app: Any) -> List[dict]:
+        return items
+
+    return Application(
+        name="bench",
+        routes=[
+            Route("/items/{id}", export, methods=["POST"]),
+            Route("/items/{id}", export_buffered, methods=["GET"]),
+        ],
+        json_codec=codec,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=100000)
+    parser.add_argument("--codec", default="json")
+    args = parser.parse_args()
+
+    items = [
+        {"id": i, "name": f"item {i}", "tags": ["a", "b"]} for i in range(args.items)
+    ]
+    app = build_app(items, args.codec)
+
+    event = v2_event()
+    start = time.perf_counter()
+    writer = TimingWriter(start)
+    app.stream(event, None, writer)
+    streamed_total = time.perf_counter() - start
+
+    event = v2_event()
+    event["requestContext"]["http"]["method"] = "GET"
+    event["routeKey"] = "GET /items/{id}"
+    start = time.perf_counter()
+    app(event, None)
+    buffered_total = time.perf_counter() - start
+
+    print(f"{args.items} items, {writer.size / 1e6:.1f} MB")
+    print(f"{'mode':<9} {'first byte (ms)':>16} {'total (ms)':>11}")
+    print(
+        f"{'streamed':<9} {(writer.first_byte or 0) * 1e3:>16.3f}"
+        f" {streamed_total * 1e3:>11.1f}"
+    )
+    print(
+        f"{'buffered':<9} {buffered_total * 1e3:>16.3f} {buffered_total * 1e3:>11.1f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
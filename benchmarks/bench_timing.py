@@ -0,0 +1,69 @@
+"""Per request overhead of timing instrumentation, with it disabled, timing
+only, and with the Server-Timing header and EMF output enabled.
+
+Usage: python -m benchmarks.bench_timing
+"""
+import argparse
+import io
+import timeit
+from typing import Any, Optional
+
+from pitcher import Application, Middleware, Request, Route
+from pitcher.middleware import BaseMiddleware, SecureHeadersMiddleware
+from pitcher.timing import Instrumentation
+
+from benchmarks.bench_request import v2_event
+
+
+class PassMiddleware(BaseMiddleware):
+    def __call__(self, request: Request, app: Any) -> Any:
+        return self.next_func(request, app)
+
+
+def view(request: Request, app: Any) -> dict:
+    return {"id": request.params["id"]}
+
+
+def build_app(layers: int, instrumentation: Optional[Instrumentation]) -> Application:
+    return Application(
+        name="bench",
+        routes=[Route("/items/{id}", view, methods=["POST"])],
+        middleware=[Middleware(PassMiddleware) for _ in range(layers)]
+        + [Middleware(SecureHeadersMiddleware)],
+        instrumentation=instrumentation,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    event = v2_event()
+    configurations = {
+        "disabled": lambda: None,
+        "timing": lambda: Instrumentation(),
+        "header + emf": lambda: Instrumentation(
+            server_timing=True, emf=True, stream=io.StringIO()
+        ),
+    }
+
+    print(
+        f"{'layers':<7} " + " ".join(f"{name + ' (us)':>18}" for name in configurations)
+    )
+    for layers in (0, 3, 10):
+        results = []
+        for make_instrumentation in configurations.values():
+            app = build_app(layers, make_instrumentation())
+            elapsed = min(
+                timeit.repeat(
+                    lambda: app(event, None), number=args.number, repeat=args.repeat
+                )
+            )
+            results.append(elapsed / args.number * 1e6)
+        print(f"{layers:<7} " + " ".join(f"{result:>18.2f}" for result in results))
+
+
+if __name__ == "__main__":
+    main()
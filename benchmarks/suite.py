@@ -0,0 +1,347 @@
+"""Benchmark suite for the request pipeline over the event corpus.
+
+Each event in benchmarks.corpus is measured through every stage in
+isolation (request parsing, route resolution, the middleware stack around a
+stub router, response rendering) and end to end through
+Application.__call__. Results are written as JSON and can be compared
+against a baseline, exiting non-zero when a benchmark is slower by more than
+the threshold.
+
+Usage:
+    python -m benchmarks.suite [-k small_get] [--quick] [--output new.json]
+    python -m benchmarks.suite --compare base.json [--threshold 0.1]
+    python -m benchmarks.suite --load new.json --compare base.json
+"""
+import argparse
+import datetime
+import gc
+import json
+import platform
+import statistics
+import subprocess
+import sys
+from time import perf_counter_ns
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from pitcher import Application, Middleware, Request, Route
+from pitcher.middleware import CORSMiddleware, SecureHeadersMiddleware
+from pitcher.response import Response
+
+from benchmarks.corpus import events
+
+STAGES = ("request", "router", "middleware", "render", "e2e")
+
+MIDDLEWARE = [
+    Middleware(CORSMiddleware, allow_origins=["https://app.example.com"]),
+    Middleware(SecureHeadersMiddleware),
+]
+
+
+def get_item(request: Request, app: Any) -> dict:
+    return {"id": request.params["id"], "page": request.query.get("page")}
+
+
+def create_items(request: Request, app: Any) -> Response:
+    return Response(201, request.json_body())
+
+
+def upload(request: Request, app: Any) -> dict:
+    return {"name": request.params["name"], "size": len(request.body)}
+
+
+def profile(request: Request, app: Any) -> dict:
+    return {"headers": len(request.headers), "cookies": len(request.cookies)}
+
+
+def build_app() -> Application:
+    return Application(
+        name="bench",
+        routes=[
+            Route("/items/{id:int}", get_item),
+            Route("/items", create_items, methods=["POST"]),
+            Route("/uploads/{name}", upload, methods=["POST"]),
+            Route("/profile", profile),
+        ],
+        middleware=MIDDLEWARE,
+    )
+
+
+class StubRouter:
+    # stands in for the router so only the middleware layers are measured
+    is_async = False
+
+    def __call__(self, request: Request, app: Any) -> Response:
+        return Response(200, {"ok": True})
+
+
+def touch(request: Request) -> None:
+    # the fields a typical view and the middleware read
+    request.method
+    request.path
+    request.headers.get("content-type")
+    request.query
+    request.cookies
+    request.params
+    request.body
+    if request.content_type == "application/json":
+        request.json_body()
+
+
+# a benchmark is given a loop count and returns a function running that many
+# operations, so per-operation inputs are built outside the timed region
+Runner = Callable[[int], Callable[[], None]]
+
+
+class Benchmark(NamedTuple):
+    name: str
+    setup: Runner
+
+
+def stage_benchmarks(name: str, event: Dict[str, Any]) -> List[Benchmark]:
+    app = build_app()
+    codec = app.json_codec
+
+    def new_request() -> Request:
+        return Request(event, None, json_codec=codec)
+
+    def request_stage(loops: int) -> Callable[[], None]:
+        def run() -> None:
+            for _ in range(loops):
+                touch(Request(event, None, json_codec=codec))
+
+        return run
+
+    def router_stage(loops: int) -> Callable[[], None]:
+        requests = [new_request() for _ in range(loops)]
+        resolve = app.router.resolve
+
+        def run() -> None:
+            for request in requests:
+                resolve(request, app)
+
+        return run
+
+    stub_app = build_app()
+    stub_app.router = StubRouter()  # type: ignore
+    stub_app.middleware_stack = stub_app._build_middleware_stack()
+
+    def middleware_stage(loops: int) -> Callable[[], None]:
+        requests = [new_request() for _ in range(loops)]
+        for request in requests:
+            request.headers
+        stack = stub_app.middleware_stack
+
+        def run() -> None:
+            for request in requests:
+                stack(request, stub_app)
+
+        return run
+
+    def render_stage(loops: int) -> Callable[[], None]:
+        request = new_request()
+        response = app.middleware_stack(request, app)
+        default_headers = app.default_headers
+
+        def run() -> None:
+            for _ in range(loops):
+                response.render(request.version, codec, default_headers)
+
+        return run
+
+    def e2e_stage(loops: int) -> Callable[[], None]:
+        def run() -> None:
+            for _ in range(loops):
+                app(event, None)
+
+        return run
+
+    stages = [request_stage, router_stage, middleware_stage, render_stage, e2e_stage]
+    return [Benchmark(f"{stage}.{name}", setup) for stage, setup in zip(STAGES, stages)]
+
+
+def benchmarks() -> List[Benchmark]:
+    found = []
+    for name, event in events().items():
+        found.extend(stage_benchmarks(name, event))
+    return found
+
+
+def timed(run: Callable[[], None]) -> int:
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = perf_counter_ns()
+        run()
+        return perf_counter_ns() - start
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def calibrate(benchmark: Benchmark, min_time: float) -> int:
+    # grow the loop count until a run takes at least min_time seconds
+    loops = 1
+    while True:
+        elapsed = timed(benchmark.setup(loops)) / 1e9
+        if elapsed >= min_time:
+            return loops
+        if elapsed <= 0:
+            loops *= 10
+        else:
+            loops = max(loops * 2, int(loops * min_time * 1.2 / elapsed))
+
+
+def measure(benchmark: Benchmark, repeat: int, min_time: float) -> Dict[str, Any]:
+    loops = calibrate(benchmark, min_time)
+    # a warmup run, then ns per operation for each repeat
+    timed(benchmark.setup(loops))
+    samples = [timed(benchmark.setup(loops)) / loops for _ in range(repeat)]
+    return {
+        "loops": loops,
+        "samples": samples,
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def metadata(repeat: int, min_time: float) -> Dict[str, Any]:
+    return {
+        "date": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "revision": git_revision(),
+        "json_codec": type(build_app().json_codec).__name__,
+        "repeat": repeat,
+        "min_time": min_time,
+    }
+
+
+def run_suite(
+    selected: List[Benchmark], repeat: int, min_time: float, verbose: bool = True
+) -> Dict[str, Any]:
+    results = {}
+    if verbose:
+        print(f"{'benchmark':<36} {'median (us)':>12} {'min (us)':>10} {'stdev':>8}")
+    for benchmark in selected:
+        result = measure(benchmark, repeat, min_time)
+        results[benchmark.name] = result
+        if verbose:
+            print(
+                f"{benchmark.name:<36} {result['median'] / 1000:>12.2f} "
+                f"{result['min'] / 1000:>10.2f} "
+                f"{result['stdev'] / result['median']:>7.1%}"
+            )
+    return {"metadata": metadata(repeat, min_time), "benchmarks": results}
+
+
+class Comparison(NamedTuple):
+    name: str
+    baseline: float
+    current: float
+
+    @property
+    def change(self) -> float:
+        return self.current / self.baseline - 1
+
+
+def compare(
+    baseline: Dict[str, Any], current: Dict[str, Any], threshold: float
+) -> Tuple[List[Comparison], List[Comparison]]:
+    """Compare median times of the benchmarks in both results.
+
+    Returns every comparison and those slower than the baseline by more than
+    the threshold, a fraction of the baseline time.
+    """
+    comparisons = [
+        Comparison(name, baseline["benchmarks"][name]["median"], result["median"])
+        for name, result in current["benchmarks"].items()
+        if name in baseline["benchmarks"]
+    ]
+    regressions = [c for c in comparisons if c.change > threshold]
+    return comparisons, regressions
+
+
+def print_comparison(
+    comparisons: List[Comparison], regressions: List[Comparison], threshold: float
+) -> None:
+    print(f"{'benchmark':<36} {'base (us)':>10} {'new (us)':>10} {'change':>8}")
+    for c in comparisons:
+        flag = "  REGRESSION" if c in regressions else ""
+        print(
+            f"{c.name:<36} {c.baseline / 1000:>10.2f} {c.current / 1000:>10.2f} "
+            f"{c.change:>+8.1%}{flag}"
+        )
+    print(
+        f"{len(regressions)} of {len(comparisons)} benchmarks slower by more "
+        f"than {threshold:.0%}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-k", "--filter", help="only run benchmarks whose name contains this"
+    )
+    parser.add_argument("--list", action="store_true", help="list benchmark names")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument(
+        "--min-time", type=float, default=0.2, help="seconds per timed run"
+    )
+    parser.add_argument(
+        "--quick", action="store_true", help="fewer, shorter runs for a smoke test"
+    )
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--load", help="read results from this file, not a run")
+    parser.add_argument("--compare", help="baseline results to compare against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="fail when slower than the baseline by more than this fraction",
+    )
+    args = parser.parse_args()
+
+    selected = [b for b in benchmarks() if not args.filter or args.filter in b.name]
+    if args.list:
+        for benchmark in selected:
+            print(benchmark.name)
+        return
+
+    if args.load:
+        with open(args.load) as fh:
+            results = json.load(fh)
+    else:
+        if args.quick:
+            args.repeat, args.min_time = 3, 0.02
+        results = run_suite(selected, args.repeat, args.min_time)
+
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(results, fh, indent=2)
+
+    if args.compare:
+        with open(args.compare) as fh:
+            baseline = json.load(fh)
+        comparisons, regressions = compare(baseline, results, args.threshold)
+        print()
+        print_comparison(comparisons, regressions, args.threshold)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
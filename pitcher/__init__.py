@@ -1,5 +1,35 @@
-from .application import Application
-from .middleware import Middleware
-from .request import Request
-from .response import Response
-from .router import Route
+from typing import TYPE_CHECKING, Any, List
+
+if TYPE_CHECKING:
+    from .application import Application
+    from .middleware import Middleware
+    from .request import Request
+    from .response import Response
+    from .router import Route
+
+# submodules are imported on first attribute access to keep cold starts fast
+_LAZY_ATTRIBUTES = {
+    "Application": ".application",
+    "Middleware": ".middleware",
+    "Request": ".request",
+    "Response": ".response",
+    "Route": ".router",
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    import importlib
+
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,198 @@
+import asyncio
+import contextvars
+import functools
+from types import MappingProxyType
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+)
+
+from ..json_codecs import DEFAULT_CODEC, JSONCodec
+from ..request import Headers, Request
+from ..response import Response
+from .wsgi import decode_body, join_query, next_request_id, split_cookies
+
+Scope = Dict[str, Any]
+Message = Dict[str, Any]
+
+# marks the end of a response's body chunks
+_DONE = object()
+
+
+class ASGIRequest(Request):
+    """A request read from an ASGI HTTP scope and its received body.
+
+    Fields are loaded lazily from the scope as they are for events. The
+    event slot holds the scope and `version` is "2.0", the event format the
+    request most resembles.
+    """
+
+    __slots__ = ["raw_body"]
+
+    def __init__(
+        self, scope: Scope, body: bytes, json_codec: JSONCodec = DEFAULT_CODEC
+    ) -> None:
+        self.event = scope
+        self.context = None
+        self.json_codec = json_codec
+        self.version = "2.0"
+        self.request_context = {}
+        self.method = scope["method"].upper()
+        # unresolved, the router matches the path
+        self.resource_path = None
+        self.raw_body = body
+
+    def _load_id(self) -> Optional[str]:
+        return next_request_id(self.headers.get("x-request-id"))
+
+    def _load_headers(self) -> Headers:
+        headers: Dict[str, str] = {}
+        for name, value in self.event["headers"]:
+            key = name.decode("latin-1")
+            value = value.decode("latin-1")
+            if key in headers:
+                # split_cookies splits on ";", other headers join with ","
+                separator = "; " if key == "cookie" else ","
+                value = headers[key] + separator + value
+            headers[key] = value
+        return Headers(headers)
+
+    def _load_query(self) -> Mapping[str, str]:
+        return join_query(self.event.get("query_string", b"").decode("latin-1"))
+
+    def _load_stage_variables(self) -> Mapping[str, str]:
+        return MappingProxyType({})
+
+    def _load_params(self) -> Dict[str, Any]:
+        return {}
+
+    def _load_path(self) -> Optional[str]:
+        # unlike PATH_INFO, the ASGI path already includes root_path
+        return self.event["path"]
+
+    def _load_authorizer(self) -> Optional[Dict[str, Any]]:
+        return None
+
+    def _load_cookies(self) -> List[str]:
+        return split_cookies(self.headers.get("cookie"))
+
+    def _load_binary(self) -> bool:
+        return isinstance(self.body, bytes)
+
+    def _load_body(self) -> Any:
+        return decode_body(self.raw_body) if self.raw_body else None
+
+
+class ASGIAdapter:
+    """Serve an Application as an ASGI app, e.g. under uvicorn.
+
+    Applications are sync at the top of their middleware stack, so requests
+    are dispatched on the default executor and never block the server's
+    loop. Async views still run on the application's own event loop. Apps
+    whose views never block can pass `threadpool=False` to dispatch on the
+    server's loop and skip the hop to the executor. The on_invocation
+    functions run for each request with the scope in place of the event.
+    """
+
+    def __init__(self, app: Any, threadpool: bool = True) -> None:
+        self.app = app
+        self.threadpool = threadpool
+
+    async def __call__(
+        self,
+        scope: Scope,
+        receive: Callable[[], Awaitable[Message]],
+        send: Callable[[Message], Awaitable[None]],
+    ) -> None:
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            raise ValueError(f"Unsupported ASGI scope type {scope['type']}")
+
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+
+        loop = asyncio.get_running_loop()
+        if self.threadpool:
+            status, headers, chunks = await self.run(
+                loop, self.handle, scope, bytes(body)
+            )
+        else:
+            status, headers, chunks = self.handle(scope, bytes(body))
+
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (name.lower().encode("latin-1"), value.encode("latin-1"))
+                    for name, value in headers
+                ],
+            }
+        )
+
+        if isinstance(chunks, tuple):
+            # rendered whole, no need to iterate on the executor
+            await send({"type": "http.response.body", "body": b"".join(chunks)})
+            return
+
+        iterator = iter(chunks)
+        while True:
+            chunk = await self.run(loop, next, iterator, _DONE)
+            if chunk is _DONE:
+                break
+            if chunk:
+                await send(
+                    {"type": "http.response.body", "body": chunk, "more_body": True}
+                )
+        await send({"type": "http.response.body", "body": b""})
+
+    async def lifespan(
+        self,
+        receive: Callable[[], Awaitable[Message]],
+        send: Callable[[Message], Awaitable[None]],
+    ) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.app.event_loop.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def run(self, loop: asyncio.AbstractEventLoop, func: Callable, *args: Any) -> Any:
+        # the context is copied so context variables set by the server reach
+        # the application and its log records
+        context = contextvars.copy_context()
+        return loop.run_in_executor(None, functools.partial(context.run, func, *args))
+
+    def handle(
+        self, scope: Scope, body: bytes
+    ) -> Tuple[int, List[Tuple[str, str]], Iterable[bytes]]:
+        app = self.app
+        app._run_on_invocation(scope, None)
+        return app.respond(
+            ASGIRequest(scope, body, json_codec=app.json_codec), self._render
+        )
+
+    def _render(
+        self, request: Request, response: Response
+    ) -> Tuple[int, List[Tuple[str, str]], Iterable[bytes]]:
+        return response.to_http(
+            json_codec=self.app.json_codec, default_headers=self.app.default_headers
+        )
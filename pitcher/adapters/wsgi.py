@@ -0,0 +1,150 @@
+from http import HTTPStatus
+from itertools import count
+import os
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+from urllib.parse import parse_qsl
+
+from ..json_codecs import DEFAULT_CODEC, JSONCodec
+from ..request import Headers, Request
+from ..response import Response
+
+STATUS_LINES = {
+    status.value: f"{status.value} {status.phrase}" for status in HTTPStatus
+}
+
+_request_ids = count(1)
+
+
+def next_request_id(header: Optional[str]) -> str:
+    # prefer the id set by a load balancer or ingress
+    if header:
+        return header
+    return f"{os.getpid():x}-{next(_request_ids):x}"
+
+
+def join_query(query_string: str) -> Mapping[str, str]:
+    # repeated parameters are comma joined, as in v2.0 events
+    query: Dict[str, str] = {}
+    for name, value in parse_qsl(query_string, keep_blank_values=True):
+        query[name] = query[name] + "," + value if name in query else value
+    return MappingProxyType(query)
+
+
+def split_cookies(header: Optional[str]) -> List[str]:
+    if not header:
+        return []
+    return [cookie.strip() for cookie in header.split(";") if cookie.strip()]
+
+
+def decode_body(body: bytes) -> Any:
+    # text bodies are str as in events, other bodies stay bytes
+    try:
+        return body.decode("utf-8")
+    except UnicodeDecodeError:
+        return body
+
+
+class WSGIRequest(Request):
+    """A request read from a WSGI environ rather than an API Gateway event.
+
+    Fields are loaded lazily from the environ as they are for events. The
+    event slot holds the environ and `version` is "2.0", the event format
+    the request most resembles.
+    """
+
+    __slots__: List[str] = []
+
+    def __init__(self, environ: Dict[str, Any], json_codec: JSONCodec = DEFAULT_CODEC):
+        self.event = environ
+        self.context = None
+        self.json_codec = json_codec
+        self.version = "2.0"
+        self.request_context = {}
+        self.method = environ["REQUEST_METHOD"].upper()
+        # unresolved, the router matches the path
+        self.resource_path = None
+
+    def _load_id(self) -> Optional[str]:
+        return next_request_id(self.event.get("HTTP_X_REQUEST_ID"))
+
+    def _load_headers(self) -> Headers:
+        environ = self.event
+        headers = {
+            name[5:].replace("_", "-"): value
+            for name, value in environ.items()
+            if name.startswith("HTTP_")
+        }
+        if "CONTENT_TYPE" in environ:
+            headers["content-type"] = environ["CONTENT_TYPE"]
+        if "CONTENT_LENGTH" in environ:
+            headers["content-length"] = environ["CONTENT_LENGTH"]
+        return Headers(headers)
+
+    def _load_query(self) -> Mapping[str, str]:
+        return join_query(self.event.get("QUERY_STRING", ""))
+
+    def _load_stage_variables(self) -> Mapping[str, str]:
+        return MappingProxyType({})
+
+    def _load_params(self) -> Dict[str, Any]:
+        return {}
+
+    def _load_path(self) -> Optional[str]:
+        # PEP 3333 paths are bytes decoded as latin-1
+        path = self.event.get("SCRIPT_NAME", "") + self.event.get("PATH_INFO", "")
+        return path.encode("latin-1").decode("utf-8", "replace") or "/"
+
+    def _load_authorizer(self) -> Optional[Dict[str, Any]]:
+        return None
+
+    def _load_cookies(self) -> List[str]:
+        return split_cookies(self.event.get("HTTP_COOKIE"))
+
+    def _load_binary(self) -> bool:
+        return isinstance(self.body, bytes)
+
+    def _load_body(self) -> Any:
+        stream = self.event["wsgi.input"]
+        try:
+            length = int(self.event.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            length = 0
+
+        if length > 0:
+            body = stream.read(length)
+        elif self.event.get("wsgi.input_terminated"):
+            # chunked requests without a length, read until the end
+            body = stream.read()
+        else:
+            return None
+        return decode_body(body) if body else None
+
+
+class WSGIAdapter:
+    """Serve an Application as a WSGI app, e.g. under gunicorn.
+
+    The on_invocation functions run for each request with the environ in
+    place of the event.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    def __call__(
+        self, environ: Dict[str, Any], start_response: Callable
+    ) -> Iterable[bytes]:
+        app = self.app
+        app._run_on_invocation(environ, None)
+        status, headers, body = app.respond(
+            WSGIRequest(environ, json_codec=app.json_codec), self._render
+        )
+        start_response(STATUS_LINES.get(status, f"{status} Unknown"), headers)
+        return body
+
+    def _render(
+        self, request: Request, response: Response
+    ) -> Tuple[int, List[Tuple[str, str]], Iterable[bytes]]:
+        return response.to_http(
+            json_codec=self.app.json_codec, default_headers=self.app.default_headers
+        )
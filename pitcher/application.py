@@ -1,12 +1,42 @@
-from typing import Callable, List, Optional, Sequence, Any, Mapping
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Any,
+    Mapping,
+    Union,
+)
 import logging
+import threading
+from time import perf_counter_ns
 
-from .middleware import Middleware
+from .concurrency import (
+    EventLoopThread,
+    async_to_sync,
+    is_async_callable,
+    sync_to_async,
+)
+from .json_codecs import JSONCodec, get_codec
+from .log import current_request, is_enabled_for, log
 from .router import Router, Route
 from .request import Request
 from .response import PlainTextResponse, Response
 from .exceptions import APIException
 
+T = TypeVar("T")
+
+if TYPE_CHECKING:
+    from concurrent.futures import ThreadPoolExecutor
+    import os
+
+    from .middleware import Middleware
+    from .timing import Instrumentation
+
 
 class Application:
     def __init__(
@@ -14,25 +44,80 @@ class Application:
         name: str,
         routes: List[Route],
         base: str = "",
-        middleware: Sequence[Middleware] = [],
+        middleware: Sequence["Middleware"] = [],
         logger: Optional[Any] = None,
         on_invocation: List[Callable] = [],
         exception_handler: Optional[Callable[[Exception], Response]] = None,
+        json_codec: Union[str, JSONCodec] = "json",
+        route_snapshot: Optional[Union[str, "os.PathLike", Mapping[str, Any]]] = None,
+        debug: bool = False,
+        on_response: List[Callable] = [],
+        instrumentation: Optional["Instrumentation"] = None,
     ) -> None:
+        self.name = name
         self.base = base
+        self.debug = debug
         self.middleware = middleware
-        self.router = Router(base=base, routes=routes)
-        self.middleware_stack = self._build_middleware_stack()
+        self.route_list = routes
+        if route_snapshot is not None and not isinstance(route_snapshot, Mapping):
+            from .snapshot import load_snapshot
+
+            route_snapshot = load_snapshot(route_snapshot)
+        self.router = Router(
+            base=base, routes=routes, snapshot=route_snapshot, validate_snapshot=debug,
+        )
+        self.event_loop = EventLoopThread()
         if logger:
             self.logger = logger
         else:
             self.logger = logging.getLogger(name)
+        self.debug_logging = is_enabled_for(self.logger, logging.DEBUG)
+        self.on_response = on_response
+        if on_response and instrumentation is None:
+            from .timing import Instrumentation
+
+            instrumentation = Instrumentation()
+        self.instrumentation = instrumentation
+        self.middleware_stack = self._build_middleware_stack()
         self.on_invocation = on_invocation
         self.exception_handler = exception_handler
+        self.json_codec = get_codec(json_codec)
+        self._executor: Optional["ThreadPoolExecutor"] = None
+        self._executor_workers = 0
+        self._executor_lock = threading.Lock()
 
     def __call__(self, event: Mapping[str, Any], context: Any):
-        self.logger.debug("event invocation", extra=event)
+        self._run_on_invocation(event, context)
+        return self._handle(event, context)
+
+    def handle_batch(
+        self,
+        events: Sequence[Mapping[str, Any]],
+        context: Any,
+        max_workers: Optional[int] = None,
+    ) -> List[dict]:
+        """Handle a list of API Gateway events in one Lambda invocation.
+
+        The on_invocation functions run once per event, in order, before any
+        event is handled. Responses are returned in the order of the events and
+        an error in one event renders a 500 for that event only. With
+        `max_workers` the events are handled concurrently on a thread pool
+        that is kept for later warm invocations.
+        """
+        for event in events:
+            self._run_on_invocation(event, context)
+        if self.debug_logging:
+            log(self.logger, logging.DEBUG, f"batch invocation of {len(events)} events")
 
+        if not max_workers or max_workers < 2 or len(events) < 2:
+            return [self._handle_isolated(event, context) for event in events]
+
+        executor = self._get_executor(max_workers)
+        return list(
+            executor.map(lambda event: self._handle_isolated(event, context), events)
+        )
+
+    def _run_on_invocation(self, event: Any, context: Any) -> None:
         if self.on_invocation:
             for func in self.on_invocation:
                 try:
@@ -40,13 +125,114 @@ class Application:
                 except:
                     self.logger.exception("on_invocation function raised an exception")
 
-        request = Request(event, context)
-        self.logger.debug(
-            "request: {method} {path}",
-            method=request.method,
-            path=request.resource_path,
+        # checked once per invocation, after on_invocation functions that may
+        # replace or configure the logger
+        self.debug_logging = is_enabled_for(self.logger, logging.DEBUG)
+
+    def _get_executor(self, max_workers: int) -> "ThreadPoolExecutor":
+        from concurrent.futures import ThreadPoolExecutor
+
+        with self._executor_lock:
+            if self._executor is None or self._executor_workers != max_workers:
+                if self._executor is not None:
+                    self._executor.shutdown(wait=False)
+                self._executor = ThreadPoolExecutor(
+                    max_workers=max_workers, thread_name_prefix="pitcher-batch"
+                )
+                self._executor_workers = max_workers
+            return self._executor
+
+    def _handle_isolated(self, event: Mapping[str, Any], context: Any) -> dict:
+        try:
+            return self._handle(event, context)
+        except Exception:
+            self.logger.exception("batch event error")
+            version = (
+                event.get("version", "1.0") if isinstance(event, Mapping) else "1.0"
+            )
+            response = PlainTextResponse(500, "An internal server error occurred.")
+            return response.render(
+                version=version,
+                json_codec=self.json_codec,
+                default_headers=self.default_headers,
+            )
+
+    def stream(self, event: Mapping[str, Any], context: Any, writer: Any) -> None:
+        """Handle an event writing the response to a Lambda response stream.
+
+        Bodies of StreamingResponse are written as they are produced, other
+        responses are written whole. The writer is left open for the caller.
+        Once the prelude is written the status can no longer change, so an
+        error while streaming the body ends the stream early.
+        """
+        self._run_on_invocation(event, context)
+
+        def write(request: Request, response: Response) -> None:
+            try:
+                response.stream(
+                    writer,
+                    json_codec=self.json_codec,
+                    default_headers=self.default_headers,
+                )
+            except Exception:
+                self.logger.exception("response stream error")
+
+        self.respond(self._request(event, context), write)
+
+    def _handle(self, event: Mapping[str, Any], context: Any) -> dict:
+        return self.respond(self._request(event, context), self._render)
+
+    def _render(self, request: Request, response: Response) -> dict:
+        return response.render(
+            version=request.version,
+            json_codec=self.json_codec,
+            default_headers=self.default_headers,
         )
 
+    def respond(self, request: Request, render: Callable[[Request, Response], T]) -> T:
+        """Dispatch a request and return its response as rendered by `render`.
+
+        Handling events goes through here, and the WSGI and ASGI adapters
+        call it with requests built from the environ or scope and a render
+        function writing HTTP responses.
+        """
+        if self.instrumentation is not None and request.timer is None:
+            request.timer = self.instrumentation.start()
+
+        token = current_request.set((request, perf_counter_ns()))
+        try:
+            response = self._dispatch(request)
+            rendered = render(request, response)
+            if self.instrumentation is not None:
+                self.instrumentation.after_render(
+                    request, response, self.on_response, self
+                )
+            return rendered
+        finally:
+            current_request.reset(token)
+
+    def _request(self, event: Mapping[str, Any], context: Any) -> Request:
+        if self.instrumentation is not None:
+            timer = self.instrumentation.start()
+            request = Request(event, context, json_codec=self.json_codec)
+            request.timer = timer
+            return request
+        return Request(event, context, json_codec=self.json_codec)
+
+    def _dispatch(self, request: Request) -> Response:
+        if self.debug_logging:
+            # a few fields rather than the whole event, which may be large
+            log(
+                self.logger,
+                logging.DEBUG,
+                f"request {request.method} {request.path}",
+                {
+                    "version": request.version,
+                    "request_id": request.id,
+                    "route": request.resource_path,
+                },
+            )
+
         try:
             response = self.middleware_stack(request, self)
         except APIException as ex:
@@ -58,16 +244,73 @@ class Application:
             else:
                 response = PlainTextResponse(500, "An internal server error occurred.",)
 
-        self.logger.debug(
-            "response status {status_code}", status_code=response.status_code
-        )
-        return response.render(version=request.version)
+        if self.debug_logging:
+            log(self.logger, logging.DEBUG, f"response status {response.status_code}")
+        if self.instrumentation is not None:
+            self.instrumentation.before_render(request, response)
+        return response
 
     def _build_middleware_stack(self) -> Callable[[Request, Any], Response]:
-        # wrap the middleware around the router from last to first
+        # wrap the middleware around the router from last to first, adapting
+        # between sync and async layers where they meet. Async layers are
+        # driven on the application's event loop, kept across invocations.
+        # Pass-through layers are dropped and header-only layers are fused
+        # into default headers merged once when the response is rendered
+
+        self.default_headers: Dict[str, str] = {}
+        self.call_depth = 1
+
+        timed = self.instrumentation is not None
+        func: Any = self.router.call_timed if timed else self.router
+        is_async = self.router.is_async
+        if is_async:
+            func = self.router.call_async_timed if timed else self.router.call_async
+
+        if self.middleware:
+            from .middleware import fused_headers, is_passthrough
+        if timed:
+            from .timing import timed_layer
+
+        for index, (cls, options) in reversed(list(enumerate(self.middleware))):
+            next_func = func
+            layer_is_async = is_async_callable(cls)
+            if layer_is_async and not is_async:
+                next_func = sync_to_async(func)
+            elif is_async and not layer_is_async:
+                next_func = async_to_sync(func, self.event_loop)
+
+            layer = cls(next_func, **options)
+
+            if is_passthrough(layer):
+                continue
+
+            headers = fused_headers(layer)
+            if headers is not None:
+                # inner layers ran first, so their headers take precedence
+                for name, value in headers.items():
+                    self.default_headers.setdefault(name, value)
+                continue
+
+            self.call_depth += 2 if next_func is not func else 1
+            func = layer
+            is_async = layer_is_async
+
+            if timed:
+                # the position keeps layers of the same class apart
+                name = f"middleware.{index}.{cls.__name__}"
+                func = timed_layer(layer, name, is_async)
+                self.call_depth += 1
+
+        if is_async:
+            func = async_to_sync(func, self.event_loop)
+            self.call_depth += 1
 
-        func = self.router
-        for cls, options in reversed(self.middleware):
-            func = cls(func, **options)
+        if is_enabled_for(self.logger, logging.DEBUG):
+            log(
+                self.logger,
+                logging.DEBUG,
+                f"middleware stack of {len(self.middleware)} layers compiled "
+                f"to a call depth of {self.call_depth}",
+            )
 
         return func
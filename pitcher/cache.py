@@ -0,0 +1,339 @@
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+import threading
+from time import monotonic
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from .concurrency import is_async_callable
+from .request import Request
+from .response import RawJSONResponse, Response
+
+CACHEABLE_METHODS = ("GET", "HEAD")
+
+# headers a 304 response must repeat from the full response
+NOT_MODIFIED_HEADERS = (
+    "cache-control",
+    "content-location",
+    "etag",
+    "expires",
+    "last-modified",
+    "vary",
+)
+
+
+class CachedBody:
+    __slots__ = ["status_code", "body", "headers", "content_type", "vary"]
+
+    def __init__(
+        self,
+        status_code: int,
+        body: str,
+        headers: Dict[str, str],
+        content_type: str,
+        vary: List[str],
+    ) -> None:
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers
+        self.content_type = content_type
+        self.vary = vary
+
+    def response(self) -> Response:
+        response = RawJSONResponse(
+            self.status_code,
+            self.body,
+            headers=dict(self.headers),
+            content_type=self.content_type,
+        )
+        for header in self.vary:
+            response.vary(header)
+        return response
+
+
+class ResponseCache:
+    """A thread safe LRU mapping with per entry expiry."""
+
+    def __init__(self, ttl: Optional[float] = 60.0, maxsize: int = 128) -> None:
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, Tuple[Optional[float], Any]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires, value = entry
+            if expires is not None and expires <= monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        expires = monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def cache_response(
+    ttl: Optional[float] = 60.0, maxsize: int = 128, query: Sequence[str] = ()
+) -> Callable[[Callable], Callable]:
+    """Memoize the rendered body of a view in warm Lambda memory.
+
+    Responses are keyed by route, path params and the listed query params.
+    Only successful GET and HEAD responses without cookies are cached, hits
+    are answered without calling the view or the serializer. Async views
+    get an async wrapper.
+    """
+
+    def decorator(view_func: Callable[[Request, Any], Any]) -> Callable:
+        cache = ResponseCache(ttl=ttl, maxsize=maxsize)
+
+        def cache_key(request: Request) -> Hashable:
+            return (
+                request.resource_path,
+                tuple(sorted(request.params.items())),
+                tuple(request.query.get(name) for name in query),
+            )
+
+        def store(key: Hashable, response: Any, app: Any) -> Any:
+            if not isinstance(response, Response):
+                response = Response(200, data=response)
+
+            if (
+                200 <= response.status_code < 300
+                and not response._cookies
+                and not response.streaming
+            ):
+                body = response.render_body(app.json_codec)
+                if isinstance(body, str):
+                    cached = CachedBody(
+                        response.status_code,
+                        body,
+                        dict(response._headers),
+                        response.content_type,
+                        list(response._vary_headers),
+                    )
+                    cache.set(key, cached)
+                    return cached.response()
+
+            return response
+
+        if is_async_callable(view_func):
+
+            @wraps(view_func)
+            async def async_wrapper(request: Request, app: Any) -> Any:
+                if request.method not in CACHEABLE_METHODS:
+                    return await view_func(request, app)
+
+                key = cache_key(request)
+                cached = cache.get(key)
+                if cached is not None:
+                    return cached.response()
+                return store(key, await view_func(request, app), app)
+
+            async_wrapper.cache = cache  # type: ignore
+            return async_wrapper
+
+        @wraps(view_func)
+        def wrapper(request: Request, app: Any) -> Any:
+            if request.method not in CACHEABLE_METHODS:
+                return view_func(request, app)
+
+            key = cache_key(request)
+            cached = cache.get(key)
+            if cached is not None:
+                return cached.response()
+            return store(key, view_func(request, app), app)
+
+        wrapper.cache = cache  # type: ignore
+        return wrapper
+
+    return decorator
+
+
+def make_etag(body: Union[str, bytes]) -> str:
+    import hashlib
+
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def quote_etag(etag: str) -> str:
+    if etag.startswith('"') or etag.startswith('W/"'):
+        return etag
+    return f'"{etag}"'
+
+
+def http_date(value: datetime) -> str:
+    from email.utils import format_datetime
+
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def parse_http_date(value: str) -> Optional[datetime]:
+    from email.utils import parsedate_to_datetime
+
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if parsed is None:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def get_header(headers: Mapping[str, str], name: str) -> Optional[str]:
+    """Case-insensitive lookup in a response's headers."""
+    value = headers.get(name)
+    if value is not None:
+        return value
+    name = name.lower()
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def is_not_modified(
+    request: Request,
+    etag: Optional[str] = None,
+    last_modified: Optional[datetime] = None,
+) -> bool:
+    """Evaluate If-None-Match and If-Modified-Since for a GET or HEAD request."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if etag is None:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        # weak comparison, the W/ prefix is ignored
+        etag = etag[2:] if etag.startswith("W/") else etag
+        for candidate in if_none_match.split(","):
+            candidate = candidate.strip()
+            if candidate.startswith("W/"):
+                candidate = candidate[2:]
+            if candidate == etag:
+                return True
+        return False
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None and last_modified is not None:
+        since = parse_http_date(if_modified_since)
+        if since is None:
+            return False
+        if last_modified.tzinfo is None:
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+        return last_modified.replace(microsecond=0) <= since
+
+    return False
+
+
+def not_modified(response: Response) -> Response:
+    headers = {
+        name: value
+        for name, value in response._headers.items()
+        if name.lower() in NOT_MODIFIED_HEADERS
+    }
+    result = Response(304, headers=headers)
+    result._vary_headers = list(response._vary_headers)
+    return result
+
+
+def conditional(
+    etag: Optional[Callable[[Request, Any], Optional[str]]] = None,
+    last_modified: Optional[Callable[[Request, Any], Optional[datetime]]] = None,
+) -> Callable[[Callable], Callable]:
+    """Answer conditional requests before running an expensive view.
+
+    `etag` and `last_modified` are called with the request and app and should
+    be cheap, e.g. reading a version number or an updated_at column. When the
+    client's copy is current the view is skipped and a 304 is returned. Async
+    views get an async wrapper.
+    """
+
+    def decorator(view_func: Callable[[Request, Any], Any]) -> Callable:
+        def validators(request: Request, app: Any) -> Tuple[Dict[str, str], bool]:
+            # the ETag and Last-Modified headers, and whether the client's
+            # copy is current
+            headers = {}
+
+            current_etag = etag(request, app) if etag else None
+            if current_etag is not None:
+                current_etag = quote_etag(current_etag)
+                headers["ETag"] = current_etag
+
+            modified = last_modified(request, app) if last_modified else None
+            if modified is not None:
+                headers["Last-Modified"] = http_date(modified)
+
+            return headers, is_not_modified(request, current_etag, modified)
+
+        def add_headers(response: Any, headers: Dict[str, str]) -> Response:
+            if not isinstance(response, Response):
+                response = Response(200, data=response)
+
+            for name, value in headers.items():
+                if get_header(response._headers, name) is None:
+                    response.set_header(name, value)
+
+            return response
+
+        if is_async_callable(view_func):
+
+            @wraps(view_func)
+            async def async_wrapper(request: Request, app: Any) -> Any:
+                if request.method not in CACHEABLE_METHODS:
+                    return await view_func(request, app)
+                headers, current = validators(request, app)
+                if current:
+                    return Response(304, headers=headers)
+                return add_headers(await view_func(request, app), headers)
+
+            return async_wrapper
+
+        @wraps(view_func)
+        def wrapper(request: Request, app: Any) -> Any:
+            if request.method not in CACHEABLE_METHODS:
+                return view_func(request, app)
+            headers, current = validators(request, app)
+            if current:
+                return Response(304, headers=headers)
+            return add_headers(view_func(request, app), headers)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,105 @@
+import contextvars
+import functools
+import threading
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Optional, TypeVar
+
+from .request import Request
+from .response import Response
+
+if TYPE_CHECKING:
+    import asyncio
+
+T = TypeVar("T")
+
+# code flag of async def functions, checked directly to avoid importing
+# inspect and asyncio for apps that only have sync views
+CO_COROUTINE = 0x0080
+
+
+def is_async_callable(func: Any) -> bool:
+    while isinstance(func, functools.partial):
+        func = func.func
+    if _is_coroutine_function(func):
+        return True
+    return _is_coroutine_function(getattr(func, "__call__", None))
+
+
+def _is_coroutine_function(func: Any) -> bool:
+    func = getattr(func, "__func__", func)
+    code = getattr(func, "__code__", None)
+    return code is not None and bool(code.co_flags & CO_COROUTINE)
+
+
+class EventLoopThread:
+    """An asyncio event loop running in a daemon thread.
+
+    The loop is started on first use and kept for the life of the process,
+    so warm Lambda invocations reuse it along with any connections or
+    clients bound to it.
+    """
+
+    def __init__(self) -> None:
+        self._loop: Optional["asyncio.AbstractEventLoop"] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> "asyncio.AbstractEventLoop":
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    import asyncio
+
+                    loop = asyncio.new_event_loop()
+                    self._thread = threading.Thread(
+                        target=loop.run_forever, name="pitcher-loop", daemon=True
+                    )
+                    self._thread.start()
+                    self._loop = loop
+        return self._loop
+
+    def run(self, coro: Awaitable[T]) -> T:
+        loop = self.loop
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("Cannot block on the event loop from its own thread")
+
+        import asyncio
+
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()  # type: ignore
+
+    def close(self) -> None:
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is not None and thread is not None:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+
+
+def sync_to_async(
+    func: Callable[[Request, Any], Response]
+) -> Callable[[Request, Any], Awaitable[Response]]:
+    """Run a sync handler in the loop's executor so it can't block the loop."""
+
+    async def wrapper(request: Request, app: Any) -> Response:
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(
+            None, functools.partial(context.run, func, request, app)
+        )
+
+    return wrapper
+
+
+def async_to_sync(
+    func: Callable[[Request, Any], Awaitable[Response]], runner: EventLoopThread
+) -> Callable[[Request, Any], Response]:
+    """Block the calling thread on an async handler run on the loop thread."""
+
+    def wrapper(request: Request, app: Any) -> Response:
+        return runner.run(func(request, app))
+
+    return wrapper
@@ -1,42 +1,61 @@
-from typing import Any, Callable, Optional
-from uuid import UUID
+from typing import Any, Callable, Dict, NamedTuple, Optional
 import re
 
-int_regex = re.compile(r"\d+")
-str_regex = re.compile(r"[^/]+")
-slug_regex = re.compile(r"[-\w\d_]+")
-path_regex = re.compile(r"[^?#]+")
+slug_regex = re.compile(r"[-\w]+")
+uuid_regex = re.compile(
+    r"[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{12}"
+)
 
 
-def int_converter(value: str) -> int:
-    if re.fullmatch(int_regex, value) is None:
-        raise ValueError("int param not valid")
-    return int(value)
+class Converter(NamedTuple):
+    """A path param type.
 
+    `check` is a cheap predicate run against every candidate value and
+    `convert` turns a checked value into its python type. A converter
+    without `convert` leaves the value as a string.
+    """
 
-def str_converter(value: str) -> int:
-    if re.fullmatch(str_regex, value) is None:
-        raise ValueError("int param not valid")
-    return int(value)
+    check: Callable[[str], Any]
+    convert: Optional[Callable[[str], Any]] = None
 
+    def __call__(self, value: str) -> Any:
+        if not self.check(value):
+            raise ValueError("param not valid")
+        if self.convert is None:
+            return value
+        return self.convert(value)
 
-def uuid_converter(value: str) -> UUID:
-    return UUID(value)
+
+def is_int(value: str) -> bool:
+    # isdigit alone accepts non-ascii digits that int() rejects
+    return value.isascii() and value.isdigit()
+
+
+def is_str(value: str) -> bool:
+    return value != "" and "/" not in value
 
 
-def path_converter(value: str) -> str:
-    if re.fullmatch(path_regex, value) is None:
-        raise ValueError("path param not valid")
-    return value
+def is_path(value: str) -> bool:
+    return value != "" and "?" not in value and "#" not in value
 
 
-def slug_converter(value: str) -> str:
-    if re.fullmatch(slug_regex, value) is None:
-        raise ValueError("slug param not valid")
-    return value
+def is_any(value: str) -> bool:
+    return True
 
 
-CONVERTERS = {
+def to_uuid(value: str) -> Any:
+    from uuid import UUID
+
+    return UUID(value)
+
+
+int_converter = Converter(is_int, int)
+str_converter = Converter(is_str)
+uuid_converter = Converter(uuid_regex.fullmatch, to_uuid)
+path_converter = Converter(is_path)
+slug_converter = Converter(slug_regex.fullmatch)
+
+CONVERTERS: Dict[str, Converter] = {
     "int": int_converter,
     "str": str_converter,
     "uuid": uuid_converter,
@@ -45,5 +64,23 @@ CONVERTERS = {
 }
 
 
-def get_converter(type_name: str) -> Optional[Callable[[str], Any]]:
+def register_converter(
+    name: str,
+    convert: Optional[Callable[[str], Any]] = None,
+    check: Optional[Callable[[str], Any]] = None,
+) -> Converter:
+    """Register a path param type usable as `{param:name}` in routes.
+
+    Values failing `check` or raising from `convert` do not match the route.
+    Register before the `Application` using it is created.
+    """
+    if convert is None and check is None:
+        raise ValueError(f"Converter {name} requires a check or convert function")
+
+    converter = Converter(check if check is not None else is_any, convert)
+    CONVERTERS[name] = converter
+    return converter
+
+
+def get_converter(type_name: str) -> Optional[Converter]:
     return CONVERTERS.get(type_name, None)
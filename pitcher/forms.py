@@ -0,0 +1,365 @@
+"""Parsing of urlencoded and multipart/form-data request bodies.
+
+Bodies are read from Request.stream() in chunks, so base64 encoded bodies
+are decoded as they are parsed rather than all at once. Uploaded files are
+written to spooled temporary files that move to disk past `spool_size`, so
+memory stays bounded however large the upload is.
+"""
+import re
+from tempfile import SpooledTemporaryFile
+from typing import (
+    IO,
+    Any,
+    BinaryIO,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+)
+from urllib.parse import unquote, unquote_to_bytes
+
+from .exceptions import APIException, BadRequest
+
+CHUNK_SIZE = 64 * 1024
+# file parts larger than this are written to disk
+SPOOL_SIZE = 1024 * 1024
+MAX_FIELD_SIZE = 1024 * 1024
+MAX_HEADER_SIZE = 16 * 1024
+MAX_PARTS = 1000
+
+_OPTION = re.compile(r';\s*([^\s;=]+)\s*=\s*("(?:[^"\\]|\\.)*"|[^;]*)')
+_ESCAPE = re.compile(r'\\(["\\])')
+
+# multipart parser states
+_PREAMBLE, _DELIMITER, _HEADERS, _DATA, _END = range(5)
+
+
+def parse_options_header(value: str) -> Tuple[str, Dict[str, str]]:
+    """Split a header such as Content-Type into its value and parameters.
+
+    Parameter names are lowercased. Quoted values are unquoted and RFC 5987
+    extended values, e.g. filename*=UTF-8''%E2%82%AC.txt, are decoded and
+    take precedence over the plain parameter.
+    """
+    main, _, rest = value.partition(";")
+    params: Dict[str, str] = {}
+    extended: Dict[str, str] = {}
+
+    for match in _OPTION.finditer(";" + rest):
+        name = match.group(1).lower()
+        text = match.group(2).strip()
+        if len(text) > 1 and text[0] == text[-1] == '"':
+            text = _ESCAPE.sub(r"\1", text[1:-1])
+
+        if name.endswith("*"):
+            charset, _, encoded = text.partition("'")
+            _, _, encoded = encoded.partition("'")
+            try:
+                extended[name[:-1]] = unquote(encoded, charset or "utf-8", "replace")
+            except LookupError:
+                extended[name[:-1]] = unquote(encoded, "utf-8", "replace")
+        else:
+            params[name] = text
+
+    params.update(extended)
+    return main.strip().lower(), params
+
+
+class FormData(Mapping[str, Any]):
+    """Read-only fields of a form, in the order they were sent.
+
+    Indexing returns the last value of a repeated field, all of its values
+    are available from getlist.
+    """
+
+    __slots__ = ["_items", "_data"]
+
+    def __init__(self, items: Iterable[Tuple[str, Any]] = ()) -> None:
+        self._items = list(items)
+        self._data = dict(self._items)
+
+    def __getitem__(self, key: str) -> Any:
+        return self._data[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __repr__(self) -> str:
+        return f"FormData({self._items!r})"
+
+    def getlist(self, key: str) -> List[Any]:
+        return [value for name, value in self._items if name == key]
+
+    def multi_items(self) -> List[Tuple[str, Any]]:
+        return list(self._items)
+
+
+class UploadFile:
+    """A file part of a multipart/form-data body.
+
+    `file` is positioned at the start of the content, which is held in
+    memory up to the spool size and in a temporary file past it.
+    """
+
+    __slots__ = ["filename", "content_type", "headers", "file", "size"]
+
+    def __init__(
+        self,
+        filename: str,
+        content_type: str,
+        headers: Dict[str, str],
+        file: IO[bytes],
+        size: int = 0,
+    ) -> None:
+        self.filename = filename
+        self.content_type = content_type
+        self.headers = headers
+        self.file = file
+        self.size = size
+
+    def __repr__(self) -> str:
+        return (
+            f"UploadFile(filename={self.filename!r}, "
+            f"content_type={self.content_type!r}, size={self.size})"
+        )
+
+    def read(self, size: int = -1) -> bytes:
+        return self.file.read(size)
+
+    def seek(self, offset: int) -> int:
+        return self.file.seek(offset)
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def decode_component(data: bytes) -> str:
+    return unquote_to_bytes(data.replace(b"+", b" ")).decode("utf-8", "replace")
+
+
+def parse_urlencoded(
+    stream: BinaryIO, chunk_size: int = CHUNK_SIZE, max_field_size: int = MAX_FIELD_SIZE
+) -> List[Tuple[str, str]]:
+    """Parse an application/x-www-form-urlencoded body read in chunks."""
+    fields = []
+    # the field cut off at the end of the previous chunk
+    pending = bytearray()
+
+    while True:
+        chunk = stream.read(chunk_size)
+        if chunk:
+            pending += chunk
+            end = pending.rfind(b"&")
+            if end < 0:
+                if len(pending) > max_field_size:
+                    raise APIException("Form field too large", code=413)
+                continue
+            data = bytes(pending[:end])
+            del pending[: end + 1]
+        else:
+            data = bytes(pending)
+
+        for pair in data.split(b"&"):
+            if pair:
+                name, _, value = pair.partition(b"=")
+                fields.append((decode_component(name), decode_component(value)))
+
+        if not chunk:
+            return fields
+
+
+class MultipartParser:
+    """An incremental multipart/form-data parser.
+
+    Data is fed in chunks of any size. Each byte is scanned for the
+    delimiter once, keeping back only what could be the start of a
+    delimiter split across chunks, so parsing is linear in the body size.
+    Part content is written out as it arrives.
+    """
+
+    def __init__(
+        self,
+        boundary: bytes,
+        spool_size: int = SPOOL_SIZE,
+        max_field_size: int = MAX_FIELD_SIZE,
+        spool_dir: Optional[str] = None,
+    ) -> None:
+        self.delimiter = b"\r\n--" + boundary
+        self.spool_size = spool_size
+        self.max_field_size = max_field_size
+        self.spool_dir = spool_dir
+
+        # the first delimiter need not follow a line break
+        self.buffer = bytearray(b"\r\n")
+        self.state = _PREAMBLE
+        self.fields: List[Tuple[str, str]] = []
+        self.files: List[Tuple[str, UploadFile]] = []
+        self.parts = 0
+
+        self._name = ""
+        self._target: Union[bytearray, UploadFile, None] = None
+        self._headers_searched = 0
+
+    def feed(self, data: bytes) -> None:
+        buffer = self.buffer
+        buffer += data
+        delimiter = self.delimiter
+
+        while True:
+            state = self.state
+
+            if state == _PREAMBLE or state == _DATA:
+                index = buffer.find(delimiter)
+                if index < 0:
+                    end = len(buffer) - len(delimiter) + 1
+                    if end > 0:
+                        if state == _DATA:
+                            self._write(end)
+                        del buffer[:end]
+                    return
+                if state == _DATA:
+                    self._write(index)
+                    self._end_part()
+                del buffer[: index + len(delimiter)]
+                self.state = _DELIMITER
+
+            elif state == _DELIMITER:
+                if len(buffer) < 2:
+                    return
+                if buffer[:2] == b"--":
+                    self.state = _END
+                    continue
+                index = buffer.find(b"\r\n")
+                if index < 0:
+                    if len(buffer) > MAX_HEADER_SIZE:
+                        raise BadRequest("Malformed multipart body")
+                    return
+                # only transport padding may follow a delimiter
+                if buffer[:index].strip(b" \t"):
+                    raise BadRequest("Malformed multipart body")
+                # the line break stays so a part without headers is found
+                del buffer[:index]
+                self._headers_searched = 0
+                self.state = _HEADERS
+
+            elif state == _HEADERS:
+                index = buffer.find(b"\r\n\r\n", self._headers_searched)
+                if index < 0:
+                    if len(buffer) > MAX_HEADER_SIZE:
+                        raise BadRequest("Multipart headers too large")
+                    self._headers_searched = max(0, len(buffer) - 3)
+                    return
+                self._start_part(bytes(buffer[2:index]))
+                del buffer[: index + 4]
+                self.state = _DATA
+
+            else:
+                # the epilogue is ignored
+                del buffer[:]
+                return
+
+    def close(self) -> Tuple[FormData, FormData]:
+        """Check the body is complete and return its fields and files."""
+        if self.state != _END:
+            raise BadRequest("Malformed multipart body")
+        return FormData(self.fields), FormData(self.files)
+
+    def _start_part(self, block: bytes) -> None:
+        self.parts += 1
+        if self.parts > MAX_PARTS:
+            raise BadRequest("Too many multipart parts")
+
+        try:
+            text = block.decode("utf-8")
+        except UnicodeDecodeError:
+            text = block.decode("latin-1")
+
+        headers = {}
+        for line in text.split("\r\n") if text else ():
+            name, separator, value = line.partition(":")
+            if not separator:
+                raise BadRequest("Malformed multipart headers")
+            headers[name.strip().lower()] = value.strip()
+
+        disposition, params = parse_options_header(
+            headers.get("content-disposition", "")
+        )
+        if disposition != "form-data" or "name" not in params:
+            raise BadRequest("Multipart part without a form-data name")
+
+        self._name = params["name"]
+        if "filename" in params:
+            file = SpooledTemporaryFile(max_size=self.spool_size, dir=self.spool_dir)
+            self._target = UploadFile(
+                params["filename"],
+                headers.get("content-type", "application/octet-stream"),
+                headers,
+                file,  # type: ignore
+            )
+        else:
+            self._target = bytearray()
+
+    def _write(self, end: int) -> None:
+        target = self._target
+        with memoryview(self.buffer)[:end] as data:
+            if isinstance(target, UploadFile):
+                target.file.write(data)
+                target.size += end
+            elif target is not None:
+                target += data
+                if len(target) > self.max_field_size:
+                    raise APIException("Form field too large", code=413)
+
+    def _end_part(self) -> None:
+        target = self._target
+        if isinstance(target, UploadFile):
+            target.file.seek(0)
+            self.files.append((self._name, target))
+        elif target is not None:
+            self.fields.append((self._name, target.decode("utf-8", "replace")))
+        self._target = None
+
+
+def parse_form(
+    stream: BinaryIO,
+    content_type: str,
+    spool_size: int = SPOOL_SIZE,
+    max_field_size: int = MAX_FIELD_SIZE,
+    spool_dir: Optional[str] = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> Tuple[FormData, FormData]:
+    """Parse a urlencoded or multipart/form-data body into fields and files.
+
+    Bodies of other content types have no fields or files. Raises a
+    BadRequest for malformed bodies.
+    """
+    media_type, params = parse_options_header(content_type)
+
+    if media_type == "application/x-www-form-urlencoded":
+        return (
+            FormData(parse_urlencoded(stream, chunk_size, max_field_size)),
+            FormData(),
+        )
+
+    if media_type == "multipart/form-data":
+        boundary = params.get("boundary", "")
+        if not 0 < len(boundary) <= 70:
+            raise BadRequest("Invalid multipart boundary")
+
+        parser = MultipartParser(
+            boundary.encode("latin-1"), spool_size, max_field_size, spool_dir
+        )
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                return parser.close()
+            parser.feed(chunk)
+
+    return FormData(), FormData()
@@ -0,0 +1,112 @@
+import json
+from typing import Any, Dict, Type, Union
+
+from .serializable import to_serializable
+
+
+class JSONCodec:
+    """Encodes response data and decodes request bodies using the stdlib.
+
+    Codecs fall back to `to_serializable` for types the library does not
+    handle natively, so datetimes and decimals render the same everywhere.
+    """
+
+    name = "json"
+
+    def __init__(self) -> None:
+        self._encode = json.JSONEncoder(default=to_serializable).encode
+
+    def dumps(self, data: Any) -> str:
+        return self._encode(data)
+
+    def dumpb(self, data: Any) -> bytes:
+        return self.dumps(data).encode("utf-8")
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec(JSONCodec):
+    name = "orjson"
+
+    def __init__(self) -> None:
+        import orjson
+
+        # datetimes go through to_serializable to keep the isoformat rules
+        self._option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        self._dumps = orjson.dumps
+        self._loads = orjson.loads
+
+    def dumps(self, data: Any) -> str:
+        return self.dumpb(data).decode("utf-8")
+
+    def dumpb(self, data: Any) -> bytes:
+        return self._dumps(data, default=to_serializable, option=self._option)
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return self._loads(data)
+
+
+class UjsonCodec(JSONCodec):
+    name = "ujson"
+
+    def __init__(self) -> None:
+        import ujson  # type: ignore
+
+        self._dumps = ujson.dumps
+        self._loads = ujson.loads
+
+    def dumps(self, data: Any) -> str:
+        return self._dumps(data, default=to_serializable)
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return self._loads(data)
+
+
+class RapidjsonCodec(JSONCodec):
+    name = "rapidjson"
+
+    def __init__(self) -> None:
+        import rapidjson  # type: ignore
+
+        self._dumps = rapidjson.dumps
+        self._loads = rapidjson.loads
+
+    def dumps(self, data: Any) -> str:
+        return self._dumps(data, default=to_serializable)
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return self._loads(data)
+
+
+CODECS: Dict[str, Type[JSONCodec]] = {
+    "json": JSONCodec,
+    "orjson": OrjsonCodec,
+    "ujson": UjsonCodec,
+    "rapidjson": RapidjsonCodec,
+}
+
+# fastest first, the stdlib codec is always available
+AUTO_ORDER = ["orjson", "ujson", "rapidjson", "json"]
+
+DEFAULT_CODEC = JSONCodec()
+
+
+def get_codec(codec: Union[str, JSONCodec] = "json") -> JSONCodec:
+    if isinstance(codec, JSONCodec):
+        return codec
+
+    if codec == "auto":
+        for name in AUTO_ORDER:
+            try:
+                return CODECS[name]()
+            except ImportError:
+                continue
+
+    if codec == "json":
+        return DEFAULT_CODEC
+
+    codec_class = CODECS.get(codec)
+    if codec_class is None:
+        raise ValueError(f"Unknown JSON codec {codec}")
+    return codec_class()
@@ -0,0 +1,105 @@
+from contextvars import ContextVar
+import json
+import logging
+from time import perf_counter_ns
+from typing import TYPE_CHECKING, Any, Callable, Mapping, Optional, Tuple, Union
+
+from .json_codecs import JSONCodec, get_codec
+from .serializable import to_serializable
+
+if TYPE_CHECKING:
+    from .request import Request
+
+# the request being handled in this context and when it started, set by the
+# application so log records can be tied to a request
+current_request: ContextVar[Optional[Tuple["Request", int]]] = ContextVar(
+    "pitcher_current_request", default=None
+)
+
+STDLIB_LOGGERS = (logging.Logger, logging.LoggerAdapter)
+
+
+def is_enabled_for(logger: Any, level: int) -> bool:
+    """Whether a logger would emit records at `level`.
+
+    Loggers without an isEnabledFor method, such as loguru's, filter records
+    themselves and are treated as enabled.
+    """
+    check = getattr(logger, "isEnabledFor", None)
+    return check(level) if check is not None else True
+
+
+def log(
+    logger: Any, level: int, message: str, context: Optional[Mapping] = None
+) -> None:
+    """Log a formatted message with structured context.
+
+    Stdlib loggers receive the context as the `context` attribute of the
+    record. Other loggers, such as loguru's, receive it as a keyword argument
+    so it's bound to the record's extra.
+    """
+    if isinstance(logger, STDLIB_LOGGERS):
+        logger.log(level, message, extra={"context": context} if context else None)
+        return
+
+    method = getattr(logger, logging.getLevelName(level).lower())
+    if context:
+        # keyword arguments are used to format the message, escape braces
+        message = message.replace("{", "{{").replace("}", "}}")
+        method(message, context=context)
+    else:
+        method(message)
+
+
+class JSONFormatter(logging.Formatter):
+    """Formats log records as compact JSON lines.
+
+    Records logged while a request is handled include its request id, route
+    and the milliseconds since the application received it. The `context`
+    pitcher passes with its own records is included as is, and static
+    `fields` such as the service name are added to every line.
+    """
+
+    def __init__(
+        self,
+        json_codec: Optional[Union[str, JSONCodec]] = None,
+        fields: Optional[Mapping[str, Any]] = None,
+    ) -> None:
+        super().__init__()
+        self._dumps: Callable[[Any], str]
+        if json_codec is None:
+            self._dumps = json.JSONEncoder(
+                separators=(",", ":"), default=to_serializable
+            ).encode
+        else:
+            self._dumps = get_codec(json_codec).dumps
+
+        # encoded once and spliced into each line in place of the closing brace
+        self._suffix = "," + self._dumps(dict(fields))[1:] if fields else "}"
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "timestamp": int(record.created * 1000),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+
+        current = current_request.get()
+        if current is not None:
+            request, started = current
+            data["request_id"] = request.id
+            data["route"] = request.resource_path
+            data["duration_ms"] = round((perf_counter_ns() - started) / 1e6, 3)
+
+        context = getattr(record, "context", None)
+        if context is not None:
+            data["context"] = context
+
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data["exception"] = record.exc_text
+
+        return self._dumps(data)[:-1] + self._suffix
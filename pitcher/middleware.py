@@ -1,15 +1,66 @@
-from dataclasses import dataclass
+from functools import lru_cache
 import logging
-from typing import Any, Callable, Iterator, List, Optional, Sequence, Union
-
+import re
+from time import monotonic
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Pattern,
+    Sequence,
+    Tuple,
+    Union,
+)
+import zlib
+
+from .cache import (
+    get_header,
+    is_not_modified,
+    make_etag,
+    not_modified,
+    parse_http_date,
+)
 from .request import Request
 from .response import PlainTextResponse, Response
 from .exceptions import BadRequest
 
+if TYPE_CHECKING:
+    import os
+
 logger = logging.getLogger()
 
 ALL_METHODS = ["DELETE", "GET", "OPTIONS", "PATCH", "POST", "PUT"]
 
+# request headers browsers may send cross origin without them being allowed
+SAFELISTED_HEADERS = frozenset(
+    ["accept", "accept-language", "content-language", "content-type"]
+)
+
+# server preference when the client accepts several encodings equally
+ENCODING_PREFERENCE = ["br", "zstd", "gzip", "deflate"]
+
+# (largest body size, level) tiers, larger bodies use cheaper levels so
+# compression time stays bounded
+COMPRESSION_LEVELS: Dict[str, Sequence[Tuple[Optional[int], int]]] = {
+    "br": ((64 * 1024, 5), (1024 * 1024, 4), (None, 1)),
+    "zstd": ((64 * 1024, 6), (1024 * 1024, 3), (None, 1)),
+    "gzip": ((64 * 1024, 6), (1024 * 1024, 4), (None, 1)),
+    "deflate": ((64 * 1024, 6), (1024 * 1024, 4), (None, 1)),
+}
+
+COMPRESSIBLE_TYPES = [
+    "application/javascript",
+    "application/json",
+    "application/xml",
+    "image/svg+xml",
+    "text/",
+]
+
 
 class Middleware:
     def __init__(self, cls: type, **options: Any) -> None:
@@ -27,22 +78,93 @@ class BaseMiddleware:
     def __call__(self, request: Request, app: Any) -> Response:
         return self.next_func(request, app)
 
+    def static_headers(self) -> Optional[Dict[str, str]]:
+        """Headers added to every response, for middleware that does nothing else.
+
+        The application fuses such middleware into a single header merge
+        when rendering instead of calling it for each request. Existing
+        response headers are not overwritten.
+        """
+        return None
+
+
+def _defined_by(cls: type, name: str) -> type:
+    return next(klass for klass in cls.__mro__ if name in vars(klass))
+
+
+def fused_headers(layer: Any) -> Optional[Dict[str, str]]:
+    """The static headers of a header-only middleware layer, otherwise None."""
+    static_headers = getattr(layer, "static_headers", None)
+    if static_headers is None:
+        return None
+
+    # a subclass overriding __call__ may do more than add the headers
+    cls = type(layer)
+    if not issubclass(_defined_by(cls, "static_headers"), _defined_by(cls, "__call__")):
+        return None
+
+    return static_headers()
+
+
+def is_passthrough(layer: Any) -> bool:
+    return type(layer).__call__ is BaseMiddleware.__call__
+
+
+def compile_origin_pattern(pattern: str) -> Pattern:
+    """Compile a wildcard origin such as "*.example.com" to a regex.
+
+    The wildcard matches one or more subdomain labels. Without a scheme the
+    pattern matches origins with any scheme.
+    """
+    scheme, separator, host = pattern.rpartition("://")
+    regex = re.escape(host).replace(r"\*", r"[^/:]+")
+    if separator:
+        regex = re.escape(scheme) + "://" + regex
+    else:
+        regex = r"(?:[a-zA-Z][a-zA-Z0-9+.-]*://)?" + regex
+    return re.compile(regex)
+
 
 class CORSMiddleware(BaseMiddleware):
+    """Answer CORS preflight requests and add CORS headers to responses.
+
+    Allowed origins are exact strings, wildcard subdomain patterns such as
+    "https://*.example.com", compiled regexes or "*". The headers for each
+    origin, requested method and requested headers are built once and kept
+    in an LRU cache.
+    """
+
     def __init__(
         self,
         next_func: Callable[[Request, Any], Response],
-        allow_origins: Sequence[str] = [],
+        allow_origins: Sequence[Union[str, Pattern]] = [],
         allow_methods: Sequence[str] = ["GET"],
         allow_headers: Sequence[str] = [],
         allow_credentials: bool = False,
         max_age: int = 600,
+        allow_origin_regex: Optional[str] = None,
+        cache_size: int = 256,
     ) -> None:
         super().__init__(next_func)
 
         if "*" in allow_methods:
             allow_methods = ALL_METHODS
 
+        origins = set()
+        origin_patterns = []
+        for origin in allow_origins:
+            if isinstance(origin, str):
+                if origin == "*":
+                    continue
+                if "*" in origin:
+                    origin_patterns.append(compile_origin_pattern(origin))
+                else:
+                    origins.add(origin)
+            else:
+                origin_patterns.append(origin)
+        if allow_origin_regex is not None:
+            origin_patterns.append(re.compile(allow_origin_regex))
+
         simple_headers = {"Access-Control-Allow-Methods": ", ".join(allow_methods)}
         if "*" in allow_origins:
             simple_headers["Access-Control-Allow-Origin"] = "*"
@@ -73,88 +195,388 @@ class CORSMiddleware(BaseMiddleware):
         self.simple_headers = simple_headers
         self.preflight_headers = preflight_headers
 
-    def __call__(self, request: Request, app: Any) -> Response:
-        response: Response
+        self.allow_all_origins = "*" in allow_origins
+        self.allow_all_headers = "*" in allow_headers
+        self.origins = frozenset(origins)
+        self.origin_patterns = tuple(origin_patterns)
+        self.methods = frozenset(method.upper() for method in allow_methods)
+        self.header_names = frozenset(header.lower() for header in allow_headers)
+        self.simple = lru_cache(maxsize=cache_size)(self._simple)
+        self.preflight = lru_cache(maxsize=cache_size)(self._preflight)
+
+    def is_allowed_origin(self, origin: str) -> bool:
+        if origin in self.origins:
+            return True
+        for pattern in self.origin_patterns:
+            if pattern.fullmatch(origin):
+                return True
+        return False
+
+    def _simple(self, origin: str) -> Tuple[Dict[str, str], bool]:
+        # (headers, vary on origin) for a non-preflight response
+        if self.is_allowed_origin(origin):
+            headers = {**self.simple_headers, "Access-Control-Allow-Origin": origin}
+            return headers, True
+        return self.simple_headers, False
+
+    def _preflight(
+        self, origin: str, requested_method: str, requested_headers: Optional[str]
+    ) -> Tuple[int, str, Dict[str, str]]:
+        errors = []
+        headers = dict(self.preflight_headers)
+
+        if requested_method.upper() not in self.methods:
+            errors.append("method")
+
+        if self.allow_all_origins or self.is_allowed_origin(origin):
+            headers["Access-Control-Allow-Origin"] = origin
+        else:
+            headers["Access-Control-Allow-Origin"] = ", ".join(
+                allowed for allowed in self.allow_origins if isinstance(allowed, str)
+            )
+            errors.append("origin")
+
+        if requested_headers:
+            names = {
+                name.strip().lower()
+                for name in requested_headers.split(",")
+                if name.strip()
+            }
+            if self.allow_all_headers:
+                if names:
+                    headers["Access-Control-Allow-Headers"] = requested_headers
+            elif not names <= self.header_names | SAFELISTED_HEADERS:
+                errors.append("headers")
+
+        if errors:
+            return 400, "CORS ERROR: " + ", ".join(errors), headers
+        return 200, "OK", headers
 
+    def __call__(self, request: Request, app: Any) -> Response:
         origin = request.headers.get("origin")
         if request.method == "OPTIONS" and origin is not None:
-            errors = []
-            headers = dict(self.preflight_headers)
-
-            requested_method = request.headers.get(
-                "Access-Control-Request-Method", "GET"
+            status_code, body, headers = self.preflight(
+                origin,
+                request.headers.get("access-control-request-method", "GET"),
+                request.headers.get("access-control-request-headers"),
             )
-            if str(requested_method).upper() not in self.allow_methods:
-                errors.append("method")
-
-            if origin not in self.allow_origins and "*" not in self.allow_origins:
-                headers["Access-Control-Allow-Origin"] = ", ".join(self.allow_origins)
-                errors.append("origin")
-            else:
-                headers["Access-Control-Allow-Origin"] = origin
-
-            if errors:
-                response = PlainTextResponse(
-                    400, "CORS ERROR: " + ", ".join(errors), headers=headers
-                )
-            else:
-                response = PlainTextResponse(200, "OK", headers=headers)
-
-            return response
+            return PlainTextResponse(status_code, body, headers=dict(headers))
 
         response = super().__call__(request, app)
 
         if origin is not None:
-            response._headers.update(self.simple_headers)
-            if origin in self.allow_origins:
-                response._headers["Access-Control-Allow-Origin"] = origin
+            headers, vary = self.simple(origin)
+            response._headers.update(headers)
+            if vary:
                 response.vary("Origin")
 
         return response
 
 
+# marks a "*." wildcard in the host suffix trie
+WILDCARD = "*"
+
+
+class HostIndex:
+    """Exact host names plus a trie of reversed labels for "*." wildcards.
+
+    Lookups cost one set hit and a walk of the request host's labels, no
+    matter how many hosts are allowed. A wildcard also matches the bare
+    domain, "*.example.com" allows "example.com".
+    """
+
+    __slots__ = ["allow_all", "exact", "suffixes", "size"]
+
+    def __init__(self, hosts: Iterable[str]) -> None:
+        self.allow_all = False
+        self.size = 0
+        exact = set()
+        self.suffixes: Dict[str, Any] = {}
+
+        for host in hosts:
+            host = host.strip().lower()
+            if not host:
+                continue
+            self.size += 1
+            if host == WILDCARD:
+                self.allow_all = True
+            elif host.startswith("*."):
+                node = self.suffixes
+                for label in reversed(host[2:].split(".")):
+                    node = node.setdefault(label, {})
+                node[WILDCARD] = True
+            else:
+                exact.add(host)
+
+        self.exact = frozenset(exact)
+
+    def __contains__(self, host: object) -> bool:
+        if self.allow_all:
+            return True
+        if not isinstance(host, str):
+            return False
+
+        host = host.lower()
+        if host in self.exact:
+            return True
+
+        node = self.suffixes
+        for label in reversed(host.split(".")):
+            node = node.get(label)  # type: ignore
+            if node is None:
+                return False
+            if WILDCARD in node:
+                return True
+        return False
+
+
+def read_hosts_file(path: Union[str, "os.PathLike"]) -> List[str]:
+    """One host per line, blank lines and # comments are ignored."""
+    with open(path) as fh:
+        lines = (line.partition("#")[0].strip() for line in fh)
+        return [line for line in lines if line]
+
+
 class AllowedHostMiddleware(BaseMiddleware):
+    """Reject requests whose Host header is not allowed with a 400.
+
+    Hosts come from a list, a callable returning hosts or a file with one
+    host per line. Callables and files are read again by reload(), or
+    every `reload_interval` seconds when set, without rebuilding the app.
+    """
+
     def __init__(
-        self, next_func: Callable[[Request, Any], Response], allowed_hosts: List[str],
+        self,
+        next_func: Callable[[Request, Any], Response],
+        allowed_hosts: Union[Iterable[str], Callable[[], Iterable[str]]] = (),
+        hosts_file: Optional[Union[str, "os.PathLike"]] = None,
+        reload_interval: Optional[float] = None,
     ) -> None:
         super().__init__(next_func)
 
-        if "*" in allowed_hosts:
+        self.allowed_hosts = allowed_hosts
+        self.hosts_file = hosts_file
+        self.reload_interval = reload_interval
+        self.index = HostIndex(())
+        self.reload()
+
+    def load_hosts(self) -> List[str]:
+        hosts = self.allowed_hosts
+        if callable(hosts):
+            hosts = hosts()
+        hosts = list(hosts)
+        if self.hosts_file is not None:
+            hosts.extend(read_hosts_file(self.hosts_file))
+        return hosts
+
+    def reload(self) -> None:
+        index = HostIndex(self.load_hosts())
+
+        if index.allow_all:
             logger.warning(
                 "AllowedHostMiddleware with allowed hosts containing '*'. Disable middleware if any host is allowed"
             )
 
-        self.allowed_hosts = allowed_hosts
+        # swap the whole index so concurrent requests see the old or new hosts
+        self.index = index
+        self.next_reload = (
+            monotonic() + self.reload_interval
+            if self.reload_interval is not None
+            else None
+        )
 
     def __call__(self, request: Request, app: Any) -> Response:
+        if self.next_reload is not None and monotonic() >= self.next_reload:
+            try:
+                self.reload()
+            except Exception:
+                logger.exception("AllowedHostMiddleware failed to reload hosts")
+                self.next_reload = monotonic() + (self.reload_interval or 0)
+
         request_host = request.headers.get("host", "").split(":")[0]
 
-        valid_host = False
-        for allowed_host in self.allowed_hosts:
-            if allowed_host == "*":
-                valid_host = True
-                break
-            elif (
-                request_host == allowed_host
-                or allowed_host.startswith("*.")
-                and request_host.endswith(allowed_host[2:])
-            ):
-                valid_host = True
-                break
-
-        if not valid_host:
+        if request_host not in self.index:
             raise BadRequest()
 
         response = super().__call__(request, app)
         return response
 
 
+def gzip_compress(data: bytes, level: int) -> bytes:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+
+def deflate_compress(data: bytes, level: int) -> bytes:
+    return zlib.compress(data, level)
+
+
+def available_compressors() -> Dict[str, Callable[[bytes, int], bytes]]:
+    compressors: Dict[str, Callable[[bytes, int], bytes]] = {
+        "gzip": gzip_compress,
+        "deflate": deflate_compress,
+    }
+
+    try:
+        import brotli  # type: ignore
+
+        compressors["br"] = lambda data, level: brotli.compress(data, quality=level)
+    except ImportError:
+        pass
+
+    try:
+        import zstandard  # type: ignore
+
+        compressors["zstd"] = lambda data, level: zstandard.ZstdCompressor(
+            level=level
+        ).compress(data)
+    except ImportError:
+        pass
+
+    return compressors
+
+
+class CompressionMiddleware(BaseMiddleware):
+    """Compress response bodies using the client's preferred Accept-Encoding.
+
+    Compressed bodies are sent base64 encoded, REST APIs need binary media
+    types configured for API Gateway to decode them.
+    """
+
+    def __init__(
+        self,
+        next_func: Callable[[Request, Any], Response],
+        minimum_size: int = 1024,
+        encodings: Sequence[str] = ENCODING_PREFERENCE,
+        levels: Optional[Dict[str, Sequence[Tuple[Optional[int], int]]]] = None,
+        compressible_types: Sequence[str] = COMPRESSIBLE_TYPES,
+    ) -> None:
+        super().__init__(next_func)
+
+        compressors = available_compressors()
+
+        self.minimum_size = minimum_size
+        self.encodings = [name for name in encodings if name in compressors]
+        self.compressors = compressors
+        self.levels = dict(COMPRESSION_LEVELS, **(levels or {}))
+        self.compressible_types = tuple(compressible_types)
+        self.negotiate = lru_cache(maxsize=64)(self._negotiate)
+
+    def _negotiate(self, accept_encoding: str) -> Optional[str]:
+        accepted: Dict[str, float] = {}
+        for item in accept_encoding.lower().split(","):
+            name, _, params = item.partition(";")
+            quality = 1.0
+            params = params.strip()
+            if params.startswith("q="):
+                try:
+                    quality = float(params[2:])
+                except ValueError:
+                    quality = 0.0
+            accepted[name.strip()] = quality
+
+        wildcard = accepted.get("*", 0.0)
+        best = None
+        best_quality = 0.0
+        for name in self.encodings:
+            quality = accepted.get(name, wildcard)
+            if quality > best_quality:
+                best, best_quality = name, quality
+
+        return best
+
+    def level(self, encoding: str, size: int) -> int:
+        for limit, level in self.levels[encoding]:
+            if limit is None or size <= limit:
+                return level
+        return self.levels[encoding][-1][1]
+
+    def __call__(self, request: Request, app: Any) -> Response:
+        response = super().__call__(request, app)
+        if response.streaming:
+            return response
+
+        content_type = response.content_type.lower()
+        if not content_type.startswith(self.compressible_types) or any(
+            name.lower() == "content-encoding" for name in response._headers
+        ):
+            return response
+
+        body = response.render_body(app.json_codec)
+        if body is None:
+            return response
+
+        # responses left uncompressed keep the rendered body to avoid
+        # serializing twice
+        data = body.encode("utf-8") if isinstance(body, str) else bytes(body)
+        if len(data) < self.minimum_size:
+            return response.replace(body)
+
+        response.vary("Accept-Encoding")
+
+        encoding = self.negotiate(request.headers.get("accept-encoding", ""))
+        if encoding is None:
+            return response.replace(body)
+
+        compressed = self.compressors[encoding](data, self.level(encoding, len(data)))
+        if len(compressed) >= len(data):
+            return response.replace(body)
+
+        response = response.replace(compressed)
+        response.set_header("Content-Encoding", encoding)
+        # a strong ETag must differ between encodings, a weak one still
+        # matches If-None-Match since that uses weak comparison
+        for name, value in response._headers.items():
+            if name.lower() == "etag" and not value.startswith("W/"):
+                response._headers[name] = "W/" + value
+        return response
+
+
+class ConditionalGetMiddleware(BaseMiddleware):
+    """Add an ETag to successful GET responses and answer matches with a 304.
+
+    An ETag or Last-Modified set by the view is used as is, otherwise a
+    strong ETag is hashed from the rendered body.
+    """
+
+    def __call__(self, request: Request, app: Any) -> Response:
+        response = super().__call__(request, app)
+
+        if (
+            request.method not in ("GET", "HEAD")
+            or response.status_code != 200
+            or response.streaming
+        ):
+            return response
+
+        etag = get_header(response._headers, "ETag")
+        if etag is None:
+            body = response.render_body(app.json_codec)
+            if body is None:
+                return response
+
+            etag = make_etag(body)
+            response = response.replace(body)
+            response.set_header("ETag", etag)
+
+        last_modified = None
+        last_modified_header = get_header(response._headers, "Last-Modified")
+        if last_modified_header is not None:
+            last_modified = parse_http_date(last_modified_header)
+
+        if is_not_modified(request, etag, last_modified):
+            return not_modified(response)
+
+        return response
+
+
 class SecureHeadersMiddleware(BaseMiddleware):
-    @dataclass
     class Header:
         __slots__ = ["header", "value"]
-        header: str
-        value: str
+
+        def __init__(self, header: str, value: str) -> None:
+            self.header = header
+            self.value = value
 
     def __init__(
         self,
@@ -217,3 +639,6 @@ class SecureHeadersMiddleware(BaseMiddleware):
             response.set_header(name=item.header, value=item.value, overwrite=False)
 
         return response
+
+    def static_headers(self) -> Optional[Dict[str, str]]:
+        return {item.header: item.value for item in self.security_headers}
@@ -1,11 +1,27 @@
-import base64
-import json
-from typing import Any, Dict, Mapping, Optional
-from types import MappingProxyType
+import io
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    BinaryIO,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+)
+from types import MappingProxyType, SimpleNamespace
+
+from .json_codecs import DEFAULT_CODEC, JSONCodec
+
+if TYPE_CHECKING:
+    from .forms import FormData
+    from .timing import Timer
 
 
 class CaseInsensitiveDict(dict):
-    proxy: Dict[str, Any] = {}
+    proxy: Dict[str, Any]
 
     def __init__(self, data):
         self.proxy = dict((k.lower(), k) for k in data)
@@ -27,56 +43,287 @@ class CaseInsensitiveDict(dict):
         self.proxy[k.lower()] = k
 
 
+class Headers(Mapping[str, Any]):
+    """Read-only, case-insensitive view of request headers.
+
+    Keys are lowercased once at construction so lookups are a single dict
+    hit. Repeated headers are available from getlist, either from the v1.0
+    multiValueHeaders or by splitting the comma-joined v2.0 value.
+    """
+
+    __slots__ = ["_data", "_multi", "_lists"]
+
+    def __init__(
+        self,
+        headers: Optional[Mapping[str, Any]] = None,
+        multi_headers: Optional[Mapping[str, List[Any]]] = None,
+    ) -> None:
+        if headers:
+            self._data = {k.lower(): v for k, v in headers.items()}
+        elif multi_headers:
+            self._data = {k.lower(): v[-1] for k, v in multi_headers.items() if v}
+        else:
+            self._data = {}
+        self._multi = multi_headers
+        self._lists: Optional[Dict[str, List[Any]]] = None
+
+    def __getitem__(self, key: str) -> Any:
+        return self._data[key.lower()]
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and key.lower() in self._data
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __repr__(self) -> str:
+        return f"Headers({self._data!r})"
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._data.get(key.lower(), default)
+
+    def getlist(self, key: str) -> List[Any]:
+        key = key.lower()
+
+        if self._lists is None:
+            lists: Dict[str, List[Any]] = {}
+            if self._multi:
+                for name, values in self._multi.items():
+                    lists.setdefault(name.lower(), []).extend(values)
+            self._lists = lists
+
+        if key in self._lists:
+            return list(self._lists[key])
+
+        value = self._data.get(key)
+        if value is None:
+            return []
+        if isinstance(value, str):
+            return [part.strip() for part in value.split(",")]
+        return [value]
+
+
+class Base64Reader(io.RawIOBase):
+    """Decode a base64 body a chunk at a time as it is read.
+
+    Only the chunk being read is decoded, so reading a large body in pieces
+    never holds all of it in memory. Bodies of events have no line breaks,
+    so chunks are aligned on groups of 4 characters.
+    """
+
+    def __init__(self, data: Union[str, bytes]) -> None:
+        self._data = data
+        self._position = 0
+        self._pending = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        from binascii import a2b_base64
+
+        size = len(buffer)
+        while not self._pending:
+            start = self._position
+            if start >= len(self._data):
+                return 0
+            # every 4 characters decode to 3 bytes
+            self._position = start + max(4, size // 3 * 4)
+            self._pending = a2b_base64(self._data[start : self._position])
+
+        count = min(size, len(self._pending))
+        buffer[:count] = self._pending[:count]
+        self._pending = self._pending[count:]
+        return count
+
+
 class Request:
-    def __init__(self, event: Mapping[str, Any], context: Any) -> None:
+    # event fields are parsed on first access by the matching _load_<name>
+    # method and stored in their slot, later reads are plain slot reads
+    __slots__ = [
+        "event",
+        "context",
+        "json_codec",
+        "version",
+        "request_context",
+        "method",
+        "resource_path",
+        "id",
+        "headers",
+        "query",
+        "stage_variables",
+        "params",
+        "path",
+        "authorizer",
+        "cookies",
+        "binary",
+        "body",
+        "content_type",
+        "state",
+        "timer",
+        "_json_body",
+        "_form",
+    ]
+
+    id: Optional[str]
+    headers: Headers
+    query: Mapping[str, str]
+    stage_variables: Mapping[str, str]
+    params: Dict[str, Any]
+    path: Optional[str]
+    authorizer: Optional[Dict[str, Any]]
+    cookies: List[str]
+    binary: bool
+    body: Any
+    content_type: str
+    state: SimpleNamespace
+    # None unless the application is instrumented
+    timer: "Timer"
+    _json_body: Optional[dict]
+    _form: Tuple["FormData", "FormData"]
+
+    def __init__(
+        self,
+        event: Mapping[str, Any],
+        context: Any,
+        json_codec: JSONCodec = DEFAULT_CODEC,
+    ) -> None:
         self.event = event
         self.context = context
+        self.json_codec = json_codec
         self.version = event.get("version", "1.0")
         self.request_context = event.get("requestContext", {})
-        self.id = self.request_context.get("requestId")
-        self.headers = MappingProxyType(CaseInsensitiveDict(event.get("headers", {})))
-        queryStringParameters = event.get("queryStringParameters", {})
-        self.query = MappingProxyType(
-            queryStringParameters if queryStringParameters is not None else {}
-        )
-        stageVariables = event.get("stageVariables", {})
-        self.stage_variables = MappingProxyType(
-            stageVariables if stageVariables is not None else {}
-        )
-        self.params = event.get("pathParameters", {}).copy()
 
         if self.version == "2.0":
-            _, resource_path = event.get("routeKey", "").split(" ", 1)
-            self.resource_path = resource_path
-            self.path = self.request_context.get("http", {}).get("path")
             self.method = self.request_context.get("http", {}).get("method", "GET")
-            self.authorizer = event["requestContext"].get("authorizer", {}).get("jwt")
-            self.cookies = event.get("cookies", [])
+            # the $default route key carries no method or resource path
+            _, _, resource_path = event.get("routeKey", "").partition(" ")
+            self.resource_path = resource_path if resource_path else None
         else:
-            self.resource_path = self.request_context.get("resourcePath")
-            self.path = self.request_context.get("path")
             self.method = self.request_context.get("httpMethod", "GET")
-            self.authorizer = self.request_context.get("authorizer")
-            multi_headers = CaseInsensitiveDict(event.get("multiValueHeaders", {}))
-            self.cookies = multi_headers.get("cookie", [])
+            self.resource_path = self.request_context.get("resourcePath")
+
+    def __getattr__(self, name: str) -> Any:
+        loader = getattr(type(self), "_load_" + name.lstrip("_"), None)
+        if loader is None:
+            raise AttributeError(
+                f"'{type(self).__name__}' object has no attribute '{name}'"
+            )
+        value = loader(self)
+        setattr(self, name, value)
+        return value
+
+    def _load_id(self) -> Optional[str]:
+        return self.request_context.get("requestId")
+
+    def _load_headers(self) -> Headers:
+        if self.version == "2.0":
+            return Headers(self.event.get("headers"))
+        return Headers(self.event.get("headers"), self.event.get("multiValueHeaders"))
+
+    def _load_query(self) -> Mapping[str, str]:
+        return MappingProxyType(self.event.get("queryStringParameters") or {})
+
+    def _load_stage_variables(self) -> Mapping[str, str]:
+        return MappingProxyType(self.event.get("stageVariables") or {})
+
+    def _load_params(self) -> Dict[str, Any]:
+        return dict(self.event.get("pathParameters") or {})
+
+    def _load_path(self) -> Optional[str]:
+        if self.version == "2.0":
+            path = self.request_context.get("http", {}).get("path")
+            stage = self.request_context.get("stage")
+            # on a named stage the path starts with it, e.g. /prod/users/42
+            if path and stage and stage != "$default":
+                prefix = f"/{stage}"
+                if path == prefix or path.startswith(prefix + "/"):
+                    path = path[len(prefix) :] or "/"
+            return path
+        # requestContext.path is prefixed with the stage name
+        return self.event.get("path") or self.request_context.get("path")
+
+    def _load_authorizer(self) -> Optional[Dict[str, Any]]:
+        if self.version == "2.0":
+            return self.request_context.get("authorizer", {}).get("jwt")
+        return self.request_context.get("authorizer")
+
+    def _load_cookies(self) -> List[str]:
+        if self.version == "2.0":
+            return self.event.get("cookies", [])
+        return self.headers.getlist("cookie")
+
+    def _load_binary(self) -> bool:
+        return self.event.get("isBase64Encoded", False)
 
-        self.binary = event.get("isBase64Encoded", False)
+    def _load_body(self) -> Any:
         if self.binary:
-            body = base64.b64decode(event["body"])
-        else:
-            body = event.get("body", None)
+            # decodes the str directly, b64decode would copy it to bytes first
+            from binascii import a2b_base64
 
-        self.content_type = self.headers.get("content-type", "application/json")
-        self.body = body
+            return a2b_base64(self.event["body"])
+        return self.event.get("body", None)
 
-        self._json_body = None
+    def _load_content_type(self) -> str:
+        return self.headers.get("content-type", "application/json")
 
-    def json_body(self) -> Optional[dict]:
+    def _load_state(self) -> SimpleNamespace:
+        # per-request storage for middleware and views
+        return SimpleNamespace()
+
+    def _load_timer(self) -> Any:
+        return None
+
+    def _load_json_body(self) -> Optional[dict]:
         if (
             self.body
             and self.content_type
             and self.content_type.lower().startswith("application/json")
-            and self._json_body is None
         ):
-            self._json_body = json.loads(self.body)
+            return self.json_codec.loads(self.body)
+        return None
+
+    def _load_form(self) -> Tuple["FormData", "FormData"]:
+        from .forms import parse_form
+
+        return parse_form(self.stream(), self.content_type)
+
+    def json_body(self) -> Optional[dict]:
         return self._json_body
+
+    def form(self) -> "FormData":
+        """The fields of a urlencoded or multipart/form-data body."""
+        return self._form[0]
+
+    def files(self) -> "FormData":
+        """The UploadFiles of a multipart/form-data body by field name."""
+        return self._form[1]
+
+    def stream(self, chunk_size: int = 64 * 1024) -> BinaryIO:
+        """Return a binary file-like object reading the body.
+
+        A base64 encoded body that has not been read through `body` is
+        decoded as the stream is read rather than all at once.
+        """
+        if self.binary and not self._is_loaded("body"):
+            raw = Base64Reader(self.event.get("body") or "")
+            return io.BufferedReader(raw, chunk_size)  # type: ignore
+
+        body = self.body
+        if body is None:
+            body = b""
+        elif isinstance(body, str):
+            body = body.encode("utf-8")
+        # a BytesIO over bytes shares them until it is written to
+        return io.BytesIO(body)
+
+    def _is_loaded(self, name: str) -> bool:
+        # reads the slot without falling back to its loader
+        try:
+            getattr(Request, name).__get__(self)
+        except AttributeError:
+            return False
+        return True
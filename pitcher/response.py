@@ -1,17 +1,119 @@
-import json
-import base64
-from typing import Any, Dict, Optional, List
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    Optional,
+    List,
+    Tuple,
+    Union,
+)
 import logging
-from datetime import datetime
+import os
 import re
-import urllib.parse
-from .serializable import to_serializable
+import sys
 from .exceptions import APIException
+from .json_codecs import DEFAULT_CODEC, JSONCodec
+
+if TYPE_CHECKING:
+    from datetime import datetime
 
 logger = logging.getLogger()
 
+# statuses that must not carry a body
+NO_BODY_CODES = (204, 304)
+
+# separates the JSON prelude from the body in a Lambda response stream
+STREAM_DELIMITER = b"\x00" * 8
+
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+
+
+class ChunkedJSONEncoder:
+    """Encode items as a JSON array or as NDJSON in bounded chunks.
+
+    Items are serialized one at a time into a buffer that is emitted each
+    time it grows past `chunk_size`, so memory is bounded by the chunk size
+    plus the largest item rather than the whole body. Items are encoded by
+    the codec, so to_serializable applies as it does for a whole body.
+    """
+
+    __slots__ = ["json_codec", "ndjson", "chunk_size"]
+
+    def __init__(
+        self,
+        json_codec: JSONCodec = DEFAULT_CODEC,
+        ndjson: bool = False,
+        chunk_size: int = 64 * 1024,
+    ) -> None:
+        self.json_codec = json_codec
+        self.ndjson = ndjson
+        self.chunk_size = chunk_size
+
+    def iter_chunks(self, items: Iterable[Any]) -> Iterator[bytes]:
+        dumpb = self.json_codec.dumpb
+        chunk_size = self.chunk_size
+        buffer = bytearray()
+
+        if self.ndjson:
+            for item in items:
+                buffer += dumpb(item)
+                buffer += b"\n"
+                if len(buffer) >= chunk_size:
+                    yield bytes(buffer)
+                    del buffer[:]
+        else:
+            buffer += b"["
+            separator = b""
+            for item in items:
+                buffer += separator
+                buffer += dumpb(item)
+                separator = b","
+                if len(buffer) >= chunk_size:
+                    yield bytes(buffer)
+                    del buffer[:]
+            buffer += b"]"
+
+        if buffer:
+            yield bytes(buffer)
+
+    def encode(self, items: Iterable[Any]) -> bytearray:
+        """Encode all items into a single buffer."""
+        body = bytearray()
+        for chunk in self.iter_chunks(items):
+            body += chunk
+        return body
+
+
+def is_buffer(data: Any) -> bool:
+    """Whether data is a binary body, bytes or another buffer such as an mmap."""
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return True
+    # nothing can be an mmap before the module is imported
+    mmap = sys.modules.get("mmap")
+    return mmap is not None and isinstance(data, mmap.mmap)
+
+
+def iter_buffer(buffer: Any, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """Yield a buffer in slices, copying one chunk at a time."""
+    with memoryview(buffer) as view, view.cast("B") as data:
+        for start in range(0, len(data), chunk_size):
+            yield data[start : start + chunk_size].tobytes()
+
+
+def is_json_sequence(data: Any) -> bool:
+    # lists and generators can be encoded item by item
+    return isinstance(data, (list, tuple)) or (
+        hasattr(data, "__next__") and hasattr(data, "__iter__")
+    )
+
 
 class Response:
+    # streaming responses produce their body as it is written and can only
+    # be read once, middleware must not render them
+    streaming = False
+
     def __init__(
         self,
         status_code: int,
@@ -31,7 +133,8 @@ class Response:
             logger.warning(
                 "'Vary: *' is better represented by 'Cache-Control: no-store'"
             )
-        self._vary_headers.append(header)
+        if header not in self._vary_headers:
+            self._vary_headers.append(header)
 
     def set_cookie(
         self,
@@ -39,7 +142,7 @@ class Response:
         value: str,
         path: Optional[str] = "/",
         domain: Optional[str] = None,
-        expires: Optional[datetime] = None,
+        expires: Optional["datetime"] = None,
         max_age: Optional[int] = None,
         http_only: bool = True,
         secure: bool = True,
@@ -59,6 +162,8 @@ class Response:
             if domain is not None:
                 raise APIException("Invalid cookie {name}. Domain must not be set")
 
+        import urllib.parse
+
         value = urllib.parse.quote_plus(value)
 
         flags = []
@@ -89,7 +194,8 @@ class Response:
 
     def set_header(self, name: str, value: str, overwrite: bool = True) -> None:
         if name in self._headers and not overwrite:
-            logger.info("existing header {name} will not be overwritten", name=name)
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("existing header %s will not be overwritten", name)
             return
 
         self._headers[name] = value
@@ -106,32 +212,109 @@ class Response:
 
         return results
 
-    def render(self, version="1.0") -> Dict[str, Any]:
+    def replace(self, body: Union[str, bytes]) -> "Response":
+        """Copy this response with an already rendered body."""
+        response_class = RawJSONResponse if isinstance(body, str) else Response
+        response = response_class(
+            self.status_code,
+            body,
+            headers=dict(self._headers),
+            content_type=self.content_type,
+        )
+        response._cookies = self._cookies
+        response._vary_headers = list(self._vary_headers)
+        return response
+
+    def render_body(self, json_codec: JSONCodec = DEFAULT_CODEC) -> Any:
+        """Serialize the response data, binary data is returned as is."""
+        if not self.data:
+            return None
+
+        if is_buffer(self.data):
+            return self.data
+
+        content_type = self.content_type.lower()
+        if content_type.startswith("application/json"):
+            if is_json_sequence(self.data) and not isinstance(self.data, (list, tuple)):
+                # generators can't be encoded in one call
+                return ChunkedJSONEncoder(json_codec).encode(self.data).decode("utf-8")
+            return json_codec.dumps(self.data)
+        elif content_type.startswith(NDJSON_CONTENT_TYPE) and is_json_sequence(
+            self.data
+        ):
+            encoder = ChunkedJSONEncoder(json_codec, ndjson=True)
+            return encoder.encode(self.data).decode("utf-8")
+        return self.data
+
+    def iter_body(self, json_codec: JSONCodec = DEFAULT_CODEC) -> Iterator[bytes]:
+        """Yield the encoded body in chunks, used when streaming.
+
+        Lists and generators of JSON items are encoded item by item so the
+        whole body is never held in memory.
+        """
+        if self.data and is_json_sequence(self.data):
+            content_type = self.content_type.lower()
+            if content_type.startswith(("application/json", NDJSON_CONTENT_TYPE)):
+                ndjson = content_type.startswith(NDJSON_CONTENT_TYPE)
+                encoder = ChunkedJSONEncoder(json_codec, ndjson=ndjson)
+                yield from encoder.iter_chunks(self.data)
+                return
+
+        body = self.render_body(json_codec)
+        if isinstance(body, str):
+            yield body.encode("utf-8")
+        elif isinstance(body, bytes):
+            yield body
+        elif body is not None:
+            yield from iter_buffer(body)
+
+    def _prepare_headers(
+        self, default_headers: Optional[Dict[str, str]] = None
+    ) -> Dict[str, str]:
         headers = self._headers
+
+        if default_headers:
+            for name, value in default_headers.items():
+                if name not in headers:
+                    headers[name] = value
+
+        if self._vary_headers:
+            headers.update({"Vary": ", ".join(self._vary_headers)})
+
+        return headers
+
+    def render(
+        self,
+        version: str = "1.0",
+        json_codec: JSONCodec = DEFAULT_CODEC,
+        default_headers: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, Any]:
+        headers = self._prepare_headers(default_headers)
         response: Dict[str, Any] = {
             "statusCode": self.status_code,
             "isBase64Encoded": False,
         }
 
-        if self._vary_headers:
-            headers.update({"Vary": ", ".join(self._vary_headers)})
-
         cookies = self.cookies
         if cookies:
             if version == "1.0":
-                response["multiValueHeaders"]["Set-Cookie"] = cookies
+                response["multiValueHeaders"] = {"Set-Cookie": cookies}
             else:
                 response["cookies"] = cookies
 
-        if self.data:
-            if self.content_type.lower().startswith("application/json"):
-                response["body"] = json.dumps(self.data, default=to_serializable)
-            elif isinstance(self.data, bytes):
-                data = base64.b64encode(self.data)
-                response["body"] = data.decode("ascii")
+        body = None
+        if self.status_code not in NO_BODY_CODES:
+            body = self.render_body(json_codec)
+
+        if body is not None:
+            if is_buffer(body):
+                # encodes any buffer, including an mmap, in a single pass
+                from binascii import b2a_base64
+
+                response["body"] = b2a_base64(body, newline=False).decode("ascii")
                 response["isBase64Encoded"] = True
             else:
-                response["body"] = self.data
+                response["body"] = body
 
             if "content-type" not in headers:
                 headers.update({"content-type": self.content_type})
@@ -140,6 +323,82 @@ class Response:
 
         return response
 
+    def stream(
+        self,
+        writer: Any,
+        json_codec: JSONCodec = DEFAULT_CODEC,
+        default_headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """Write the response to a Lambda response stream.
+
+        A JSON prelude with the status, headers and cookies is written first,
+        followed by 8 null bytes and the body. `writer` only needs a write
+        method, a flush method is called once the prelude is written.
+        """
+        headers = self._prepare_headers(default_headers)
+        has_body = self.status_code not in NO_BODY_CODES
+        if has_body and "content-type" not in headers:
+            headers["content-type"] = self.content_type
+
+        prelude: Dict[str, Any] = {"statusCode": self.status_code, "headers": headers}
+        cookies = self.cookies
+        if cookies:
+            prelude["cookies"] = cookies
+
+        writer.write(json_codec.dumpb(prelude) + STREAM_DELIMITER)
+        flush = getattr(writer, "flush", None)
+        if flush is not None:
+            flush()
+
+        if has_body:
+            for chunk in self.iter_body(json_codec):
+                if chunk:
+                    writer.write(chunk)
+
+    def to_http(
+        self,
+        json_codec: JSONCodec = DEFAULT_CODEC,
+        default_headers: Optional[Dict[str, str]] = None,
+    ) -> Tuple[int, List[Tuple[str, str]], Iterable[bytes]]:
+        """The status, header list and body chunks for an HTTP server.
+
+        Binary bodies are passed through without base64 encoding, buffers
+        other than bytes in slices. Other bodies are rendered whole and sent
+        with a Content-Length, except for streaming responses whose chunks are
+        produced as they are sent.
+        """
+        headers = self._prepare_headers(default_headers)
+        has_body = self.status_code not in NO_BODY_CODES
+
+        body: Iterable[bytes] = ()
+        length = None
+        if has_body:
+            if self.streaming:
+                body = self.iter_body(json_codec)
+            else:
+                rendered = self.render_body(json_codec)
+                if rendered is None:
+                    length = 0
+                elif isinstance(rendered, (str, bytes, bytearray)):
+                    if isinstance(rendered, str):
+                        rendered = rendered.encode("utf-8")
+                    body = (rendered,)
+                    length = len(rendered)
+                else:
+                    # other buffers such as mmaps are sent in slices
+                    body = iter_buffer(rendered)
+                    length = memoryview(rendered).nbytes
+
+        header_list = list(headers.items())
+        if (body or self.streaming) and "content-type" not in headers:
+            header_list.append(("content-type", self.content_type))
+        if length is not None:
+            header_list.append(("content-length", str(length)))
+        for cookie in self.cookies:
+            header_list.append(("set-cookie", cookie))
+
+        return self.status_code, header_list, body
+
 
 class PlainTextResponse(Response):
     def __init__(
@@ -153,6 +412,125 @@ class PlainTextResponse(Response):
         )
 
 
+class RawJSONResponse(Response):
+    """A response carrying an already encoded JSON body, skips serialization."""
+
+    def __init__(
+        self,
+        status_code: int,
+        body: Union[str, bytes],
+        headers: Optional[Dict[str, str]] = None,
+        content_type: Optional[str] = None,
+    ) -> None:
+        super().__init__(
+            status_code, data=body, headers=headers, content_type=content_type
+        )
+
+    def render_body(self, json_codec: JSONCodec = DEFAULT_CODEC) -> Any:
+        if not self.data:
+            return None
+        if isinstance(self.data, (bytes, bytearray)):
+            return self.data.decode("utf-8")
+        return self.data
+
+
+class StreamingResponse(Response):
+    """A response whose body is produced while it is sent.
+
+    `content` is an iterable of bytes or str chunks, or with a JSON or NDJSON
+    content type an iterable of items encoded in chunks by ChunkedJSONEncoder.
+    Use Application.stream to send it incrementally, other invocations
+    buffer the whole body.
+    """
+
+    streaming = True
+
+    def __init__(
+        self,
+        status_code: int,
+        content: Iterable[Any],
+        headers: Optional[Dict[str, str]] = None,
+        content_type: Optional[str] = None,
+        chunk_size: int = 64 * 1024,
+    ) -> None:
+        super().__init__(
+            status_code,
+            data=content,
+            headers=headers,
+            content_type=content_type or "application/octet-stream",
+        )
+        self.chunk_size = chunk_size
+
+    def is_text(self) -> bool:
+        return self.content_type.lower().startswith(
+            ("application/json", NDJSON_CONTENT_TYPE, "text/")
+        )
+
+    def iter_body(self, json_codec: JSONCodec = DEFAULT_CODEC) -> Iterator[bytes]:
+        content_type = self.content_type.lower()
+        if content_type.startswith(("application/json", NDJSON_CONTENT_TYPE)):
+            ndjson = content_type.startswith(NDJSON_CONTENT_TYPE)
+            encoder = ChunkedJSONEncoder(json_codec, ndjson, self.chunk_size)
+            yield from encoder.iter_chunks(self.data)
+            return
+
+        for chunk in self.data:
+            yield chunk.encode("utf-8") if isinstance(chunk, str) else bytes(chunk)
+
+    def render_body(self, json_codec: JSONCodec = DEFAULT_CODEC) -> Any:
+        body = bytearray()
+        for chunk in self.iter_body(json_codec):
+            body += chunk
+        return body.decode("utf-8") if self.is_text() else bytes(body)
+
+
+class FileResponse(Response):
+    """A response with the contents of a file as its body.
+
+    The file is memory mapped when the body is rendered, so it is base64
+    encoded for API Gateway or sent by an HTTP server without first being
+    read onto the heap. The content type is guessed from the file name
+    unless it is given.
+    """
+
+    def __init__(
+        self,
+        status_code: int,
+        path: Union[str, "os.PathLike[str]"],
+        headers: Optional[Dict[str, str]] = None,
+        content_type: Optional[str] = None,
+        chunk_size: int = 64 * 1024,
+    ) -> None:
+        if content_type is None:
+            import mimetypes
+
+            content_type, _ = mimetypes.guess_type(os.fspath(path))
+        super().__init__(
+            status_code,
+            data=path,
+            headers=headers,
+            content_type=content_type or "application/octet-stream",
+        )
+        self.chunk_size = chunk_size
+
+    def render_body(self, json_codec: JSONCodec = DEFAULT_CODEC) -> Any:
+        import mmap
+
+        with open(self.data, "rb") as fh:
+            # empty files can't be mapped
+            if os.fstat(fh.fileno()).st_size == 0:
+                return None
+            return mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def iter_body(self, json_codec: JSONCodec = DEFAULT_CODEC) -> Iterator[bytes]:
+        with open(self.data, "rb") as fh:
+            while True:
+                chunk = fh.read(self.chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+
 REDIRECT_CODES = (300, 301, 302, 303, 304, 307, 308)
 
 
@@ -1,20 +1,42 @@
 from collections import defaultdict
-from dataclasses import dataclass
+import logging
 import re
-from typing import Any, Callable, Dict, List, Optional, Sequence
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Mapping,
+    NamedTuple,
+    NoReturn,
+    Optional,
+    Sequence,
+    Tuple,
+)
 
-from .converters import get_converter
+from .concurrency import is_async_callable, sync_to_async
+from .converters import Converter, get_converter
 from .exceptions import APIException, MethodNotAllowed, NotFound
+from .log import is_enabled_for, log
 from .request import Request
 from .response import PlainTextResponse, Response
 
+SNAPSHOT_VERSION = 2
+
 ACCEPTED_METHODS = ["DELETE", "GET", "HEAD", "OPTIONS", "PATCH", "POST", "PUT", "ANY"]
 
+# (segment, param name, converter name) for each segment of a route path
+RouteSegment = Tuple[str, Optional[str], Optional[str]]
+
+# (param name, check, convert) for each typed param of a route
+ConversionPlan = Tuple[
+    Tuple[str, Callable[[str], Any], Optional[Callable[[str], Any]]], ...
+]
+
 
-@dataclass(frozen=True)
-class RouteEntry:
+class RouteEntry(NamedTuple):
     view_func: Callable
-    converters: Optional[Dict[str, Callable[[str], Any]]] = None
+    plan: ConversionPlan = ()
 
 
 class Route:
@@ -29,92 +51,407 @@ class Route:
         self.methods = methods
 
 
+class RouteNode:
+    """A segment of the compiled route tree.
+
+    Children are tried in order of specificity: static segments, then typed
+    or untyped params in registration order, then a greedy path param.
+    """
+
+    __slots__ = ["static", "params", "greedy", "key"]
+
+    def __init__(self) -> None:
+        self.static: Dict[str, "RouteNode"] = {}
+        self.params: List[Tuple[str, Optional[Converter], "RouteNode"]] = []
+        self.greedy: Optional[Tuple[str, Optional[Converter], str]] = None
+        self.key: Optional[str] = None
+
+    def insert(
+        self, segments: List[Tuple[str, Optional[str], Optional[Converter]]], key: str
+    ) -> None:
+        node = self
+        for index, (segment, param_name, converter) in enumerate(segments):
+            if param_name is None:
+                child = node.static.get(segment)
+                if child is None:
+                    child = node.static[segment] = RouteNode()
+                node = child
+            elif param_name.endswith("+"):
+                if index != len(segments) - 1:
+                    raise ValueError(f"Greedy param {param_name} must be last in {key}")
+                node.greedy = (param_name, converter, key)
+                return
+            else:
+                for name, param_converter, child in node.params:
+                    if name == param_name and param_converter is converter:
+                        break
+                else:
+                    child = RouteNode()
+                    node.params.append((param_name, converter, child))
+                node = child
+
+        node.key = key
+
+    def match(
+        self, segments: List[str], index: int, params: Dict[str, Any]
+    ) -> Optional[str]:
+        if index == len(segments):
+            return self.key
+
+        segment = segments[index]
+
+        child = self.static.get(segment)
+        if child is not None:
+            key = child.match(segments, index + 1, params)
+            if key is not None:
+                return key
+
+        for name, converter, child in self.params:
+            value: Any = segment
+            if converter is not None:
+                if not converter.check(segment):
+                    continue
+                if converter.convert is not None:
+                    try:
+                        value = converter.convert(segment)
+                    except Exception:
+                        continue
+            key = child.match(segments, index + 1, params)
+            if key is not None:
+                params[name] = value
+                return key
+
+        if self.greedy is not None:
+            name, converter, key = self.greedy
+            value = "/".join(segments[index:])
+            if converter is not None:
+                if not converter.check(value):
+                    return None
+                if converter.convert is not None:
+                    try:
+                        value = converter.convert(value)
+                    except Exception:
+                        return None
+            params[name] = value
+            return key
+
+        return None
+
+
 class Router:
-    def __init__(self, base: str, routes: Sequence[Route]) -> None:
+    def __init__(
+        self,
+        base: str,
+        routes: Sequence[Route],
+        snapshot: Optional[Mapping[str, Any]] = None,
+        validate_snapshot: bool = False,
+    ) -> None:
         self.base = base.strip("/")
         self.routes: Dict[str, Dict[str, RouteEntry]] = defaultdict(dict)
-        path_segment_regex = r"\{(?P<param>\w+\+?)\:(?P<type>\w+)\}"
+        self.tree = RouteNode()
+        path_segment_regex = r"\{(?P<param>\w+\+?)(?:\:(?P<type>\w+))?\}"
         self.path_segment_regex = re.compile(path_segment_regex)
-        for route in routes:
-            self._register_route(route)
 
-    def _register_route(self, route: Route) -> None:
+        if snapshot is not None:
+            self._load_snapshot(snapshot, routes, validate_snapshot)
+        else:
+            for route in routes:
+                self._add_route(route.view_func, *self.compile_route(route))
+
+        self.is_async = any(
+            is_async_callable(entry.view_func)
+            for methods in self.routes.values()
+            for entry in methods.values()
+        )
+
+    def compile_route(self, route: Route) -> Tuple[str, List[str], List[RouteSegment]]:
+        """Parse a route into its resource path, methods and path segments."""
         methods = [
             method.upper()
             for method in route.methods
             if method.upper() in ACCEPTED_METHODS
         ]
 
-        converters = {}
+        segments: List[RouteSegment] = []
 
         path = route.path.strip("/")
 
+        if self.base:
+            for segment in self.base.split("/"):
+                segments.append((segment, None, None))
+
         if "{" in path:
-            segments = []
+            path_segments = []
             for segment in path.split("/"):
                 match = self.path_segment_regex.fullmatch(segment)
                 if match:
                     param_name, type_name = match.group(1, 2)
-                    converter = get_converter(type_name)
-                    if converter is None:
+                    if type_name is not None and get_converter(type_name) is None:
                         raise ValueError(
                             f"Converter not found for param {param_name} in path {route.path}"
                         )
-                    converters[param_name] = converter
-                    segments.append(f"{{{param_name}}}")
+                    path_segments.append(f"{{{param_name}}}")
+                    segments.append((segment, param_name, type_name))
                 else:
-                    segments.append(segment)
+                    path_segments.append(segment)
+                    segments.append((segment, None, None))
 
-            path = "/".join(segments)
+            path = "/".join(path_segments)
+        elif path:
+            for segment in path.split("/"):
+                segments.append((segment, None, None))
 
         path = "/" + path
 
         if self.base:
             path = f"/{self.base}{path}"
 
+        return path, methods, segments
+
+    def _add_route(
+        self,
+        view_func: Callable,
+        path: str,
+        methods: Sequence[str],
+        segments: Sequence[RouteSegment],
+    ) -> None:
+        plan: List[Any] = []
+        tree_segments: List[Tuple[str, Optional[str], Optional[Converter]]] = []
+        for segment, param_name, type_name in segments:
+            converter = None
+            if type_name is not None:
+                converter = get_converter(type_name)
+                if converter is None:
+                    raise ValueError(
+                        f"Converter not found for param {param_name} in path {path}"
+                    )
+                plan.append((param_name, converter.check, converter.convert))
+            tree_segments.append((segment, param_name, converter))
+
         for method in methods:
             if method in self.routes[path]:
-                raise ValueError(f"Duplicate method for path {route.path}")
+                raise ValueError(f"Duplicate method for path {path}")
             else:
-                self.routes[path][method] = RouteEntry(route.view_func, converters)
+                self.routes[path][method] = RouteEntry(view_func, tuple(plan))
 
-    def __call__(self, request: Request, app: Any) -> Response:
-        key = request.resource_path
+        self.tree.insert(tree_segments, path)
+
+    def _load_snapshot(
+        self, snapshot: Mapping[str, Any], routes: Sequence[Route], validate: bool
+    ) -> None:
+        if snapshot.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(
+                f"Unsupported route snapshot version {snapshot.get('version')}"
+            )
+        if snapshot.get("base", "") != self.base:
+            raise ValueError("Route snapshot was generated for a different base")
+
+        entries = snapshot["routes"]
+        if routes and len(routes) != len(entries):
+            raise ValueError("Route snapshot does not match the routes")
+
+        for index, entry in enumerate(entries):
+            path = entry["path"]
+            methods = entry["methods"]
+            segments = [tuple(segment) for segment in entry["segments"]]
+
+            if routes:
+                route = routes[index]
+                view_func = route.view_func
+                # routes are paired with entries by position, check the pair
+                # so reordered routes fail rather than go to the wrong view
+                if entry.get("view"):
+                    matches = entry["view"] == view_path(view_func)
+                else:
+                    matches = entry["route"] == route.path
+                if not matches:
+                    raise ValueError(
+                        f"Route snapshot does not match the routes at {route.path}"
+                    )
+                if validate and (path, methods, segments) != self.compile_route(route):
+                    raise ValueError(f"Route snapshot is stale for path {route.path}")
+            elif entry.get("view"):
+                view_func = import_view(entry["view"])
+            else:
+                raise ValueError(f"Route snapshot has no view for path {path}")
+
+            self._add_route(view_func, path, methods, segments)  # type: ignore
+
+    def match(self, path: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Match a raw request path against the route tree.
+
+        Returns the resource path the route was registered under along with
+        the converted path params, or None if no route matches.
+        """
+        path = path.strip("/")
+        segments = path.split("/") if path else []
+        params: Dict[str, Any] = {}
+
+        key = self.tree.match(segments, 0, params)
         if key is None:
+            return None
+
+        return key, params
+
+    def resolve(self, request: Request, app: Any) -> Callable:
+        """Find the view function for a request and convert its path params.
+
+        Raises an APIException if no route matches.
+        """
+        entry, converted = self.lookup(request)
+        if entry.plan and not converted:
+            self.convert_params(entry, request, app)
+        return entry.view_func
+
+    def lookup(self, request: Request) -> Tuple[RouteEntry, bool]:
+        """Find the route entry for a request.
+
+        Also returns whether the path params were already converted, which is
+        the case when the raw path had to be matched against the route tree.
+        """
+        key = request.resource_path
+        if key is None and request.path is None:
             raise APIException(message="invalid resource path")
 
+        resource_routes = self.routes.get(key) if key is not None else None
+        converted = False
+
+        if resource_routes is None:
+            # API Gateway did not resolve a registered route (e.g. a $default
+            # or {proxy+} catch-all integration), so match the raw path
+            match = self.match(request.path) if request.path is not None else None
+            if match is None:
+                raise NotFound(
+                    f"Unregistered resource path {key if key is not None else request.path}"
+                )
+
+            key, params = match
+            request.resource_path = key
+            request.params = params
+            resource_routes = self.routes[key]
+            converted = True
+
+        entry = resource_routes.get(request.method)
+        if entry is None:
+            entry = resource_routes.get("ANY")
+
+        if entry is None or not callable(entry.view_func):
+            raise MethodNotAllowed(
+                f"Unregistered view function for path {key} with method {request.method}"
+            )
+
+        return entry, converted
+
+    def convert_params(self, entry: RouteEntry, request: Request, app: Any) -> None:
+        params = request.params
+        for param_name, check, convert in entry.plan:
+            value = params.get(param_name)
+            if value is None or not check(value):
+                self._conversion_failed(app, param_name, value)
+            if convert is not None:
+                try:
+                    params[param_name] = convert(value)
+                except Exception:
+                    self._conversion_failed(app, param_name, value)
+
+    def __call__(self, request: Request, app: Any) -> Response:
         try:
-            resource_routes = self.routes.get(key)
-            if resource_routes is None:
-                raise NotFound(f"Unregistered resource path {key}")
+            response = self.resolve(request, app)(request, app)
+            if not isinstance(response, Response):
+                response = Response(200, data=response)
+        except APIException as ex:
+            response = PlainTextResponse(ex.status_code, ex.message)
 
-            entry = resource_routes.get(request.method)
-            if entry is None:
-                entry = resource_routes.get("ANY")
+        return response
 
-            if entry is None or not callable(entry.view_func):
-                raise MethodNotAllowed(
-                    f"Unregistered view function for path {key} with method {request.method}"
-                )
+    async def call_async(self, request: Request, app: Any) -> Response:
+        """Dispatch to async views on the running loop.
 
-            if entry.converters:
-                for param_name, converter in entry.converters.items():
-                    try:
-                        value = request.params[param_name]
-                        request.params[param_name] = converter(value)
-                    except:
-                        app.logger.info(
-                            "{param_name} failed to convert {value} using {converter}",
-                            param_name=param_name,
-                            value=request.params[param_name],
-                            converter=converter,
-                        )
-                        raise NotFound(f"{param_name} param failed to match type")
+        Sync views are run in the loop's executor so they don't block other
+        requests sharing the loop.
+        """
+        try:
+            view_func = self.resolve(request, app)
+            if is_async_callable(view_func):
+                response = await view_func(request, app)
+            else:
+                response = await sync_to_async(view_func)(request, app)
+            if not isinstance(response, Response):
+                response = Response(200, data=response)
+        except APIException as ex:
+            response = PlainTextResponse(ex.status_code, ex.message)
+
+        return response
 
+    def call_timed(self, request: Request, app: Any) -> Response:
+        """__call__ recording the routing, params and view phases."""
+        timer = request.timer
+        previous = timer.enter("routing")
+        try:
+            entry, converted = self.lookup(request)
+            if entry.plan and not converted:
+                timer.enter("params")
+                self.convert_params(entry, request, app)
+            timer.enter("view")
             response = entry.view_func(request, app)
             if not isinstance(response, Response):
                 response = Response(200, data=response)
         except APIException as ex:
             response = PlainTextResponse(ex.status_code, ex.message)
+        finally:
+            timer.enter(previous)
 
         return response
+
+    async def call_async_timed(self, request: Request, app: Any) -> Response:
+        """call_async recording the routing, params and view phases."""
+        timer = request.timer
+        previous = timer.enter("routing")
+        try:
+            entry, converted = self.lookup(request)
+            if entry.plan and not converted:
+                timer.enter("params")
+                self.convert_params(entry, request, app)
+            timer.enter("view")
+            view_func = entry.view_func
+            if is_async_callable(view_func):
+                response = await view_func(request, app)
+            else:
+                response = await sync_to_async(view_func)(request, app)
+            if not isinstance(response, Response):
+                response = Response(200, data=response)
+        except APIException as ex:
+            response = PlainTextResponse(ex.status_code, ex.message)
+        finally:
+            timer.enter(previous)
+
+        return response
+
+    def _conversion_failed(self, app: Any, param_name: str, value: Any) -> NoReturn:
+        if is_enabled_for(app.logger, logging.INFO):
+            log(
+                app.logger,
+                logging.INFO,
+                f"{param_name} failed to convert {value!r}",
+                {"param": param_name},
+            )
+        raise NotFound(f"{param_name} param failed to match type")
+
+
+def view_path(view_func: Callable) -> Optional[str]:
+    """The "module:qualname" import path of a view, if it has one."""
+    module = getattr(view_func, "__module__", None)
+    qualname = getattr(view_func, "__qualname__", None)
+    if module is None or qualname is None or "<" in qualname:
+        return None
+    return f"{module}:{qualname}"
+
+
+def import_view(path: str) -> Any:
+    import importlib
+
+    module_name, _, qualname = path.partition(":")
+    value: Any = importlib.import_module(module_name)
+    for name in qualname.split("."):
+        value = getattr(value, name)
+    return value
@@ -1,12 +1,95 @@
 from datetime import datetime, date, time
-from functools import singledispatch
-from decimal import Decimal
+from enum import Enum
+from typing import Any, Callable, Dict, Mapping, Optional, Union, get_type_hints
+from types import MappingProxyType
 
+Handler = Callable[[Any], Any]
 
-@singledispatch
-def to_serializable(val):
-    """Used by default."""
-    return str(val)
+
+class Serializer:
+    """The `default` hook used by the JSON codecs.
+
+    Handlers are looked up by the exact type of a value. A type without a
+    handler of its own uses the handler of its nearest registered base class,
+    resolved once and cached. Types that aren't registered are serialized
+    with str.
+
+    Handlers may also be registered by "module.QualName" so types like
+    Decimal and UUID are supported without importing their modules.
+    """
+
+    def __init__(self, fallback: Handler = str) -> None:
+        self.fallback = fallback
+        self._handlers: Dict[type, Handler] = {}
+        self._named_handlers: Dict[str, Handler] = {}
+        self._cache: Dict[type, Handler] = {}
+
+    @property
+    def registry(self) -> Mapping[type, Handler]:
+        return MappingProxyType(self._handlers)
+
+    def register(
+        self, cls: Union[type, str, Handler], func: Optional[Handler] = None
+    ) -> Any:
+        """Register a handler for a type and its subclasses.
+
+        Works like functools.singledispatch: with the type and handler, as
+        a decorator taking the type, or as a plain decorator using the type
+        annotation of the handler's first argument.
+        """
+        if func is None:
+            if isinstance(cls, (type, str)):
+                return lambda func: self.register(cls, func)
+
+            func = cls
+            hints = get_type_hints(func)
+            hints.pop("return", None)
+            if not hints:
+                raise TypeError(f"Missing type annotation for handler {func!r}")
+            cls = next(iter(hints.values()))
+
+        if isinstance(cls, str):
+            self._named_handlers[cls] = func
+        elif isinstance(cls, type):
+            self._handlers[cls] = func
+        else:
+            raise TypeError(f"Invalid type {cls!r} for handler {func!r}")
+
+        self._cache.clear()
+        return func
+
+    def dispatch(self, cls: type) -> Handler:
+        handler = self._cache.get(cls)
+        if handler is None:
+            handler = self._cache[cls] = self._resolve(cls)
+        return handler
+
+    def _resolve(self, cls: type) -> Handler:
+        for klass in cls.__mro__:
+            handler = self._handlers.get(klass)
+            if handler is not None:
+                return handler
+            if self._named_handlers:
+                handler = self._named_handlers.get(
+                    f"{klass.__module__}.{klass.__qualname__}"
+                )
+                if handler is not None:
+                    return handler
+
+        if hasattr(cls, "__dataclass_fields__"):
+            return serialize_dataclass
+        if issubclass(cls, tuple) and hasattr(cls, "_fields"):
+            return list
+        return self.fallback
+
+    def __call__(self, value: Any) -> Any:
+        handler = self._cache.get(type(value))
+        if handler is None:
+            handler = self.dispatch(type(value))
+        return handler(value)
+
+
+to_serializable = Serializer()
 
 
 @to_serializable.register
@@ -28,7 +111,36 @@ def serialize_datetime(val: datetime) -> str:
     return representation
 
 
-@to_serializable.register(float)
-@to_serializable.register(Decimal)
-def serialize_decimal(val) -> str:
-    return str(val)
+@to_serializable.register
+def serialize_enum(val: Enum) -> Any:
+    return val.value
+
+
+@to_serializable.register(set)
+@to_serializable.register(frozenset)
+def serialize_set(val) -> list:
+    return list(val)
+
+
+@to_serializable.register(bytes)
+@to_serializable.register(bytearray)
+@to_serializable.register(memoryview)
+def serialize_bytes(val) -> str:
+    import base64
+
+    return base64.b64encode(val).decode("ascii")
+
+
+# float subclasses such as numpy.float64 stay numbers
+to_serializable.register(float, float)
+
+to_serializable.register("decimal.Decimal", str)
+to_serializable.register("uuid.UUID", str)
+
+
+def serialize_dataclass(val: Any) -> Dict[str, Any]:
+    # dataclasses is already imported when there is a dataclass to serialize
+    from dataclasses import fields
+
+    # shallow, nested values are passed back to the codec
+    return {field.name: getattr(val, field.name) for field in fields(val)}
@@ -0,0 +1,507 @@
+"""A local HTTP/1.1 server for running and load testing applications.
+
+Requests are converted to v1.0 or v2.0 API Gateway events, routed as a
+$default or {proxy+} catch-all integration would be, and the rendered
+responses are written back as HTTP responses. Like Lambda, each process
+handles one request at a time, so use `workers` to load all cores.
+
+Usage: python -m pitcher.server module:app [--port 8000] [--workers 4]
+"""
+import argparse
+import asyncio
+import base64
+from email.utils import formatdate
+from http import HTTPStatus
+import itertools
+import logging
+import os
+import signal
+import socket
+import sys
+from time import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, unquote
+
+from .router import import_view
+
+logger = logging.getLogger(__name__)
+
+MAX_HEADER_SIZE = 64 * 1024
+
+# API Gateway's payload limit
+MAX_BODY_SIZE = 10 * 1024 * 1024
+
+REASONS = {status.value: status.phrase for status in HTTPStatus}
+
+NO_BODY_STATUSES = frozenset([204, 304])
+
+
+class ServerContext:
+    """The parts of the Lambda context an application may read."""
+
+    function_name = "pitcher-local"
+    function_version = "$LATEST"
+    memory_limit_in_mb = 0
+    invoked_function_arn = "arn:aws:lambda:local:000000000000:function:pitcher-local"
+    log_group_name = "/aws/lambda/pitcher-local"
+    log_stream_name = "local"
+
+    def __init__(self, aws_request_id: str) -> None:
+        self.aws_request_id = aws_request_id
+
+    def get_remaining_time_in_millis(self) -> int:
+        return 30000
+
+
+class HTTPError(Exception):
+    def __init__(self, status_code: int) -> None:
+        super().__init__(REASONS.get(status_code, ""))
+        self.status_code = status_code
+
+
+def build_event(
+    method: str,
+    target: str,
+    headers: Sequence[Tuple[str, str]],
+    body: bytes,
+    version: str = "2.0",
+    source_ip: str = "127.0.0.1",
+    request_id: str = "",
+) -> Dict[str, Any]:
+    """The API Gateway event for a request to a catch-all integration."""
+    raw_path, _, raw_query = target.partition("?")
+    path = unquote(raw_path)
+    query = parse_qsl(raw_query, keep_blank_values=True)
+
+    body_value: Optional[str] = None
+    is_base64 = False
+    if body:
+        try:
+            body_value = body.decode("utf-8")
+        except UnicodeDecodeError:
+            body_value = base64.b64encode(body).decode("ascii")
+            is_base64 = True
+
+    epoch = int(time() * 1000)
+
+    if version == "2.0":
+        header_map: Dict[str, str] = {}
+        cookies: List[str] = []
+        for name, value in headers:
+            name = name.lower()
+            if name == "cookie":
+                cookies.extend(c.strip() for c in value.split(";") if c.strip())
+            elif name in header_map:
+                header_map[name] += "," + value
+            else:
+                header_map[name] = value
+
+        query_map: Dict[str, str] = {}
+        for name, value in query:
+            query_map[name] = (
+                query_map[name] + "," + value if name in query_map else value
+            )
+
+        event: Dict[str, Any] = {
+            "version": "2.0",
+            "routeKey": "$default",
+            "rawPath": raw_path,
+            "rawQueryString": raw_query,
+            "headers": header_map,
+            "requestContext": {
+                "http": {
+                    "method": method,
+                    "path": path,
+                    "protocol": "HTTP/1.1",
+                    "sourceIp": source_ip,
+                    "userAgent": header_map.get("user-agent", ""),
+                },
+                "requestId": request_id,
+                "routeKey": "$default",
+                "stage": "$default",
+                "timeEpoch": epoch,
+            },
+            "isBase64Encoded": is_base64,
+        }
+        if cookies:
+            event["cookies"] = cookies
+        if query_map:
+            event["queryStringParameters"] = query_map
+        if body_value is not None:
+            event["body"] = body_value
+        return event
+
+    single: Dict[str, str] = {}
+    multi: Dict[str, List[str]] = {}
+    for name, value in headers:
+        single[name] = value
+        multi.setdefault(name, []).append(value)
+
+    query_single: Dict[str, str] = {}
+    query_multi: Dict[str, List[str]] = {}
+    for name, value in query:
+        query_single[name] = value
+        query_multi.setdefault(name, []).append(value)
+
+    return {
+        "version": "1.0",
+        "resource": "/{proxy+}",
+        "path": path,
+        "httpMethod": method,
+        "headers": single,
+        "multiValueHeaders": multi,
+        "queryStringParameters": query_single or None,
+        "multiValueQueryStringParameters": query_multi or None,
+        "pathParameters": {"proxy": path.lstrip("/")},
+        "stageVariables": None,
+        "requestContext": {
+            "resourcePath": "/{proxy+}",
+            "httpMethod": method,
+            "path": path,
+            "protocol": "HTTP/1.1",
+            "requestId": request_id,
+            "stage": "local",
+            "identity": {"sourceIp": source_ip, "userAgent": single.get("User-Agent")},
+            "requestTimeEpoch": epoch,
+        },
+        "body": body_value,
+        "isBase64Encoded": is_base64,
+    }
+
+
+def encode_response(
+    rendered: Dict[str, Any], date: str, keep_alive: bool, head: bool = False
+) -> bytes:
+    """The HTTP/1.1 response for an application's rendered response."""
+    status_code = rendered.get("statusCode", 200)
+
+    body = rendered.get("body") or b""
+    if rendered.get("isBase64Encoded"):
+        body = base64.b64decode(body)
+    elif isinstance(body, str):
+        body = body.encode("utf-8")
+
+    lines = [f"HTTP/1.1 {status_code} {REASONS.get(status_code, '')}"]
+    for name, value in (rendered.get("headers") or {}).items():
+        lines.append(f"{name}: {value}")
+    for name, values in (rendered.get("multiValueHeaders") or {}).items():
+        for value in values:
+            lines.append(f"{name}: {value}")
+    for cookie in rendered.get("cookies") or ():
+        lines.append(f"Set-Cookie: {cookie}")
+
+    if status_code in NO_BODY_STATUSES:
+        body = b""
+    else:
+        lines.append(f"Content-Length: {len(body)}")
+    lines.append(f"Date: {date}")
+    if not keep_alive:
+        lines.append("Connection: close")
+
+    head_bytes = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+    return head_bytes if head else head_bytes + body
+
+
+class HTTPProtocol(asyncio.Protocol):
+    """Parses HTTP/1.1 requests off a connection and answers them in order.
+
+    Requests are handled synchronously as soon as they are complete, so a
+    process handles one request at a time.
+    """
+
+    def __init__(self, server: "Server") -> None:
+        self.server = server
+        self.transport: Optional[asyncio.Transport] = None
+        self.buffer = bytearray()
+        self.source_ip = "127.0.0.1"
+        self.closing = False
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self.transport = transport  # type: ignore
+        peer = transport.get_extra_info("peername")
+        if peer:
+            self.source_ip = peer[0]
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        self.transport = None
+
+    def data_received(self, data: bytes) -> None:
+        self.buffer += data
+        try:
+            while not self.closing and self.handle_next():
+                pass
+        except HTTPError as ex:
+            self.write_error(ex.status_code)
+
+    def handle_next(self) -> bool:
+        """Handle the first request in the buffer, if it's complete."""
+        end = self.buffer.find(b"\r\n\r\n")
+        if end < 0:
+            if len(self.buffer) > MAX_HEADER_SIZE:
+                raise HTTPError(431)
+            return False
+
+        method, target, http_version, headers = self.parse_head(
+            bytes(self.buffer[:end])
+        )
+        start = end + 4
+
+        chunked = False
+        length = 0
+        connection = ""
+        expect = ""
+        for name, value in headers:
+            lowered = name.lower()
+            if lowered == "content-length":
+                try:
+                    length = int(value)
+                except ValueError:
+                    raise HTTPError(400)
+            elif lowered == "transfer-encoding":
+                chunked = value.lower().endswith("chunked")
+            elif lowered == "connection":
+                connection = value.lower()
+            elif lowered == "expect":
+                expect = value.lower()
+
+        if chunked:
+            decoded = self.read_chunked(start)
+            if decoded is None:
+                return self.need_body(expect)
+            body, consumed = decoded
+        else:
+            if length > self.server.max_body_size:
+                raise HTTPError(413)
+            if len(self.buffer) - start < length:
+                return self.need_body(expect)
+            body = bytes(self.buffer[start : start + length])
+            consumed = start + length
+
+        del self.buffer[:consumed]
+
+        if http_version == "HTTP/1.0":
+            keep_alive = connection == "keep-alive"
+        else:
+            keep_alive = connection != "close"
+
+        response = self.server.handle(
+            method, target, headers, body, self.source_ip, keep_alive
+        )
+        self.write(response, keep_alive)
+        return bool(self.buffer)
+
+    def need_body(self, expect: str) -> bool:
+        if expect == "100-continue" and self.transport is not None:
+            self.transport.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+        return False
+
+    def parse_head(self, head: bytes) -> Tuple[str, str, str, List[Tuple[str, str]]]:
+        try:
+            lines = head.decode("latin-1").split("\r\n")
+            method, target, http_version = lines[0].split(" ")
+            headers = []
+            for line in lines[1:]:
+                name, _, value = line.partition(":")
+                headers.append((name.strip(), value.strip()))
+        except ValueError:
+            raise HTTPError(400)
+        if not http_version.startswith("HTTP/1."):
+            raise HTTPError(505)
+        return method.upper(), target, http_version, headers
+
+    def read_chunked(self, start: int) -> Optional[Tuple[bytes, int]]:
+        body = bytearray()
+        position = start
+        while True:
+            line_end = self.buffer.find(b"\r\n", position)
+            if line_end < 0:
+                return None
+            try:
+                size = int(bytes(self.buffer[position:line_end]).split(b";")[0], 16)
+            except ValueError:
+                raise HTTPError(400)
+            position = line_end + 2
+
+            if size == 0:
+                # skip trailers up to the blank line ending the body
+                trailers_end = self.buffer.find(b"\r\n", position)
+                while trailers_end > position:
+                    position = trailers_end + 2
+                    trailers_end = self.buffer.find(b"\r\n", position)
+                if trailers_end < 0:
+                    return None
+                return bytes(body), trailers_end + 2
+
+            if len(self.buffer) < position + size + 2:
+                return None
+            body += self.buffer[position : position + size]
+            if len(body) > self.server.max_body_size:
+                raise HTTPError(413)
+            position += size + 2
+
+    def write(self, response: bytes, keep_alive: bool) -> None:
+        if self.transport is None:
+            return
+        self.transport.write(response)
+        if not keep_alive:
+            self.closing = True
+            self.transport.close()
+
+    def write_error(self, status_code: int) -> None:
+        rendered = {
+            "statusCode": status_code,
+            "headers": {"Content-Type": "text/plain"},
+            "body": REASONS.get(status_code, ""),
+        }
+        self.write(encode_response(rendered, self.server.date(), False), False)
+
+
+class Server:
+    """Serves an application over HTTP/1.1 with events of the given version."""
+
+    def __init__(
+        self,
+        app: Any,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        version: str = "2.0",
+        max_body_size: int = MAX_BODY_SIZE,
+    ) -> None:
+        if version not in ("1.0", "2.0"):
+            raise ValueError(f"Unknown event version {version}")
+        self.app = app
+        self.host = host
+        self.port = port
+        self.version = version
+        self.max_body_size = max_body_size
+        self._ids = itertools.count(1)
+        self._prefix = f"{os.getpid():x}"
+        self._date = ""
+        self._date_second = 0
+
+    def date(self) -> str:
+        # formatted at most once a second
+        now = int(time())
+        if now != self._date_second:
+            self._date = formatdate(now, usegmt=True)
+            self._date_second = now
+        return self._date
+
+    def handle(
+        self,
+        method: str,
+        target: str,
+        headers: List[Tuple[str, str]],
+        body: bytes,
+        source_ip: str,
+        keep_alive: bool,
+    ) -> bytes:
+        request_id = f"{self._prefix}-{next(self._ids):x}"
+        event = build_event(
+            method, target, headers, body, self.version, source_ip, request_id
+        )
+        try:
+            rendered = self.app(event, ServerContext(request_id))
+        except Exception:
+            logger.exception("unhandled application error")
+            rendered = {
+                "statusCode": 500,
+                "headers": {"Content-Type": "text/plain"},
+                "body": "An internal server error occurred.",
+            }
+        return encode_response(rendered, self.date(), keep_alive, method == "HEAD")
+
+    def bind(self, backlog: int = 1024) -> socket.socket:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(backlog)
+        sock.setblocking(False)
+        # the bound port, when port 0 picked one
+        self.port = sock.getsockname()[1]
+        return sock
+
+    async def start(
+        self, sock: Optional[socket.socket] = None
+    ) -> asyncio.AbstractServer:
+        loop = asyncio.get_running_loop()
+        return await loop.create_server(
+            lambda: HTTPProtocol(self), sock=sock if sock else self.bind()
+        )
+
+    async def serve_forever(self, sock: Optional[socket.socket] = None) -> None:
+        server = await self.start(sock)
+        async with server:
+            await server.serve_forever()
+
+    def run(self, workers: int = 1) -> None:
+        """Serve until interrupted, pre-forking `workers` processes.
+
+        The workers share the listening socket, which the kernel balances
+        connections across.
+        """
+        sock = self.bind()
+        logger.info(
+            "serving on http://%s:%d with %d workers", self.host, self.port, workers
+        )
+
+        if workers <= 1:
+            self._run_worker(sock)
+            return
+
+        if not hasattr(os, "fork"):
+            raise RuntimeError("Multiple workers need os.fork")
+
+        children = []
+        for _ in range(workers):
+            pid = os.fork()
+            if pid == 0:
+                signal.signal(signal.SIGINT, signal.SIG_DFL)
+                try:
+                    # a fresh id prefix so request ids stay unique per worker
+                    self._prefix = f"{os.getpid():x}"
+                    self._run_worker(sock)
+                finally:
+                    os._exit(0)
+            children.append(pid)
+
+        def stop(signum: int, frame: Any) -> None:
+            for pid in children:
+                try:
+                    os.kill(pid, signal.SIGTERM)
+                except ProcessLookupError:
+                    pass
+
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGTERM, stop)
+        for pid in children:
+            os.waitpid(pid, 0)
+        sock.close()
+
+    def _run_worker(self, sock: socket.socket) -> None:
+        try:
+            asyncio.run(self.serve_forever(sock))
+        except KeyboardInterrupt:
+            pass
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m pitcher.server")
+    parser.add_argument("app", help="import path of the application, module:name")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--event-version", choices=["1.0", "2.0"], default="2.0")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    if "" not in sys.path:
+        sys.path.insert(0, "")
+
+    app = import_view(args.app)
+    server = Server(app, host=args.host, port=args.port, version=args.event_version)
+    server.run(workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Ahead of time snapshots of an application's route table.
+
+A snapshot records the route path, compiled path, methods and segments of
+every route so the router can skip parsing route paths on cold start. Generate one at
+build time with
+
+    python -m pitcher.snapshot my_service.handler:app -o routes.json
+
+and pass it to the application with `route_snapshot="routes.json"`. Set
+`debug=True` to check the snapshot against the live routes.
+"""
+import argparse
+import json
+import os
+import sys
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from .router import SNAPSHOT_VERSION, Route, Router, import_view, view_path
+
+
+def build_snapshot(routes: Sequence[Route], base: str = "") -> Dict[str, Any]:
+    router = Router(base=base, routes=[])
+    entries: List[Dict[str, Any]] = []
+    for route in routes:
+        path, methods, segments = router.compile_route(route)
+        entries.append(
+            {
+                "path": path,
+                "route": route.path,
+                "methods": methods,
+                "segments": [list(segment) for segment in segments],
+                "view": view_path(route.view_func),
+            }
+        )
+
+    return {"version": SNAPSHOT_VERSION, "base": router.base, "routes": entries}
+
+
+def dump_snapshot(snapshot: Dict[str, Any], path: Union[str, os.PathLike]) -> None:
+    with open(path, "w") as fh:
+        json.dump(snapshot, fh, separators=(",", ":"))
+
+
+def load_snapshot(path: Union[str, os.PathLike]) -> Dict[str, Any]:
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="pitcher-snapshot", description="Write a route table snapshot."
+    )
+    parser.add_argument(
+        "target", help="import path of an Application or a list of routes"
+    )
+    parser.add_argument("-o", "--output", default="routes.json")
+    parser.add_argument("--base", default=None, help="base path for a list of routes")
+    args = parser.parse_args(argv)
+
+    if os.getcwd() not in sys.path:
+        sys.path.insert(0, os.getcwd())
+
+    target = import_view(args.target)
+    if hasattr(target, "route_list"):
+        routes = target.route_list
+        base = target.base if args.base is None else args.base
+    else:
+        routes = list(target)
+        base = args.base or ""
+
+    snapshot = build_snapshot(routes, base=base)
+    missing = [entry["path"] for entry in snapshot["routes"] if not entry["view"]]
+    if missing:
+        print(
+            "warning: views without an import path need the live routes: "
+            + ", ".join(missing),
+            file=sys.stderr,
+        )
+
+    dump_snapshot(snapshot, args.output)
+    print(f"wrote {len(snapshot['routes'])} routes to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+import sys
+from time import perf_counter_ns, time
+from typing import Any, Callable, Dict, IO, Optional, Sequence
+
+from .request import Request
+from .response import Response
+
+# CloudWatch rejects EMF documents with more than 100 metrics
+MAX_EMF_METRICS = 100
+
+
+class Timer:
+    """Records the time spent in each phase of handling a request.
+
+    Only one phase runs at a time. Entering a phase ends the current one, so
+    nested phases such as middleware layers record their own time and not
+    the time of the layers inside them.
+    """
+
+    __slots__ = ["phase", "started", "stopped", "last", "durations"]
+
+    def __init__(self, phase: str = "parse") -> None:
+        self.phase: Optional[str] = phase
+        self.started = self.last = perf_counter_ns()
+        self.stopped: Optional[int] = None
+        self.durations: Dict[str, int] = {}
+
+    def enter(self, phase: Optional[str]) -> Optional[str]:
+        """Start a phase, returning the phase it ended."""
+        now = perf_counter_ns()
+        previous = self.phase
+        if previous is not None:
+            self.durations[previous] = self.durations.get(previous, 0) + now - self.last
+        self.last = now
+        self.phase = phase
+        return previous
+
+    def stop(self) -> None:
+        self.enter(None)
+        self.stopped = self.last
+
+    @property
+    def total_ns(self) -> int:
+        end = self.stopped if self.stopped is not None else perf_counter_ns()
+        return end - self.started
+
+    def milliseconds(self) -> Dict[str, float]:
+        return {phase: ns / 1e6 for phase, ns in self.durations.items()}
+
+    def server_timing(self) -> str:
+        """The recorded phases, followed by the total, as a Server-Timing value."""
+        metrics = [
+            f"{phase};dur={ns / 1e6:.3f}" for phase, ns in self.durations.items()
+        ]
+        metrics.append(f"total;dur={self.total_ns / 1e6:.3f}")
+        return ", ".join(metrics)
+
+
+class Instrumentation:
+    """Per request timing of an application.
+
+    Requests are timed from event parsing through each middleware layer,
+    routing, path param conversion, the view and rendering. With
+    `server_timing` the phases up to rendering are sent in a Server-Timing
+    header. With `emf` a CloudWatch Embedded Metric Format line is written
+    to `stream`, stdout by default, for each request.
+
+    Applications without instrumentation or on_response functions don't
+    create timers or time their middleware.
+    """
+
+    def __init__(
+        self,
+        server_timing: bool = False,
+        emf: bool = False,
+        namespace: str = "pitcher",
+        dimensions: Optional[Dict[str, str]] = None,
+        stream: Optional[IO[str]] = None,
+    ) -> None:
+        self.server_timing = server_timing
+        self.emf = emf
+        self.namespace = namespace
+        self.dimensions = dimensions or {}
+        self.stream = stream
+
+    def start(self) -> Timer:
+        return Timer()
+
+    def before_render(self, request: Request, response: Response) -> None:
+        timer = request.timer
+        timer.enter("render")
+        if self.server_timing:
+            response.set_header("Server-Timing", timer.server_timing())
+
+    def after_render(
+        self,
+        request: Request,
+        response: Response,
+        on_response: Sequence[Callable],
+        app: Any,
+    ) -> None:
+        timer = request.timer
+        timer.stop()
+
+        if self.emf:
+            self.write_emf(request, response, app)
+
+        for func in on_response:
+            try:
+                func(request, response, timer, app)
+            except:
+                app.logger.exception("on_response function raised an exception")
+
+    def emf_document(self, request: Request, response: Response, app: Any) -> dict:
+        timer = request.timer
+        dimensions = {"Service": app.name, **self.dimensions}
+        if request.resource_path is not None:
+            dimensions["Route"] = request.resource_path
+
+        values = timer.milliseconds()
+        values["total"] = timer.total_ns / 1e6
+        metrics = [
+            {"Name": phase, "Unit": "Milliseconds"}
+            for phase in list(values)[:MAX_EMF_METRICS]
+        ]
+
+        return {
+            "_aws": {
+                "Timestamp": int(time() * 1000),
+                "CloudWatchMetrics": [
+                    {
+                        "Namespace": self.namespace,
+                        "Dimensions": [list(dimensions)],
+                        "Metrics": metrics,
+                    }
+                ],
+            },
+            **dimensions,
+            **values,
+            "method": request.method,
+            "statusCode": response.status_code,
+            "requestId": request.id,
+        }
+
+    def write_emf(self, request: Request, response: Response, app: Any) -> None:
+        stream = self.stream if self.stream is not None else sys.stdout
+        document = self.emf_document(request, response, app)
+        stream.write(app.json_codec.dumps(document) + "\n")
+        stream.flush()
+
+
+def timed_layer(layer: Callable, name: str, is_async: bool) -> Callable:
+    """Wrap a middleware layer so its time is recorded as the phase `name`."""
+    if is_async:
+
+        async def call_async(request: Request, app: Any) -> Response:
+            timer = request.timer
+            previous = timer.enter(name)
+            try:
+                return await layer(request, app)
+            finally:
+                timer.enter(previous)
+
+        return call_async
+
+    def call(request: Request, app: Any) -> Response:
+        timer = request.timer
+        previous = timer.enter(name)
+        try:
+            return layer(request, app)
+        finally:
+            timer.enter(previous)
+
+    return call
@@ -21,6 +21,9 @@ setup(
     long_description_content_type="text/markdown",
     packages=find_packages(exclude=["tests"]),
     python_requires='>=3.7',
+    entry_points={
+        "console_scripts": ["pitcher-snapshot=pitcher.snapshot:main"],
+    },
     classifiers=[
         "License :: OSI Approved :: MIT License",
         "Operating System :: OS Independent",
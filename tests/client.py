@@ -9,7 +9,7 @@ from aws_lambda_context import LambdaContext
 
 from pitcher.request import CaseInsensitiveDict
 
-NON_BINARY_MIME_TYPES = ["application/json", "image/svg+xml"]
+NON_BINARY_MIME_TYPES = ["application/json", "application/x-ndjson", "image/svg+xml"]
 
 
 class Request:
@@ -24,6 +24,7 @@ class Request:
         uriparams: Optional[dict] = None,
         stage: Optional[str] = None,
         stage_vars: Optional[dict] = None,
+        resource: Optional[str] = None,
     ) -> None:
         self.method = method.upper()
         self.uri = uri
@@ -34,6 +35,8 @@ class Request:
         self.uriparams = uriparams if uriparams else {}
         self.stage = stage
         self.stage_vars = stage_vars if stage_vars else {}
+        # the API Gateway resource, when it differs from the requested uri
+        self.resource = resource if resource else uri
 
     def prepare(self, version: str) -> dict:
         req: Dict[str, Any] = {}
@@ -41,12 +44,18 @@ class Request:
         headers = self.headers.copy()
 
         path = self.uri.format(**self.uriparams)
+        if self.resource == "$default":
+            route_key = self.resource
+        else:
+            route_key = f"{self.method} {self.resource}"
+
         if version == "2.0":
             req = {
                 "version": "2.0",
-                "routeKey": f"{self.method} {self.uri}",
+                "routeKey": route_key,
                 "rawPath": path,
                 "rawQueryString": urllib.parse.urlencode(self.params),
+                "queryStringParameters": self.params if self.params else None,
                 "cookies": self.cookies,
                 "headers": headers,
                 "requestContext": {
@@ -62,7 +71,7 @@ class Request:
                         "userAgent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:74.0) Gecko/20100101 Firefox/74.0",
                     },
                     # "requestId": "KVFi9iMHSwMEKMw=",
-                    "routeKey": f"{self.method} {self.uri}",
+                    "routeKey": route_key,
                     "stage": self.stage,
                     # "time": "01/Apr/2020:22:58:01 +0000",
                     # "timeEpoch": 1585781881243,
@@ -93,11 +102,11 @@ class Request:
                     # "userAgent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_11_6) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/52.0.2743.82 Safari/537.36 OPR/39.0.2256.48",
                     # "user": "",
                     # },
-                    "resourcePath": self.uri,
+                    "resourcePath": self.resource,
                     "httpMethod": self.method,
                     # "apiId": "wt6mne2s9k",
                 },
-                "resource": self.uri,
+                "resource": self.resource,
                 "httpMethod": self.method,
                 "queryStringParameters": self.params,
                 "stageVariables": self.stage_vars,
@@ -157,6 +166,37 @@ class Response:
         return self._json_body
 
 
+class StreamWriter:
+    """A stand-in for the Lambda response stream that records each write."""
+
+    def __init__(self) -> None:
+        self.writes: List[bytes] = []
+        self.flushes = 0
+
+    def write(self, data: bytes) -> int:
+        self.writes.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        self.flushes += 1
+
+    def getvalue(self) -> bytes:
+        return b"".join(self.writes)
+
+    def response(self, request: Request) -> Response:
+        prelude, _, body = self.getvalue().partition(b"\x00" * 8)
+        data = json.loads(prelude)
+        content_type = CaseInsensitiveDict(data["headers"]).get("content-type", "")
+        if content_type.startswith(
+            tuple(NON_BINARY_MIME_TYPES)
+        ) or content_type.startswith("text/"):
+            data["body"] = body.decode("utf-8")
+        else:
+            data["body"] = body
+            data["isBase64Encoded"] = True
+        return Response(request, data)
+
+
 class BaseClient:
     def __init__(self, version: str = "1.0") -> None:
         self.version = version
@@ -190,9 +230,12 @@ class HandlerClient(BaseClient):
         version: str = "1.0",
         user_agent: str = "Mozilla/5.0",
         host: Optional[str] = None,
+        stream: bool = False,
     ) -> None:
         super().__init__(version=version)
         self.handler = handler
+        # send requests through Application.stream and a StreamWriter
+        self.stream = stream
         self.user_agent = user_agent
         self.host = host
         self.session: Dict[str, Any] = {}
@@ -209,6 +252,12 @@ class HandlerClient(BaseClient):
 
         request = Request(method, route, headers=headers, **kwargs)
         prepared = request.prepare(self.version)
+        if self.stream:
+            writer = StreamWriter()
+            self.handler.stream(prepared, self.lambda_context, writer)
+            response = writer.response(request)
+            response.writer = writer
+            return response
         response = self.handler(prepared, self.lambda_context)
         return Response(request, response)
 
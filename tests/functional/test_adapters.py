@@ -0,0 +1,262 @@
+import asyncio
+import io
+import json
+from wsgiref.util import setup_testing_defaults
+
+import pytest
+
+from pitcher import Application, Request, Route
+from pitcher.adapters.asgi import ASGIAdapter
+from pitcher.adapters.wsgi import WSGIAdapter
+from pitcher.response import Response, StreamingResponse
+
+PNG = b"\x89PNG\r\n\x1a\n\xff"
+
+
+def echo(request: Request, app) -> dict:
+    return {
+        "method": request.method,
+        "path": request.path,
+        "query": dict(request.query),
+        "cookies": request.cookies,
+        "agent": request.headers.get("user-agent"),
+        "body": request.json_body(),
+    }
+
+
+def item(request: Request, app) -> dict:
+    return {"id": request.params["id"]}
+
+
+async def async_item(request: Request, app) -> dict:
+    return {"id": request.params["id"], "async": True}
+
+
+def image(request: Request, app) -> Response:
+    response = Response(200, PNG, content_type="image/png")
+    response.set_cookie("seen", "1")
+    return response
+
+
+def upload(request: Request, app) -> dict:
+    return {"binary": request.binary, "size": len(request.body)}
+
+
+def rows(request: Request, app) -> Response:
+    return StreamingResponse(
+        200, ({"n": n} for n in range(3)), content_type="application/x-ndjson"
+    )
+
+
+def build_app() -> Application:
+    return Application(
+        name="adapters",
+        base="api",
+        routes=[
+            Route("/echo", echo, methods=["GET", "POST"]),
+            Route("/items/{id:int}", item),
+            Route("/async/{id:int}", async_item),
+            Route("/image", image),
+            Route("/upload", upload, methods=["POST"]),
+            Route("/rows", rows),
+        ],
+    )
+
+
+def wsgi_request(app, method, path, query="", body=b"", headers=None):
+    environ = {
+        "REQUEST_METHOD": method,
+        "PATH_INFO": path,
+        "QUERY_STRING": query,
+        "wsgi.input": io.BytesIO(body),
+    }
+    if body:
+        environ["CONTENT_LENGTH"] = str(len(body))
+    for name, value in (headers or {}).items():
+        if name.lower() == "content-type":
+            environ["CONTENT_TYPE"] = value
+        else:
+            environ["HTTP_" + name.upper().replace("-", "_")] = value
+    setup_testing_defaults(environ)
+
+    started = {}
+
+    def start_response(status, headers):
+        started["status"] = status
+        started["headers"] = headers
+
+    chunks = list(WSGIAdapter(app)(environ, start_response))
+    status = int(started["status"].split()[0])
+    return status, dict((k.lower(), v) for k, v in started["headers"]), chunks
+
+
+def asgi_request(
+    app, method, path, query="", body=b"", headers=None, threadpool=True, root_path=""
+):
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "root_path": root_path,
+        "query_string": query.encode(),
+        "headers": [
+            (name.lower().encode(), value.encode())
+            for name, value in (
+                headers.items() if isinstance(headers, dict) else headers or []
+            )
+        ],
+    }
+    # the body arrives in two messages
+    messages = [
+        {"type": "http.request", "body": body[:3], "more_body": True},
+        {"type": "http.request", "body": body[3:], "more_body": False},
+    ]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(ASGIAdapter(app, threadpool=threadpool)(scope, receive, send))
+
+    start, *bodies = sent
+    headers = dict((k.decode(), v.decode()) for k, v in start["headers"])
+    chunks = [message["body"] for message in bodies if message["body"]]
+    assert not bodies[-1].get("more_body")
+    return start["status"], headers, chunks
+
+
+def asgi_request_inline(app, method, path, **kwargs):
+    return asgi_request(app, method, path, threadpool=False, **kwargs)
+
+
+@pytest.fixture(
+    params=[wsgi_request, asgi_request, asgi_request_inline],
+    ids=["wsgi", "asgi", "asgi-inline"],
+)
+def request_through(request):
+    return request.param
+
+
+def test_json(request_through):
+    app = build_app()
+    status, headers, chunks = request_through(
+        app,
+        "POST",
+        "/api/echo",
+        query="a=1&a=2",
+        body=b'{"hello": "world"}',
+        headers={
+            "Content-Type": "application/json",
+            "User-Agent": "tests",
+            "Cookie": "a=1; b=2",
+        },
+    )
+
+    assert status == 200
+    assert headers["content-type"] == "application/json"
+    assert int(headers["content-length"]) == len(b"".join(chunks))
+    assert json.loads(b"".join(chunks)) == {
+        "method": "POST",
+        "path": "/api/echo",
+        "query": {"a": "1,2"},
+        "cookies": ["a=1", "b=2"],
+        "agent": "tests",
+        "body": {"hello": "world"},
+    }
+
+
+@pytest.mark.parametrize("threadpool", [True, False])
+def test_asgi_repeated_cookie_headers(threadpool):
+    app = build_app()
+    status, headers, chunks = asgi_request(
+        app,
+        "GET",
+        "/api/echo",
+        headers=[("cookie", "a=1"), ("cookie", "b=2; c=3"), ("x-tag", "a")],
+        threadpool=threadpool,
+    )
+
+    assert status == 200
+    assert json.loads(b"".join(chunks))["cookies"] == ["a=1", "b=2", "c=3"]
+
+
+def test_asgi_root_path():
+    app = build_app()
+    status, headers, chunks = asgi_request(app, "GET", "/api/echo", root_path="/api")
+
+    assert status == 200
+    assert json.loads(b"".join(chunks))["path"] == "/api/echo"
+
+
+@pytest.mark.parametrize(
+    "path, status, expected",
+    [
+        ("/api/items/42", 200, {"id": 42}),
+        ("/api/async/7", 200, {"id": 7, "async": True}),
+        ("/api/items/x", 404, None),
+    ],
+)
+def test_routing(request_through, path, status, expected):
+    response_status, _, chunks = request_through(build_app(), "GET", path)
+
+    assert response_status == status
+    if expected is not None:
+        assert json.loads(b"".join(chunks)) == expected
+
+
+def test_binary(request_through):
+    app = build_app()
+
+    status, headers, chunks = request_through(app, "GET", "/api/image")
+    assert status == 200
+    assert chunks == [PNG]
+    assert headers["content-type"] == "image/png"
+    assert headers["set-cookie"].startswith("seen=1")
+
+    status, _, chunks = request_through(
+        app,
+        "POST",
+        "/api/upload",
+        body=PNG,
+        headers={"Content-Type": "application/octet-stream"},
+    )
+    assert json.loads(b"".join(chunks)) == {"binary": True, "size": len(PNG)}
+
+
+def test_streaming(request_through):
+    status, headers, chunks = request_through(build_app(), "GET", "/api/rows")
+
+    assert status == 200
+    assert "content-length" not in headers
+    assert headers["content-type"] == "application/x-ndjson"
+    assert b"".join(chunks) == b'{"n": 0}\n{"n": 1}\n{"n": 2}\n'
+
+
+def test_on_invocation(request_through):
+    events = []
+    app = build_app()
+    app.on_invocation = [lambda event, context, app: events.append(event)]
+
+    request_through(app, "GET", "/api/items/1")
+
+    [event] = events
+    assert "REQUEST_METHOD" in event or event["type"] == "http"
+
+
+def test_asgi_lifespan():
+    app = build_app()
+    messages = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message["type"])
+
+    asyncio.run(ASGIAdapter(app)({"type": "lifespan"}, receive, send))
+
+    assert sent == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
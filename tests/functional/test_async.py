@@ -0,0 +1,153 @@
+import asyncio
+import time
+
+import pytest
+
+from pitcher import Application, Middleware, Request, Route
+from pitcher.concurrency import is_async_callable
+from pitcher.exceptions import BadRequest
+from pitcher.middleware import BaseMiddleware
+from pitcher.response import Response
+from tests.client import HandlerClient
+from tests.client import Request as ClientRequest
+
+
+class AsyncHeaderMiddleware(BaseMiddleware):
+    def __init__(self, next_func, name: str) -> None:
+        super().__init__(next_func)
+        self.name = name
+
+    async def __call__(self, request: Request, app) -> Response:
+        if request.headers.get("x-reject") == self.name:
+            raise BadRequest(f"rejected by {self.name}")
+        response = await super().__call__(request, app)
+        response.set_header(f"X-{self.name}", "async")
+        return response
+
+
+class SyncHeaderMiddleware(BaseMiddleware):
+    def __init__(self, next_func, name: str) -> None:
+        super().__init__(next_func)
+        self.name = name
+
+    def __call__(self, request: Request, app) -> Response:
+        response = super().__call__(request, app)
+        response.set_header(f"X-{self.name}", "sync")
+        return response
+
+
+def test_is_async_callable():
+    async def view(request, app):
+        pass
+
+    assert is_async_callable(view)
+    assert is_async_callable(AsyncHeaderMiddleware)
+    assert not is_async_callable(SyncHeaderMiddleware)
+    assert not is_async_callable(lambda request, app: None)
+
+
+@pytest.mark.parametrize("version", [("1.0"), ("2.0")])
+def test_async_view(version):
+    loops = set()
+
+    async def fetch(delay: float) -> float:
+        await asyncio.sleep(delay)
+        return delay
+
+    async def aggregate(request: Request, app) -> dict:
+        loops.add(id(asyncio.get_running_loop()))
+        results = await asyncio.gather(fetch(0.1), fetch(0.1), fetch(0.1))
+        return {"results": results}
+
+    app = Application(name="hello", routes=[Route("/aggregate", aggregate)])
+
+    client = HandlerClient(app, version=version)
+
+    start = time.perf_counter()
+    response = client.get("/aggregate")
+    elapsed = time.perf_counter() - start
+
+    assert response.status_code == 200
+    assert response.json() == {"results": [0.1, 0.1, 0.1]}
+    assert elapsed < 0.25
+
+    client.get("/aggregate")
+    assert len(loops) == 1
+
+
+@pytest.mark.parametrize(
+    "middleware",
+    [
+        ["A", "B", "C"],
+        [("A", "sync"), "B", ("C", "sync")],
+        ["A", ("B", "sync"), "C"],
+        [("A", "sync"), ("B", "sync"), ("C", "sync")],
+    ],
+)
+@pytest.mark.parametrize("view_is_async", [True, False])
+def test_mixed_middleware(middleware, view_is_async):
+    async def async_hello(request: Request, app) -> dict:
+        await asyncio.sleep(0)
+        return {"hello": "world"}
+
+    def sync_hello(request: Request, app) -> dict:
+        return {"hello": "world"}
+
+    stack = []
+    expected = {}
+    for layer in middleware:
+        name, kind = layer if isinstance(layer, tuple) else (layer, "async")
+        cls = SyncHeaderMiddleware if kind == "sync" else AsyncHeaderMiddleware
+        stack.append(Middleware(cls, name=name))
+        expected[f"X-{name}"] = kind
+
+    view = async_hello if view_is_async else sync_hello
+    app = Application(name="hello", routes=[Route("/hello", view)], middleware=stack)
+
+    client = HandlerClient(app, version="2.0")
+
+    response = client.get("/hello")
+    assert response.status_code == 200
+    assert response.json() == {"hello": "world"}
+    for name, value in expected.items():
+        assert response.headers[name] == value
+
+
+def test_async_middleware_exception():
+    async def hello(request: Request, app) -> dict:
+        return {"hello": "world"}
+
+    app = Application(
+        name="hello",
+        routes=[Route("/hello", hello)],
+        middleware=[
+            Middleware(SyncHeaderMiddleware, name="A"),
+            Middleware(AsyncHeaderMiddleware, name="B"),
+        ],
+    )
+
+    client = HandlerClient(app, version="2.0")
+
+    response = client.get("/hello", headers={"X-Reject": "B"})
+    assert response.status_code == 400
+    assert response.text == "rejected by B"
+
+
+def test_async_batch():
+    async def item(request: Request, app) -> dict:
+        await asyncio.sleep(0.1)
+        return {"id": request.params["id"]}
+
+    app = Application(name="hello", routes=[Route("/items/{id}", item)])
+
+    events = [
+        ClientRequest("GET", "/items/{id}", uriparams={"id": str(i)}).prepare("2.0")
+        for i in range(4)
+    ]
+
+    start = time.perf_counter()
+    results = app.handle_batch(events, None, max_workers=4)
+    elapsed = time.perf_counter() - start
+
+    assert [result["statusCode"] for result in results] == [200] * 4
+    assert elapsed < 0.3
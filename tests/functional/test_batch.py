@@ -0,0 +1,93 @@
+import threading
+import time
+
+import pytest
+
+from pitcher import Application, Request, Route
+from pitcher.exceptions import NotFound
+from tests.client import HandlerClient
+from tests.client import Request as ClientRequest
+from tests.client import Response as ClientResponse
+
+
+def batch(app, requests, version, **kwargs):
+    client = HandlerClient(app, version=version)
+    events = [request.prepare(version) for request in requests]
+    results = app.handle_batch(events, client.lambda_context, **kwargs)
+    return [
+        ClientResponse(request, result) for request, result in zip(requests, results)
+    ]
+
+
+@pytest.mark.parametrize("version", [("1.0"), ("2.0")])
+@pytest.mark.parametrize("max_workers", [None, 4])
+def test_handle_batch(version, max_workers):
+    invocations = []
+
+    def on_invocation(event, context, app):
+        invocations.append(event.get("pathParameters"))
+
+    def item(request: Request, app) -> dict:
+        item_id = request.params["id"]
+        if item_id == "2":
+            raise ValueError("broken item")
+        if item_id == "3":
+            raise NotFound()
+        # finish out of order when run concurrently
+        time.sleep(0.01 * (5 - int(item_id)))
+        return {"id": item_id}
+
+    app = Application(
+        name="hello",
+        routes=[Route("/items/{id}", item)],
+        on_invocation=[on_invocation],
+    )
+
+    requests = [
+        ClientRequest("GET", "/items/{id}", uriparams={"id": str(i)}) for i in range(5)
+    ]
+
+    responses = batch(app, requests, version, max_workers=max_workers)
+
+    assert invocations == [{"id": str(i)} for i in range(5)]
+    assert [response.status_code for response in responses] == [
+        200,
+        200,
+        500,
+        404,
+        200,
+    ]
+    assert responses[0].json() == {"id": "0"}
+    assert responses[1].json() == {"id": "1"}
+    assert responses[4].json() == {"id": "4"}
+
+
+def test_handle_batch_isolates_malformed_events():
+    def hello(request: Request, app) -> dict:
+        return {"hello": "world"}
+
+    app = Application(name="hello", routes=[Route("/hello", hello)])
+    event = ClientRequest("GET", "/hello").prepare("2.0")
+
+    results = app.handle_batch([event, None, event], None)
+
+    assert [result["statusCode"] for result in results] == [200, 500, 200]
+
+
+def test_handle_batch_reuses_thread_pool():
+    threads = set()
+
+    def hello(request: Request, app) -> dict:
+        threads.add(threading.current_thread().name)
+        return {"hello": "world"}
+
+    app = Application(name="hello", routes=[Route("/hello", hello)])
+    events = [ClientRequest("GET", "/hello").prepare("2.0") for _ in range(8)]
+
+    app.handle_batch(events, None, max_workers=2)
+    executor = app._executor
+    app.handle_batch(events, None, max_workers=2)
+
+    assert app._executor is executor
+    assert len(threads) <= 2
+    assert all(name.startswith("pitcher-batch") for name in threads)
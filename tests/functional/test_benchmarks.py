@@ -0,0 +1,41 @@
+import pytest
+
+from benchmarks.corpus import events
+from benchmarks.suite import benchmarks, build_app, compare, run_suite
+
+
+def test_corpus_events():
+    app = build_app()
+
+    for name, event in events().items():
+        response = app(event, None)
+        assert response["statusCode"] in (200, 201), name
+
+
+@pytest.mark.parametrize("benchmark", benchmarks(), ids=lambda b: b.name)
+def test_benchmarks_run(benchmark):
+    benchmark.setup(2)()
+
+
+def test_run_suite():
+    [benchmark] = [b for b in benchmarks() if b.name == "e2e.small_get.v2"]
+
+    results = run_suite([benchmark], repeat=2, min_time=0.001, verbose=False)
+
+    result = results["benchmarks"]["e2e.small_get.v2"]
+    assert len(result["samples"]) == 2
+    assert result["min"] <= result["median"]
+    assert results["metadata"]["python"]
+
+
+def test_compare():
+    def results(**medians):
+        return {"benchmarks": {k: {"median": v} for k, v in medians.items()}}
+
+    comparisons, regressions = compare(
+        results(a=100, b=100, c=100), results(a=105, b=120, d=100), threshold=0.1
+    )
+
+    assert [c.name for c in comparisons] == ["a", "b"]
+    assert [c.name for c in regressions] == ["b"]
+    assert regressions[0].change == pytest.approx(0.2)
@@ -0,0 +1,227 @@
+from datetime import datetime
+
+import pytest
+
+from pitcher import Application, Request, Route
+from pitcher import cache
+from pitcher.cache import cache_response, conditional
+from pitcher.response import RawJSONResponse, Response
+from tests.client import HandlerClient
+
+
+@pytest.mark.parametrize(
+    "body", [('{"hello": "world"}'), (b'{"hello": "world"}')],
+)
+def test_raw_json_response(body):
+    def hello(request: Request, app) -> Response:
+        return RawJSONResponse(200, body)
+
+    app = Application(name="hello", routes=[Route("/hello", hello)])
+
+    client = HandlerClient(app, version="2.0")
+
+    response = client.get("/hello")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.body == '{"hello": "world"}'
+
+
+def test_cache_response():
+    calls = []
+
+    @cache_response(ttl=60, query=["page"])
+    def hello(request: Request, app) -> Response:
+        calls.append(request.params["name"])
+        response = Response(200, {"hello": request.params["name"]})
+        response.vary("Accept-Language")
+        return response
+
+    app = Application(
+        name="hello", routes=[Route("/hello/{name}", hello, methods=["GET", "POST"])]
+    )
+
+    client = HandlerClient(app, version="2.0")
+
+    for _ in range(3):
+        response = client.get("/hello/{name}", uriparams={"name": "world"})
+        assert response.status_code == 200
+        assert response.json() == {"hello": "world"}
+        assert response.headers["vary"] == "Accept-Language"
+
+    assert calls == ["world"]
+
+    client.get("/hello/{name}", uriparams={"name": "world"}, params={"page": "2"})
+    client.get("/hello/{name}", uriparams={"name": "world"}, params={"other": "2"})
+    client.get("/hello/{name}", uriparams={"name": "cat"})
+    client.post("/hello/{name}", uriparams={"name": "cat"})
+
+    assert calls == ["world", "world", "cat", "cat"]
+    assert len(hello.cache) == 3
+
+
+def test_cache_response_expiry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache, "monotonic", lambda: now[0])
+    calls = []
+
+    @cache_response(ttl=10)
+    def hello(request: Request, app) -> dict:
+        calls.append(1)
+        return {"hello": "world"}
+
+    app = Application(name="hello", routes=[Route("/hello", hello)])
+
+    client = HandlerClient(app, version="2.0")
+
+    client.get("/hello")
+    now[0] += 9
+    client.get("/hello")
+    assert len(calls) == 1
+
+    now[0] += 1
+    response = client.get("/hello")
+    assert len(calls) == 2
+    assert response.json() == {"hello": "world"}
+
+
+def test_cache_response_eviction():
+    calls = []
+
+    @cache_response(maxsize=2)
+    def hello(request: Request, app) -> dict:
+        calls.append(request.params["name"])
+        return {"hello": request.params["name"]}
+
+    app = Application(name="hello", routes=[Route("/hello/{name}", hello)])
+
+    client = HandlerClient(app, version="2.0")
+
+    for name in ["a", "b", "a", "c", "a", "b"]:
+        client.get("/hello/{name}", uriparams={"name": name})
+
+    assert calls == ["a", "b", "c", "b"]
+
+
+@pytest.mark.parametrize(
+    "response",
+    [
+        (Response(404, {"error": "not found"})),
+        (Response(200, b"binary", content_type="image/png")),
+        (Response(204)),
+    ],
+)
+def test_cache_response_skipped(response):
+    calls = []
+
+    @cache_response()
+    def hello(request: Request, app) -> Response:
+        calls.append(1)
+        return response
+
+    app = Application(name="hello", routes=[Route("/hello", hello)])
+
+    client = HandlerClient(app, version="2.0")
+
+    client.get("/hello")
+    client.get("/hello")
+
+    assert len(calls) == 2
+    assert len(hello.cache) == 0
+
+
+def test_cache_response_with_cookies():
+    calls = []
+
+    @cache_response()
+    def hello(request: Request, app) -> Response:
+        calls.append(1)
+        response = Response(200, {"hello": "world"})
+        response.set_cookie("Session", "1")
+        return response
+
+    app = Application(name="hello", routes=[Route("/hello", hello)])
+
+    client = HandlerClient(app, version="2.0")
+
+    client.get("/hello")
+    response = client.get("/hello")
+
+    assert len(calls) == 2
+    assert response.cookies
+
+
+@pytest.mark.parametrize(
+    "headers, status",
+    [
+        ({}, 200),
+        ({"If-None-Match": '"v2"'}, 304),
+        ({"If-None-Match": "*"}, 304),
+        ({"If-None-Match": '"v1"'}, 200),
+        ({"If-Modified-Since": "Wed, 01 Apr 2020 22:58:01 GMT"}, 304),
+        ({"If-Modified-Since": "Wed, 01 Apr 2020 22:00:00 GMT"}, 200),
+        ({"If-None-Match": '"v1"', "If-Modified-Since": "Thu, 02 Apr 2020"}, 200),
+    ],
+)
+def test_conditional(headers, status):
+    calls = []
+
+    def version(request: Request, app) -> str:
+        return "v2"
+
+    def updated_at(request: Request, app) -> datetime:
+        return datetime(2020, 4, 1, 22, 58, 1, 500)
+
+    @conditional(etag=version, last_modified=updated_at)
+    def hello(request: Request, app) -> dict:
+        calls.append(1)
+        return {"hello": "world"}
+
+    app = Application(name="hello", routes=[Route("/hello", hello)])
+
+    client = HandlerClient(app, version="2.0")
+
+    response = client.get("/hello", headers=headers)
+
+    assert response.status_code == status
+    assert response.headers["ETag"] == '"v2"'
+    assert response.headers["Last-Modified"] == "Wed, 01 Apr 2020 22:58:01 GMT"
+    assert len(calls) == (1 if status == 200 else 0)
+    if status == 304:
+        assert response.body is None
+
+
+def test_async_views():
+    calls = []
+
+    @cache_response(ttl=60)
+    async def cached(request: Request, app) -> dict:
+        calls.append("cached")
+        return {"hello": request.params["name"]}
+
+    @conditional(etag=lambda request, app: "v2")
+    async def current(request: Request, app) -> dict:
+        calls.append("current")
+        return {"hello": "world"}
+
+    app = Application(
+        name="hello",
+        routes=[Route("/cached/{name}", cached), Route("/current", current)],
+    )
+
+    client = HandlerClient(app, version="2.0")
+
+    for _ in range(2):
+        response = client.get("/cached/{name}", uriparams={"name": "world"})
+        assert response.status_code == 200
+        assert response.json() == {"hello": "world"}
+    assert len(cached.cache) == 1
+
+    response = client.get("/current")
+    assert response.json() == {"hello": "world"}
+    assert response.headers["ETag"] == '"v2"'
+
+    response = client.get("/current", headers={"If-None-Match": '"v2"'})
+    assert response.status_code == 304
+
+    assert calls == ["cached", "current"]
@@ -0,0 +1,172 @@
+import io
+
+import pytest
+
+from pitcher import Application, Request, Response, Route
+from pitcher.exceptions import APIException, BadRequest
+from pitcher.forms import parse_form, parse_options_header
+from tests.client import HandlerClient
+
+BOUNDARY = "----pitcherBoundary7MA4YWxkTrZu0gW"
+CONTENT_TYPE = f"multipart/form-data; boundary={BOUNDARY}"
+IMAGE = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 64
+
+
+def multipart(*parts, preamble=b"", epilogue=b"\r\n"):
+    body = preamble
+    for headers, content in parts:
+        body += f"--{BOUNDARY}\r\n".encode()
+        body += "".join(f"{k}: {v}\r\n" for k, v in headers.items()).encode()
+        body += b"\r\n" + content + b"\r\n"
+    return body + f"--{BOUNDARY}--".encode() + epilogue
+
+
+def field(name, value):
+    return {"Content-Disposition": f'form-data; name="{name}"'}, value.encode()
+
+
+def upload(name, filename, content, content_type="image/png"):
+    return (
+        {
+            "Content-Disposition": f'form-data; name="{name}"; filename="{filename}"',
+            "Content-Type": content_type,
+        },
+        content,
+    )
+
+
+BODY = multipart(
+    field("title", "Hello, wörld"),
+    field("tag", "a"),
+    field("tag", "b\r\n--not-a-boundary"),
+    upload("image", "photo.png", IMAGE),
+    upload("empty", "", b"", "application/octet-stream"),
+    preamble=b"ignored preamble\r\n",
+)
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("text/html", ("text/html", {})),
+        (
+            "Multipart/Form-Data; Boundary=abc; charset=utf-8",
+            ("multipart/form-data", {"boundary": "abc", "charset": "utf-8"}),
+        ),
+        (
+            'form-data; name="a;b"; filename="say \\"hi\\".txt"',
+            ("form-data", {"name": "a;b", "filename": 'say "hi".txt'}),
+        ),
+        (
+            "form-data; filename=\"euro.txt\"; filename*=UTF-8''%E2%82%AC.txt",
+            ("form-data", {"filename": "€.txt"}),
+        ),
+    ],
+)
+def test_parse_options_header(value, expected):
+    assert parse_options_header(value) == expected
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 64 * 1024])
+def test_multipart(chunk_size):
+    fields, files = parse_form(
+        io.BytesIO(BODY), CONTENT_TYPE, spool_size=1024, chunk_size=chunk_size
+    )
+
+    assert fields == {"title": "Hello, wörld", "tag": "b\r\n--not-a-boundary"}
+    assert fields.getlist("tag") == ["a", "b\r\n--not-a-boundary"]
+
+    image = files["image"]
+    assert image.filename == "photo.png"
+    assert image.content_type == "image/png"
+    assert image.size == len(IMAGE)
+    assert image.read() == IMAGE
+    # past the spool size the upload is written to disk
+    assert image.file._rolled
+
+    empty = files["empty"]
+    assert empty.filename == ""
+    assert empty.read() == b""
+
+
+def test_urlencoded():
+    body = b"name=J%C3%BCrgen+Smith&tag=a&tag=b&empty=&flag&" + b"x=" + b"y" * 1000
+
+    fields, files = parse_form(
+        io.BytesIO(body), "application/x-www-form-urlencoded", chunk_size=7
+    )
+
+    assert fields["name"] == "Jürgen Smith"
+    assert fields.getlist("tag") == ["a", "b"]
+    assert fields["empty"] == ""
+    assert fields["flag"] == ""
+    assert fields["x"] == "y" * 1000
+    assert files == {}
+
+
+@pytest.mark.parametrize(
+    "content_type, body, error",
+    [
+        ("multipart/form-data", BODY, BadRequest),
+        (CONTENT_TYPE, BODY[:-30], BadRequest),
+        (CONTENT_TYPE, multipart(({"X-Part": "1"}, b"data")), BadRequest),
+        (CONTENT_TYPE, multipart(({"Broken header": ""}, b"data")), BadRequest),
+        (CONTENT_TYPE, multipart(field("big", "x" * 2000)), APIException),
+        (
+            CONTENT_TYPE,
+            f"--{BOUNDARY}\r\n".encode() + b"X: " + b"x" * 20000,
+            BadRequest,
+        ),
+        ("application/x-www-form-urlencoded", b"x=" + b"y" * 2000, APIException),
+    ],
+)
+def test_malformed(content_type, body, error):
+    with pytest.raises(error) as info:
+        parse_form(io.BytesIO(body), content_type, max_field_size=1000)
+
+    assert info.value.status_code in (400, 413)
+
+
+def test_other_content_types():
+    assert parse_form(io.BytesIO(b"{}"), "application/json") == ({}, {})
+
+
+@pytest.mark.parametrize("version", [("1.0"), ("2.0")])
+def test_request_form(version):
+    def submit(request: Request, app) -> Response:
+        files = request.files()
+        return Response(
+            200,
+            {
+                "fields": dict(request.form()),
+                "files": {
+                    name: [upload.filename, upload.size]
+                    for name, upload in files.items()
+                },
+                "same": request.form() is request.form(),
+            },
+        )
+
+    app = Application(name="forms", routes=[Route("/submit", submit, methods=["POST"])])
+
+    client = HandlerClient(app, version=version)
+
+    response = client.post("/submit", data=BODY, headers={"content-type": CONTENT_TYPE})
+    assert response.status_code == 200
+    assert response.json() == {
+        "fields": {"title": "Hello, wörld", "tag": "b\r\n--not-a-boundary"},
+        "files": {"image": ["photo.png", len(IMAGE)], "empty": ["", 0]},
+        "same": True,
+    }
+
+    response = client.post(
+        "/submit",
+        data="title=hello",
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+    assert response.json()["fields"] == {"title": "hello"}
+
+    response = client.post(
+        "/submit", data=BODY[:-30], headers={"content-type": CONTENT_TYPE}
+    )
+    assert response.status_code == 400
@@ -0,0 +1,56 @@
+import subprocess
+import sys
+
+import pytest
+
+import pitcher
+
+# heavy modules that must only be imported when a feature needs them
+DEFERRED_MODULES = [
+    "asyncio",
+    "base64",
+    "concurrent.futures",
+    "dataclasses",
+    "decimal",
+    "email.utils",
+    "hashlib",
+    "inspect",
+    "urllib.parse",
+    "uuid",
+]
+
+
+def test_import_defers_heavy_modules():
+    code = (
+        "import sys; import pitcher; "
+        "from pitcher import Application, Middleware, Request, Response, Route; "
+        "Application(name='hello', routes=[Route('/hello', lambda r, a: {})]); "
+        "print('\\n'.join(sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    modules = set(result.stdout.split())
+
+    assert "pitcher.application" in modules
+    assert not modules & set(DEFERRED_MODULES)
+
+
+@pytest.mark.parametrize(
+    "name, module",
+    [
+        ("Application", "pitcher.application"),
+        ("Middleware", "pitcher.middleware"),
+        ("Request", "pitcher.request"),
+        ("Response", "pitcher.response"),
+        ("Route", "pitcher.router"),
+    ],
+)
+def test_lazy_attributes(name, module):
+    assert getattr(pitcher, name) is getattr(sys.modules[module], name)
+    assert name in dir(pitcher)
+
+
+def test_unknown_attribute():
+    with pytest.raises(AttributeError):
+        pitcher.Unknown
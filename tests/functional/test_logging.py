@@ -0,0 +1,141 @@
+import io
+import json
+import logging
+
+import pytest
+
+from pitcher import Application, Request, Route
+from pitcher.log import JSONFormatter, current_request, log
+from tests.client import HandlerClient
+
+
+class KeywordLogger:
+    """Logs like loguru, formatting messages with keyword arguments."""
+
+    def __init__(self) -> None:
+        self.messages = []
+
+    def debug(self, message, **kwargs):
+        self.messages.append((message.format(**kwargs), kwargs))
+
+    info = debug
+
+
+def hello(request: Request, app) -> dict:
+    app.logger.info("hello %s", request.params["name"])
+    return {"hello": request.params["name"]}
+
+
+@pytest.fixture
+def json_logger():
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(JSONFormatter(fields={"service": "hello"}))
+
+    logger = logging.getLogger("pitcher.tests.json")
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    yield logger, stream
+    logger.removeHandler(handler)
+
+
+def test_debug_logging(caplog):
+    app = Application(name="hello", routes=[Route("/hello/{name}", hello)])
+
+    with caplog.at_level(logging.DEBUG, logger="hello"):
+        response = HandlerClient(app, version="2.0").get(
+            "/hello/world", resource="/hello/{name}", uriparams={"name": "world"}
+        )
+
+    assert response.status_code == 200
+    [request_record] = [r for r in caplog.records if r.message.startswith("request")]
+    assert request_record.message == "request GET /hello/world"
+    assert request_record.context["route"] == "/hello/{name}"
+    assert "response status 200" in caplog.messages
+
+
+def test_debug_logging_checked_per_invocation():
+    logger = logging.getLogger("pitcher.tests.levels")
+    logger.setLevel(logging.INFO)
+
+    def enable_debug(event, context, app):
+        logger.setLevel(logging.DEBUG)
+
+    app = Application(
+        name="hello", routes=[Route("/hello/{name}", hello)], logger=logger
+    )
+    assert not app.debug_logging
+
+    app.on_invocation = [enable_debug]
+    HandlerClient(app).get("/hello/world")
+    assert app.debug_logging
+
+
+def test_json_formatter(json_logger):
+    logger, stream = json_logger
+
+    def fail(request: Request, app) -> dict:
+        raise ValueError("boom")
+
+    app = Application(
+        name="hello",
+        routes=[Route("/hello/{name}", hello), Route("/fail", fail)],
+        logger=logger,
+    )
+    client = HandlerClient(app)
+
+    client.get("/hello/world")
+    assert client.get("/fail").status_code == 500
+    logger.info("outside a request")
+
+    hello_line, error_line, outside_line = [
+        json.loads(line) for line in stream.getvalue().splitlines()
+    ]
+
+    assert hello_line["message"] == "hello world"
+    assert hello_line["level"] == "INFO"
+    assert hello_line["logger"] == "pitcher.tests.json"
+    assert hello_line["route"] == "/hello/{name}"
+    assert hello_line["request_id"]
+    assert hello_line["duration_ms"] >= 0
+    assert hello_line["service"] == "hello"
+
+    assert error_line["message"] == "request error"
+    assert error_line["exception"].endswith("ValueError: boom")
+
+    assert "request_id" not in outside_line
+    assert outside_line["service"] == "hello"
+    assert current_request.get() is None
+
+
+def test_log_keyword_logger():
+    logger = KeywordLogger()
+
+    log(logger, logging.DEBUG, "request GET /items/{id}", {"route": "/items/{id}"})
+    log(logger, logging.INFO, "no context")
+
+    assert logger.messages == [
+        ("request GET /items/{id}", {"context": {"route": "/items/{id}"}}),
+        ("no context", {}),
+    ]
+
+
+def test_keyword_logger_app():
+    logger = KeywordLogger()
+
+    def view(request: Request, app) -> dict:
+        return {}
+
+    app = Application(
+        name="hello", routes=[Route("/items/{id:int}", view)], logger=logger
+    )
+
+    response = HandlerClient(app, version="2.0").get(
+        "/items/x", resource="/items/{id}", uriparams={"id": "x"}
+    )
+
+    assert response.status_code == 404
+    messages = [message for message, _ in logger.messages]
+    assert "request GET /items/x" in messages
+    assert "id failed to convert 'x'" in messages
@@ -1,12 +1,24 @@
+import base64
+import gzip
+import json
+import re
+import zlib
+
 import pytest
 
 from pitcher import Application, Request, Route
+from pitcher import middleware as middleware_module
 from pitcher.middleware import (
     AllowedHostMiddleware,
+    BaseMiddleware,
+    CompressionMiddleware,
+    ConditionalGetMiddleware,
     CORSMiddleware,
+    HostIndex,
     Middleware,
     SecureHeadersMiddleware,
 )
+from pitcher.response import Response
 from tests.client import HandlerClient
 
 
@@ -41,6 +53,73 @@ def test_allowed_hosts(hosts, status):
     assert response.status_code == status
 
 
+@pytest.mark.parametrize(
+    "host, allowed",
+    [
+        ("api.example.com", True),
+        ("API.Example.com", True),
+        ("a.b.example.com", True),
+        ("example.com", True),
+        ("badexample.com", False),
+        ("example.com.evil.net", False),
+        ("tenant.io", True),
+        ("www.tenant.io", False),
+        ("", False),
+    ],
+)
+def test_host_index(host, allowed):
+    index = HostIndex(["*.example.com", "Tenant.io", ""])
+
+    assert index.size == 2
+    assert (host in index) is allowed
+
+
+def test_allowed_hosts_reload(tmp_path, monkeypatch):
+    def hello_world(request: Request, app) -> dict:
+        return {"message": "world"}
+
+    hosts_file = tmp_path / "hosts.txt"
+    hosts_file.write_text("# tenants\napi.tenant.io\n\n*.tenant.org  # all of them\n")
+    extra_hosts = ["api.example.com"]
+
+    app = Application(
+        name="hello",
+        routes=[Route("/hello", hello_world)],
+        middleware=[
+            Middleware(
+                AllowedHostMiddleware,
+                allowed_hosts=lambda: list(extra_hosts),
+                hosts_file=hosts_file,
+                reload_interval=60,
+            ),
+        ],
+    )
+    middleware = app.middleware_stack
+
+    client = HandlerClient(app)
+
+    def status(host):
+        return client.get("/hello", headers={"Host": f"{host}:443"}).status_code
+
+    assert status("api.example.com") == 200
+    assert status("api.tenant.io") == 200
+    assert status("www.tenant.org") == 200
+    assert status("new.example.com") == 400
+
+    extra_hosts.append("new.example.com")
+    hosts_file.write_text("api.tenant.io\n")
+    assert status("new.example.com") == 400
+
+    middleware.reload()
+    assert status("new.example.com") == 200
+    assert status("www.tenant.org") == 400
+
+    extra_hosts.remove("new.example.com")
+    now = middleware.next_reload
+    monkeypatch.setattr(middleware_module, "monotonic", lambda: now + 1)
+    assert status("new.example.com") == 400
+
+
 @pytest.mark.parametrize(
     "origin, cors_options, headers",
     [
@@ -253,6 +332,133 @@ def test_cors_preflight(
     assert response.headers == headers
 
 
+@pytest.mark.parametrize(
+    "origin, allowed",
+    [
+        ("https://app.example.com", True),
+        ("http://a.b.example.com", True),
+        ("app.example.com", True),
+        ("https://example.com", False),
+        ("https://app.example.com.evil.net", False),
+        ("https://review-42.preview.example.org", True),
+        ("http://review-42.preview.example.org", False),
+        ("https://static.example.net", True),
+    ],
+)
+def test_cors_origin_patterns(origin, allowed):
+    def hello_world(request: Request, app) -> dict:
+        return {"message": "world"}
+
+    app = Application(
+        name="hello",
+        routes=[Route("/hello", hello_world, methods=["ANY"])],
+        middleware=[
+            Middleware(
+                CORSMiddleware,
+                allow_origins=[
+                    "*.example.com",
+                    re.compile(r"https://\w+\.example\.net"),
+                ],
+                allow_origin_regex=r"https://review-\d+\.preview\.example\.org",
+            ),
+        ],
+    )
+
+    client = HandlerClient(app)
+
+    response = client.get("/hello", headers={"Origin": origin})
+    assert response.status_code == 200
+    assert response.headers.get("Access-Control-Allow-Origin") == (
+        origin if allowed else None
+    )
+
+    response = client.options("/hello", headers={"Origin": origin})
+    assert response.status_code == (200 if allowed else 400)
+
+
+@pytest.mark.parametrize(
+    "allow_headers, request_headers, status, allow_headers_header",
+    [
+        (
+            ["Authorization", "X-Request-Id"],
+            "authorization",
+            200,
+            "Authorization, X-Request-Id",
+        ),
+        (
+            ["Authorization", "X-Request-Id"],
+            "X-Request-ID, Authorization",
+            200,
+            "Authorization, X-Request-Id",
+        ),
+        (["Authorization"], "content-type, accept", 200, "Authorization"),
+        (["Authorization"], "authorization, x-api-key", 400, "Authorization"),
+        ([], "x-api-key", 400, None),
+        (["*"], "x-api-key, authorization", 200, "x-api-key, authorization"),
+    ],
+)
+def test_cors_preflight_request_headers(
+    allow_headers, request_headers, status, allow_headers_header
+):
+    def hello_world(request: Request, app) -> dict:
+        return {"message": "world"}
+
+    app = Application(
+        name="hello",
+        routes=[Route("/hello", hello_world, methods=["ANY"])],
+        middleware=[
+            Middleware(
+                CORSMiddleware,
+                allow_origins=["example.com"],
+                allow_headers=allow_headers,
+            ),
+        ],
+    )
+
+    client = HandlerClient(app)
+
+    response = client.options(
+        "/hello",
+        headers={
+            "Origin": "example.com",
+            "Access-Control-Request-Method": "GET",
+            "Access-Control-Request-Headers": request_headers,
+        },
+    )
+
+    assert response.status_code == status
+    assert response.headers.get("Access-Control-Allow-Headers") == allow_headers_header
+    if status == 400:
+        assert response.text == "CORS ERROR: headers"
+
+
+def test_cors_decision_cache():
+    def hello_world(request: Request, app) -> dict:
+        return {"message": "world"}
+
+    app = Application(
+        name="hello",
+        routes=[Route("/hello", hello_world, methods=["ANY"])],
+        middleware=[Middleware(CORSMiddleware, allow_origins=["example.com"])],
+    )
+    cors = app.middleware_stack
+
+    client = HandlerClient(app)
+
+    for _ in range(3):
+        response = client.get("/hello", headers={"Origin": "example.com"})
+        assert response.headers["Access-Control-Allow-Origin"] == "example.com"
+        response = client.options("/hello", headers={"Origin": "example.com"})
+        assert response.status_code == 200
+
+    assert cors.simple.cache_info().hits == 2
+    assert cors.simple.cache_info().currsize == 1
+    assert cors.preflight.cache_info().hits == 2
+    # cached header dicts are not shared with responses
+    assert cors.simple("example.com")[0]["Access-Control-Allow-Origin"] == "example.com"
+    assert "content-type" not in cors.preflight("example.com", "GET", None)[2]
+
+
 @pytest.mark.parametrize(
     "hosts,status,cors_options,headers",
     [
@@ -393,3 +599,282 @@ def test_secure_headers(options, headers):
 
     assert response.status_code == 200
     assert response.headers == headers
+
+
+class StateMiddleware(BaseMiddleware):
+    def __call__(self, request: Request, app) -> Response:
+        request.state.seen = True
+        return super().__call__(request, app)
+
+
+class CustomSecureHeadersMiddleware(SecureHeadersMiddleware):
+    def __call__(self, request: Request, app) -> Response:
+        response = super().__call__(request, app)
+        response.set_header("X-Custom", "custom")
+        return response
+
+
+@pytest.mark.parametrize("version", [("1.0"), ("2.0")])
+def test_compiled_middleware_stack(version):
+    def hello(request: Request, app) -> Response:
+        assert request.state.seen
+        response = Response(200, {"hello": "world"})
+        response.set_header("Referrer-Policy", "same-origin")
+        return response
+
+    app = Application(
+        name="hello",
+        routes=[Route("/hello", hello)],
+        middleware=[
+            Middleware(BaseMiddleware),
+            Middleware(SecureHeadersMiddleware, xss=False, hsts="max-age=60"),
+            Middleware(StateMiddleware),
+            Middleware(BaseMiddleware),
+            Middleware(SecureHeadersMiddleware, hsts=False, csp=True),
+        ],
+    )
+
+    # the router and StateMiddleware are left
+    assert app.call_depth == 2
+    assert app.default_headers == {
+        "X-XSS-Protection": "1; mode=block",
+        "X-Content-Type-Options": "nosniff",
+        "Content-Security-Policy": "script-src 'self'; object-src 'self'",
+        "Referrer-Policy": "no-referrer, strict-origin-when-cross-origin",
+        "Strict-Transport-Security": "max-age=60",
+    }
+
+    client = HandlerClient(app, version=version)
+
+    response = client.get("/hello")
+    assert response.status_code == 200
+    assert response.headers["Referrer-Policy"] == "same-origin"
+    assert response.headers["X-XSS-Protection"] == "1; mode=block"
+    assert response.headers["Strict-Transport-Security"] == "max-age=60"
+
+    # fused headers are added to error responses as well
+    response = client.get("/missing", resource="/missing")
+    assert response.status_code == 404
+    assert response.headers["X-Content-Type-Options"] == "nosniff"
+
+
+def test_compiled_middleware_stack_keeps_overridden_call():
+    def hello(request: Request, app) -> dict:
+        return {"hello": "world"}
+
+    app = Application(
+        name="hello",
+        routes=[Route("/hello", hello)],
+        middleware=[Middleware(CustomSecureHeadersMiddleware)],
+    )
+
+    assert app.call_depth == 2
+    assert app.default_headers == {}
+
+    response = HandlerClient(app).get("/hello")
+    assert response.headers["X-Custom"] == "custom"
+    assert response.headers["X-Content-Type-Options"] == "nosniff"
+
+
+ITEMS = [{"id": i, "name": f"item {i}"} for i in range(200)]
+
+
+@pytest.mark.parametrize("version", [("1.0"), ("2.0")])
+@pytest.mark.parametrize(
+    "accept_encoding, encoding",
+    [
+        ("gzip, deflate", "gzip"),
+        ("deflate", "deflate"),
+        ("gzip;q=0.5, deflate;q=0.8", "deflate"),
+        ("*", "gzip"),
+        ("gzip;q=0, *;q=0.1", "deflate"),
+        ("identity", None),
+        ("gzip;q=0", None),
+        ("", None),
+    ],
+)
+def test_compression(version, accept_encoding, encoding):
+    def hello(request: Request, app) -> list:
+        return ITEMS
+
+    app = Application(
+        name="hello",
+        routes=[Route("/hello", hello)],
+        middleware=[Middleware(CompressionMiddleware)],
+    )
+
+    client = HandlerClient(app, version=version)
+
+    response = client.get("/hello", headers={"Accept-Encoding": accept_encoding})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.headers["Vary"] == "Accept-Encoding"
+
+    if encoding is None:
+        assert not response.binary
+        assert "content-encoding" not in response.headers
+        assert json.loads(response.body) == ITEMS
+    else:
+        assert response.binary
+        assert response.headers["Content-Encoding"] == encoding
+        data = base64.b64decode(response.body)
+        if encoding == "gzip":
+            data = gzip.decompress(data)
+        else:
+            data = zlib.decompress(data)
+        assert json.loads(data) == ITEMS
+
+
+@pytest.mark.parametrize(
+    "body, content_type",
+    [({"hello": "world"}, "application/json"), (b"\x89PNG" * 1000, "image/png"),],
+)
+def test_compression_skipped(body, content_type):
+    def hello(request: Request, app) -> Response:
+        return Response(200, body, content_type=content_type)
+
+    app = Application(
+        name="hello",
+        routes=[Route("/hello", hello)],
+        middleware=[Middleware(CompressionMiddleware, minimum_size=100)],
+    )
+
+    client = HandlerClient(app, version="2.0")
+
+    response = client.get("/hello", headers={"Accept-Encoding": "gzip"})
+
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+    assert "vary" not in response.headers
+
+
+def test_compression_levels():
+    middleware = CompressionMiddleware(
+        lambda request, app: None, levels={"gzip": ((1024, 9), (None, 2))}
+    )
+
+    assert middleware.level("gzip", 100) == 9
+    assert middleware.level("gzip", 1024 * 1024) == 2
+    assert middleware.level("deflate", 100) == 6
+    assert middleware.level("deflate", 10 * 1024 * 1024) == 1
+
+
+def test_compression_brotli():
+    brotli = pytest.importorskip("brotli")
+
+    def hello(request: Request, app) -> list:
+        return ITEMS
+
+    app = Application(
+        name="hello",
+        routes=[Route("/hello", hello)],
+        middleware=[Middleware(CompressionMiddleware)],
+    )
+
+    client = HandlerClient(app, version="2.0")
+
+    response = client.get("/hello", headers={"Accept-Encoding": "gzip, br"})
+
+    assert response.headers["Content-Encoding"] == "br"
+    assert json.loads(brotli.decompress(base64.b64decode(response.body))) == ITEMS
+
+
+def test_compression_weakens_etag():
+    def hello(request: Request, app) -> list:
+        return ITEMS
+
+    app = Application(
+        name="hello",
+        routes=[Route("/hello", hello)],
+        middleware=[
+            Middleware(CompressionMiddleware),
+            Middleware(ConditionalGetMiddleware),
+        ],
+    )
+
+    client = HandlerClient(app, version="2.0")
+
+    response = client.get("/hello")
+    etag = response.headers["ETag"]
+    assert "content-encoding" not in response.headers
+    assert etag.startswith('"')
+
+    response = client.get("/hello", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["ETag"] == f"W/{etag}"
+
+    response = client.get(
+        "/hello", headers={"Accept-Encoding": "gzip", "If-None-Match": f"W/{etag}"}
+    )
+    assert response.status_code == 304
+
+
+@pytest.mark.parametrize("version", [("1.0"), ("2.0")])
+def test_conditional_get(version):
+    calls = []
+
+    def hello(request: Request, app) -> dict:
+        calls.append(1)
+        return {"hello": "world"}
+
+    app = Application(
+        name="hello",
+        routes=[Route("/hello", hello, methods=["GET", "POST"])],
+        middleware=[Middleware(ConditionalGetMiddleware)],
+    )
+
+    client = HandlerClient(app, version=version)
+
+    response = client.get("/hello")
+    etag = response.headers["ETag"]
+    assert response.status_code == 200
+    assert etag.startswith('"') and etag.endswith('"')
+    assert response.json() == {"hello": "world"}
+
+    response = client.get("/hello", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.body is None
+    assert response.headers == {"ETag": etag}
+
+    response = client.get("/hello", headers={"If-None-Match": f'"other", W/{etag}'})
+    assert response.status_code == 304
+
+    response = client.get("/hello", headers={"If-None-Match": '"other"'})
+    assert response.status_code == 200
+    assert response.json() == {"hello": "world"}
+
+    response = client.post("/hello", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert "etag" not in response.headers
+
+    assert len(calls) == 5
+
+
+@pytest.mark.parametrize(
+    "if_modified_since, status",
+    [
+        ("Wed, 01 Apr 2020 22:58:01 GMT", 304),
+        ("Thu, 02 Apr 2020 00:00:00 GMT", 304),
+        ("Wed, 01 Apr 2020 22:58:00 GMT", 200),
+        ("not a date", 200),
+    ],
+)
+def test_conditional_get_last_modified(if_modified_since, status):
+    def hello(request: Request, app) -> Response:
+        response = Response(200, {"hello": "world"})
+        response.set_header("Last-Modified", "Wed, 01 Apr 2020 22:58:01 GMT")
+        response.set_header("ETag", '"v1"')
+        return response
+
+    app = Application(
+        name="hello",
+        routes=[Route("/hello", hello)],
+        middleware=[Middleware(ConditionalGetMiddleware)],
+    )
+
+    client = HandlerClient(app, version="2.0")
+
+    response = client.get("/hello", headers={"If-Modified-Since": if_modified_since})
+    assert response.status_code == status
+    assert response.headers["ETag"] == '"v1"'
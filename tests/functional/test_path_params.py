@@ -1,6 +1,6 @@
 import pytest
 
-from pitcher import Application, Request, Route
+from pitcher import Application, Request, Route, converters
 from pitcher.response import Response
 from tests.client import HandlerClient
 
@@ -114,3 +114,85 @@ def test_invalid_param_route():
         )
 
         assert "Converter not found for param year" in str(excinfo.value)
+
+
+@pytest.mark.parametrize("version", [("1.0"), ("2.0")])
+def test_str_param(version):
+    def hello(request: Request, app) -> dict:
+        name = request.params["name"]
+        return {"name": name, "type": type(name).__name__}
+
+    app = Application(name="hello", routes=[Route("/hello/{name:str}", hello)])
+
+    client = HandlerClient(app, version=version)
+
+    response = client.get("/hello/{name}", uriparams={"name": "world"})
+
+    assert response.status_code == 200
+    assert response.json() == {"name": "world", "type": "str"}
+
+
+@pytest.mark.parametrize(
+    "value,status,expected",
+    [
+        ("01ARZ3NDEKTSV4RRFFQ69G5FAV", 200, "01arz3ndektsv4rrffq69g5fav"),
+        ("01ARZ3NDEKTSV4RRFFQ69G5FA", 404, None),
+        ("01ARZ3NDEKTSV4RRFFQ69G5FA!", 404, None),
+    ],
+)
+def test_registered_converter(value, status, expected, monkeypatch):
+    monkeypatch.setattr(converters, "CONVERTERS", dict(converters.CONVERTERS))
+
+    def is_ulid(value: str) -> bool:
+        return len(value) == 26 and value.isascii() and value.isalnum()
+
+    converters.register_converter("ulid", convert=str.lower, check=is_ulid)
+
+    def hello(request: Request, app) -> dict:
+        return {"id": request.params["id"]}
+
+    app = Application(name="hello", routes=[Route("/things/{id:ulid}", hello)])
+
+    client = HandlerClient(app, version="2.0")
+
+    response = client.get("/things/{id}", uriparams={"id": value})
+    assert response.status_code == status
+    if expected:
+        assert response.json() == {"id": expected}
+
+    response = client.get(f"/things/{value}", resource="$default")
+    assert response.status_code == status
+    if expected:
+        assert response.json() == {"id": expected}
+
+
+def test_registered_converter_without_check(monkeypatch):
+    monkeypatch.setattr(converters, "CONVERTERS", dict(converters.CONVERTERS))
+
+    def base62(value: str) -> int:
+        alphabet = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+        result = 0
+        for char in value:
+            result = result * 62 + alphabet.index(char)
+        return result
+
+    converters.register_converter("base62", base62)
+
+    def hello(request: Request, app) -> dict:
+        return {"id": request.params["id"]}
+
+    app = Application(name="hello", routes=[Route("/short/{id:base62}", hello)])
+
+    client = HandlerClient(app, version="2.0")
+
+    response = client.get("/short/{id}", uriparams={"id": "Zz"})
+    assert response.status_code == 200
+    assert response.json() == {"id": 35 * 62 + 61}
+
+    response = client.get("/short/{id}", uriparams={"id": "Z-z"})
+    assert response.status_code == 404
+
+
+def test_register_converter_requires_function():
+    with pytest.raises(ValueError):
+        converters.register_converter("nothing")
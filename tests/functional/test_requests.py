@@ -4,6 +4,7 @@ import base64
 import pytest
 
 from pitcher import Application, Request, Route
+from pitcher.request import Headers
 from pitcher import Response
 from tests.client import HandlerClient
 
@@ -30,3 +31,156 @@ def test_request_body(content_type, body):
 
     json_body = response.json()
     assert json_body["result"]
+
+
+@pytest.mark.parametrize("version", [("1.0"), ("2.0")])
+def test_request_fields(version):
+    def hello(request: Request, app) -> Response:
+        request.state.seen = True
+        return Response(
+            200,
+            {
+                "method": request.method,
+                "path": request.path,
+                "resource_path": request.resource_path,
+                "query": dict(request.query),
+                "params": request.params,
+                "host": request.headers.get("HOST"),
+                "missing": request.headers.get("x-missing", "default"),
+                "content_type": request.content_type,
+                "body": request.body,
+                "state": request.state.seen,
+            },
+        )
+
+    app = Application(name="hello", routes=[Route("/hello/{name}", hello)])
+
+    client = HandlerClient(app, version=version, host="api.example.com")
+
+    response = client.get(
+        "/hello/{name}", uriparams={"name": "world"}, params={"page": "2"}
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "method": "GET",
+        "path": "/hello/world",
+        "resource_path": "/hello/{name}",
+        "query": {"page": "2"},
+        "params": {"name": "world"},
+        "host": "api.example.com",
+        "missing": "default",
+        "content_type": "application/json",
+        "body": None,
+        "state": True,
+    }
+
+
+def test_request_lazy_fields():
+    event = {
+        "version": "2.0",
+        "routeKey": "$default",
+        "rawPath": "/hello",
+        "cookies": ["session=1"],
+        "headers": {"content-type": "application/json"},
+        "queryStringParameters": None,
+        "pathParameters": None,
+        "requestContext": {
+            "http": {"method": "POST", "path": "/hello"},
+            "requestId": "abc",
+            "authorizer": {"jwt": {"claims": {"sub": "user"}, "scopes": None}},
+        },
+        "body": base64.b64encode(json.dumps({"hello": "world"}).encode()).decode(),
+        "isBase64Encoded": True,
+    }
+
+    request = Request(event, None)
+
+    assert request.resource_path is None
+    assert request.id == "abc"
+    assert request.query == {}
+    assert request.params == {}
+    assert request.stage_variables == {}
+    assert request.cookies == ["session=1"]
+    assert request.authorizer == {"claims": {"sub": "user"}, "scopes": None}
+    assert request.json_body() == {"hello": "world"}
+    assert request.json_body() is request.json_body()
+
+    request.params["name"] = "world"
+    assert request.params == {"name": "world"}
+
+    with pytest.raises(AttributeError):
+        request.unknown
+
+
+def test_headers():
+    headers = Headers(
+        {"Accept-Encoding": "gzip", "X-Forwarded-For": "10.0.0.1", "Cookie": "a=1"},
+        {
+            "Accept-Encoding": ["gzip"],
+            "X-Forwarded-For": ["203.0.113.1", "10.0.0.1"],
+            "Cookie": ["a=1", "b=2"],
+        },
+    )
+
+    assert headers["accept-encoding"] == "gzip"
+    assert headers.get("X-FORWARDED-FOR") == "10.0.0.1"
+    assert headers.get("missing") is None
+    assert "cookie" in headers
+    assert 1 not in headers
+    assert len(headers) == 3
+    assert set(headers) == {"accept-encoding", "x-forwarded-for", "cookie"}
+    assert headers.getlist("x-forwarded-for") == ["203.0.113.1", "10.0.0.1"]
+    assert headers.getlist("Cookie") == ["a=1", "b=2"]
+    assert headers.getlist("missing") == []
+
+    with pytest.raises(TypeError):
+        headers["host"] = "example.com"  # type: ignore
+
+
+def test_headers_comma_joined():
+    headers = Headers({"accept-encoding": "gzip, br", "Host": "example.com"})
+
+    assert headers.getlist("Accept-Encoding") == ["gzip", "br"]
+    assert headers.getlist("host") == ["example.com"]
+
+
+def test_headers_multi_value_only():
+    headers = Headers(None, {"Accept": ["text/html", "application/json"]})
+
+    assert headers["accept"] == "application/json"
+    assert headers.getlist("accept") == ["text/html", "application/json"]
+
+
+@pytest.mark.parametrize("read_body", [False, True])
+def test_request_stream(read_body):
+    data = bytes(range(256)) * 40
+    event = {
+        "version": "2.0",
+        "routeKey": "$default",
+        "requestContext": {"http": {"method": "POST", "path": "/upload"}},
+        "body": base64.b64encode(data).decode(),
+        "isBase64Encoded": True,
+    }
+    request = Request(event, None)
+    if read_body:
+        assert request.body == data
+
+    stream = request.stream(chunk_size=1000)
+
+    assert stream.read(1) == data[:1]
+    assert stream.read(2000) == data[1:2001]
+    assert stream.read() == data[2001:]
+    assert stream.read() == b""
+    assert request._is_loaded("body") == read_body
+
+
+@pytest.mark.parametrize("body, expected", [("héllo", "héllo".encode()), (None, b"")])
+def test_request_stream_text(body, expected):
+    event = {
+        "version": "2.0",
+        "requestContext": {"http": {"method": "POST", "path": "/"}},
+        "body": body,
+    }
+
+    assert Request(event, None).stream().read() == expected
@@ -1,13 +1,20 @@
 import base64
-from datetime import datetime
+from dataclasses import dataclass
+from datetime import date, datetime, time, timezone
 from decimal import Decimal
+from enum import Enum
 import json
+import mmap
+from typing import NamedTuple
+from uuid import UUID
 
 import pytest
 
 from pitcher import Application, Request, Route
-from pitcher.response import Response, redirect
+from pitcher.json_codecs import get_codec
+from pitcher.response import ChunkedJSONEncoder, FileResponse, Response, redirect
 from pitcher.response import PlainTextResponse, Response
+from pitcher.serializable import Serializer
 from tests.client import HandlerClient
 
 
@@ -273,3 +280,268 @@ def test_cookie_validation(cookies, error):
 
     assert response.status_code == 500
     assert error in response.body
+
+
+@pytest.mark.parametrize("codec", [("json"), ("auto"), ("orjson"), ("ujson")])
+def test_json_codecs(codec):
+    if codec in ("orjson", "ujson"):
+        pytest.importorskip(codec)
+
+    def hello(request: Request, app) -> dict:
+        return {
+            "now": datetime(2020, 4, 1, 22, 58, 1, 123, tzinfo=timezone.utc),
+            "date": date(2020, 4, 1),
+            "time": time(22, 58, 1, 123),
+            "decimal": Decimal("1.00000009"),
+            "float": 1.5,
+            "id": UUID("57c2e004-0f2b-429d-8b12-2cc6379a3e58"),
+            "request": request.json_body(),
+        }
+
+    app = Application(
+        name="hello",
+        routes=[Route("/hello", hello, methods=["POST"])],
+        json_codec=codec,
+    )
+
+    client = HandlerClient(app, version="2.0")
+
+    response = client.post(
+        "/hello",
+        data=json.dumps({"hello": "world"}),
+        headers={"Content-Type": "application/json"},
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "now": "2020-04-01T22:58:01Z",
+        "date": "2020-04-01",
+        "time": "22:58:01",
+        "decimal": "1.00000009",
+        "float": 1.5,
+        "id": "57c2e004-0f2b-429d-8b12-2cc6379a3e58",
+        "request": {"hello": "world"},
+    }
+
+
+class Color(Enum):
+    RED = "red"
+
+
+class Point(NamedTuple):
+    x: int
+    y: int
+
+
+@dataclass
+class Item:
+    name: str
+    tags: frozenset
+
+
+class Score(float):
+    pass
+
+
+@pytest.mark.parametrize("codec", ["json", "orjson"])
+def test_json_codecs_types(codec):
+    pytest.importorskip(codec)
+
+    data = {
+        "color": Color.RED,
+        "point": Point(1, 2),
+        "item": Item("a", frozenset(["b"])),
+        "tags": {"c"},
+        "bytes": b"[raw bytes]",
+        "score": Score(0.5),
+    }
+
+    assert json.loads(get_codec(codec).dumps(data)) == {
+        "color": "red",
+        "point": [1, 2],
+        "item": {"name": "a", "tags": ["b"]},
+        "tags": ["c"],
+        "bytes": "W3JhdyBieXRlc10=",
+        "score": 0.5,
+    }
+
+
+def test_serializer_register():
+    serializer = Serializer()
+
+    class Base:
+        pass
+
+    class Child(Base):
+        pass
+
+    assert serializer(Child()).startswith("<")
+
+    @serializer.register
+    def serialize_base(val: Base) -> str:
+        return "base"
+
+    # the fallback cached for Child is dropped on register
+    assert serializer(Child()) == "base"
+
+    serializer.register(Child, lambda val: "child")
+    assert serializer(Child()) == "child"
+    assert serializer(Base()) == "base"
+
+    serializer.register("decimal.Decimal")(float)
+    assert serializer(Decimal("1.5")) == 1.5
+    assert serializer.registry[Child](Child()) == "child"
+
+    with pytest.raises(TypeError):
+        serializer.register(lambda val: val)
+
+
+def test_unknown_json_codec():
+    with pytest.raises(ValueError):
+        Application(name="hello", routes=[], json_codec="yaml")
+
+
+def test_cookies_v1():
+    def hello(request: Request, app) -> Response:
+        response = Response(204)
+        response.set_cookie("Session", "1")
+        return response
+
+    app = Application(name="hello", routes=[Route("/hello", hello),],)
+
+    client = HandlerClient(app, version="1.0")
+
+    response = client.get("/hello")
+
+    assert response.status_code == 204
+    assert response.cookies == ["Session=1; Secure; SameSite=Lax; HttpOnly; Path=/"]
+
+
+ROWS = [
+    {"id": i, "at": datetime(2020, 4, 1, 22, 58, i, tzinfo=timezone.utc)}
+    for i in range(20)
+]
+ROWS_JSON = [{"id": i, "at": f"2020-04-01T22:58:{i:02}Z"} for i in range(20)]
+
+
+@pytest.mark.parametrize("ndjson", [False, True])
+@pytest.mark.parametrize("chunk_size", [1, 64, 64 * 1024])
+@pytest.mark.parametrize("codec", ["json", "orjson"])
+def test_chunked_json_encoder(ndjson, chunk_size, codec):
+    pytest.importorskip(codec)
+    encoder = ChunkedJSONEncoder(get_codec(codec), ndjson=ndjson, chunk_size=chunk_size)
+
+    chunks = list(encoder.iter_chunks(iter(ROWS)))
+    body = b"".join(chunks)
+
+    if ndjson:
+        assert [json.loads(line) for line in body.splitlines()] == ROWS_JSON
+        assert body.endswith(b"\n")
+    else:
+        assert json.loads(body) == ROWS_JSON
+
+    if chunk_size == 1:
+        assert len(chunks) == len(ROWS) + (0 if ndjson else 1)
+    elif chunk_size == 64:
+        assert all(len(chunk) >= 64 for chunk in chunks[:-1])
+    else:
+        assert len(chunks) == 1
+
+    assert encoder.encode(ROWS) == body
+    assert list(encoder.iter_chunks([])) == ([] if ndjson else [b"[]"])
+
+
+@pytest.mark.parametrize("version", [("1.0"), ("2.0")])
+@pytest.mark.parametrize("stream", [False, True])
+def test_list_views(version, stream):
+    def rows(request: Request, app) -> list:
+        return ROWS
+
+    def generated(request: Request, app):
+        return (row for row in ROWS)
+
+    def ndjson(request: Request, app) -> Response:
+        return Response(200, ROWS, content_type="application/x-ndjson")
+
+    app = Application(
+        name="hello",
+        routes=[
+            Route("/rows", rows),
+            Route("/generated", generated),
+            Route("/ndjson", ndjson),
+        ],
+    )
+
+    client = HandlerClient(app, version=version, stream=stream)
+
+    assert client.get("/rows").json() == ROWS_JSON
+    assert client.get("/generated").json() == ROWS_JSON
+
+    response = client.get("/ndjson")
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert [json.loads(line) for line in response.text.splitlines()] == ROWS_JSON
+
+
+def test_buffer_bodies(tmp_path):
+    data = bytes(range(256)) * 1024
+    path = tmp_path / "data.bin"
+    path.write_bytes(data)
+
+    with open(path, "rb") as fh:
+        mapped = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+    for body in (memoryview(data), mapped):
+        response = Response(200, body, content_type="application/octet-stream")
+
+        rendered = response.render()
+        assert rendered["isBase64Encoded"]
+        assert base64.b64decode(rendered["body"]) == data
+
+        _, headers, chunks = response.to_http()
+        chunks = list(chunks)
+        assert len(chunks) == 4
+        assert b"".join(chunks) == data
+        assert ("content-length", str(len(data))) in headers
+
+        assert b"".join(response.iter_body()) == data
+
+
+@pytest.mark.parametrize("version", [("1.0"), ("2.0")])
+@pytest.mark.parametrize("stream", [False, True])
+def test_file_response(tmp_path, version, stream):
+    data = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 1024
+    (tmp_path / "image.png").write_bytes(data)
+    (tmp_path / "empty.bin").write_bytes(b"")
+
+    def image(request: Request, app) -> Response:
+        return FileResponse(200, tmp_path / "image.png", chunk_size=1000)
+
+    def empty(request: Request, app) -> Response:
+        return FileResponse(200, str(tmp_path / "empty.bin"))
+
+    app = Application(
+        name="hello", routes=[Route("/image", image), Route("/empty", empty)]
+    )
+
+    client = HandlerClient(app, version=version, stream=stream)
+
+    response = client.get("/image")
+    assert response.headers["content-type"] == "image/png"
+    assert response.binary
+    assert (response.body if stream else base64.b64decode(response.body)) == data
+
+    response = client.get("/empty")
+    assert not response.body
+
+
+def test_file_response_to_http(tmp_path):
+    data = bytes(range(256)) * 1024
+    (tmp_path / "data.bin").write_bytes(data)
+    response = FileResponse(200, tmp_path / "data.bin")
+
+    status, headers, chunks = response.to_http()
+
+    assert status == 200
+    assert ("content-type", "application/octet-stream") in headers
+    assert ("content-length", str(len(data))) in headers
+    assert b"".join(chunks) == data
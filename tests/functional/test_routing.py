@@ -168,3 +168,82 @@ def test_path_params(input, lambda_context):
     json_body = response.json()
 
     assert json_body["message"] == f"hello {input}"
+
+
+@pytest.mark.parametrize(
+    "version,resource,path,params,expected,stage",
+    [
+        ("2.0", "$default", "/users/me", {}, "me", None),
+        ("2.0", "$default", "/users/42", {}, "user", None),
+        ("2.0", "$default", "/users/42/posts/hello-world", {}, "post", None),
+        ("2.0", "$default", "/files/a/b/c.txt", {}, "file", None),
+        ("2.0", "/{proxy+}", "/users/42", {"proxy+": "users/42"}, "user", None),
+        ("2.0", "$default", "/users/42", {}, "user", "$default"),
+        ("2.0", "$default", "/prod/users/42", {}, "user", "prod"),
+        ("2.0", "$default", "/prod/files/prod/a.txt", {}, "file", "prod"),
+        ("1.0", "/{proxy+}", "/api/users/42", {"proxy+": "api/users/42"}, "user", None),
+        ("1.0", "/{proxy+}", "/api/users/me", {"proxy+": "api/users/me"}, "me", None),
+    ],
+)
+def test_catch_all_routing(version, resource, path, params, expected, stage):
+    def me(request: Request, app) -> dict:
+        return {"view": "me", "params": request.params}
+
+    def user(request: Request, app) -> dict:
+        return {"view": "user", "params": request.params}
+
+    def post(request: Request, app) -> dict:
+        return {"view": "post", "params": request.params}
+
+    def file(request: Request, app) -> dict:
+        return {"view": "file", "params": request.params}
+
+    routes = [
+        Route("/users/{id:int}", user),
+        Route("/users/me", me),
+        Route("/users/{id:int}/posts/{title:slug}", post),
+        Route("/files/{name+:path}", file),
+    ]
+    base = "api" if version == "1.0" else ""
+    app = Application(name="hello", base=base, routes=routes)
+
+    client = HandlerClient(app, version=version)
+
+    response = client.get(path, resource=resource, uriparams=params, stage=stage)
+
+    assert response.status_code == 200
+
+    json_body = response.json()
+    assert json_body["view"] == expected
+    if expected == "me":
+        assert json_body["params"] == {}
+    elif expected == "user":
+        assert json_body["params"] == {"id": 42}
+    elif expected == "post":
+        assert json_body["params"] == {"id": 42, "title": "hello-world"}
+    elif expected == "file":
+        assert json_body["params"] == {"name+": path.split("/files/", 1)[1]}
+
+
+@pytest.mark.parametrize(
+    "path,status",
+    [
+        ("/users/abc", 404),
+        ("/users/42/posts", 404),
+        ("/unknown", 404),
+        ("/users/42", 405),
+    ],
+)
+def test_catch_all_routing_errors(path, status):
+    def user(request: Request, app) -> dict:
+        return {"view": "user"}
+
+    app = Application(
+        name="hello", routes=[Route("/users/{id:int}", user, methods=["POST"])]
+    )
+
+    client = HandlerClient(app, version="2.0")
+
+    response = client.get(path, resource="$default")
+
+    assert response.status_code == status
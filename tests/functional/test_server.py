@@ -0,0 +1,175 @@
+import asyncio
+import http.client
+import socket
+import threading
+
+import pytest
+
+from pitcher import Application, Request, Route
+from pitcher.response import Response
+from pitcher.server import Server, build_event
+
+
+def echo(request: Request, app) -> dict:
+    return {
+        "method": request.method,
+        "path": request.path,
+        "query": dict(request.query),
+        "cookies": request.cookies,
+        "body": request.json_body(),
+        "id": request.id,
+    }
+
+
+def item(request: Request, app) -> dict:
+    return {"id": request.params["id"]}
+
+
+def image(request: Request, app) -> Response:
+    response = Response(200, b"\x89PNG\xff", content_type="image/png")
+    response.set_cookie("seen", "1")
+    return response
+
+
+def fail(request: Request, app) -> dict:
+    raise ValueError("boom")
+
+
+app = Application(
+    name="server",
+    routes=[
+        Route("/echo", echo, methods=["GET", "POST"]),
+        Route("/items/{id:int}", item),
+        Route("/image", image, methods=["GET", "HEAD"]),
+        Route("/fail", fail),
+    ],
+)
+
+
+@pytest.fixture(params=["1.0", "2.0"])
+def server(request):
+    server = Server(app, port=0, version=request.param)
+    sock = server.bind()
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+
+    async def run():
+        await server.start(sock)
+        started.set()
+
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    asyncio.run_coroutine_threadsafe(run(), loop)
+    started.wait(5)
+    yield server
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+    sock.close()
+
+
+def test_build_event():
+    event = build_event(
+        "GET",
+        "/a%20b?x=1&x=2&y=",
+        [("Cookie", "a=1; b=2"), ("Accept", "a"), ("accept", "b")],
+        b"\xff",
+        request_id="1",
+    )
+
+    assert event["rawPath"] == "/a%20b"
+    assert event["requestContext"]["http"]["path"] == "/a b"
+    assert event["queryStringParameters"] == {"x": "1,2", "y": ""}
+    assert event["cookies"] == ["a=1", "b=2"]
+    assert event["headers"] == {"accept": "a,b"}
+    assert event["isBase64Encoded"]
+    assert event["body"] == "/w=="
+
+    event = build_event("GET", "/a?x=1&x=2", [("Accept", "a")], b"", version="1.0")
+
+    assert event["path"] == "/a"
+    assert event["multiValueQueryStringParameters"] == {"x": ["1", "2"]}
+    assert event["queryStringParameters"] == {"x": "2"}
+    assert event["body"] is None
+
+
+def test_keep_alive(server):
+    connection = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+
+    connection.request(
+        "POST",
+        "/echo?page=2",
+        body='{"hello": "world"}',
+        headers={"Content-Type": "application/json", "Cookie": "a=1"},
+    )
+    response = connection.getresponse()
+    data = response.read()
+
+    assert response.status == 200
+    assert response.getheader("Content-Type") == "application/json"
+    assert app.json_codec.loads(data) == {
+        "method": "POST",
+        "path": "/echo",
+        "query": {"page": "2"},
+        "cookies": ["a=1"],
+        "body": {"hello": "world"},
+        "id": app.json_codec.loads(data)["id"],
+    }
+
+    connection.request("GET", "/items/42")
+    response = connection.getresponse()
+    assert response.status == 200
+    assert response.read() == b'{"id": 42}'
+
+    connection.request("GET", "/items/x")
+    response = connection.getresponse()
+    assert response.status == 404
+    response.read()
+
+    connection.request("GET", "/fail")
+    response = connection.getresponse()
+    assert response.status == 500
+    response.read()
+    connection.close()
+
+
+def test_binary_response(server):
+    connection = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+
+    connection.request("GET", "/image")
+    response = connection.getresponse()
+
+    assert response.read() == b"\x89PNG\xff"
+    assert response.getheader("Set-Cookie").startswith("seen=1")
+
+    connection.request("HEAD", "/image")
+    response = connection.getresponse()
+    assert response.getheader("Content-Length") == "5"
+    assert response.read() == b""
+    connection.close()
+
+
+def test_pipelined_chunked_request(server):
+    with socket.create_connection(("127.0.0.1", server.port), timeout=5) as sock:
+        sock.sendall(
+            b"POST /echo HTTP/1.1\r\nHost: x\r\nContent-Type: application/json\r\n"
+            b"Transfer-Encoding: chunked\r\n\r\n"
+            b"5\r\n[1, 2\r\n2\r\n, \r\n2\r\n3]\r\n0\r\n\r\n"
+            b"GET /items/7 HTTP/1.1\r\nConnection: close\r\n\r\n"
+        )
+        received = b""
+        while True:
+            data = sock.recv(65536)
+            if not data:
+                break
+            received += data
+
+    first, second = received.split(b"HTTP/1.1 200 OK")[1:]
+    assert b'"body": [1, 2, 3]' in first
+    assert b"Connection: close" in second
+    assert second.endswith(b'{"id": 7}')
+
+
+def test_malformed_request(server):
+    with socket.create_connection(("127.0.0.1", server.port), timeout=5) as sock:
+        sock.sendall(b"NOT HTTP\r\n\r\n")
+        assert sock.recv(65536).startswith(b"HTTP/1.1 400 Bad Request")
@@ -0,0 +1,109 @@
+import json
+
+import pytest
+
+from pitcher import Application, Request, Route
+from pitcher.snapshot import build_snapshot, main
+from tests.client import HandlerClient
+
+
+def hello(request: Request, app) -> dict:
+    return {"hello": "world"}
+
+
+def item(request: Request, app) -> dict:
+    return {"id": request.params["id"], "type": type(request.params["id"]).__name__}
+
+
+ROUTES = [
+    Route("/hello", hello, methods=["GET", "POST"]),
+    Route("/items/{id:int}", item),
+]
+
+
+@pytest.mark.parametrize("version", [("1.0"), ("2.0")])
+@pytest.mark.parametrize("routes", [ROUTES, []])
+def test_route_snapshot(version, routes):
+    snapshot = build_snapshot(ROUTES, base="api")
+
+    app = Application(name="hello", routes=routes, base="api", route_snapshot=snapshot)
+    assert (
+        app.router.routes
+        == Application(name="hello", routes=ROUTES, base="api").router.routes
+    )
+
+    client = HandlerClient(app, version=version)
+
+    response = client.get("/api/hello")
+    assert response.status_code == 200
+    assert response.json() == {"hello": "world"}
+
+    response = client.get("/api/items/{id}", uriparams={"id": "42"})
+    assert response.status_code == 200
+    assert response.json() == {"id": 42, "type": "int"}
+
+
+def test_route_snapshot_validation():
+    snapshot = build_snapshot(ROUTES)
+    routes = [ROUTES[0], Route("/items/{id:uuid}", item)]
+
+    # only checked in debug mode
+    Application(name="hello", routes=routes, route_snapshot=snapshot)
+
+    with pytest.raises(ValueError, match="stale"):
+        Application(name="hello", routes=routes, route_snapshot=snapshot, debug=True)
+
+    with pytest.raises(ValueError, match="does not match"):
+        Application(name="hello", routes=ROUTES[:1], route_snapshot=snapshot)
+
+    with pytest.raises(ValueError, match="version"):
+        Application(
+            name="hello", routes=ROUTES, route_snapshot=dict(snapshot, version=0)
+        )
+
+
+def test_route_snapshot_reordered_routes():
+    snapshot = build_snapshot(ROUTES)
+
+    with pytest.raises(ValueError, match="does not match the routes at /items"):
+        Application(name="hello", routes=ROUTES[::-1], route_snapshot=snapshot)
+
+    routes = [
+        Route("/a", lambda request, app: {}),
+        Route("/b", lambda request, app: {}),
+    ]
+    snapshot = build_snapshot(routes)
+    assert snapshot["routes"][0]["view"] is None
+
+    Application(name="hello", routes=routes, route_snapshot=snapshot)
+    with pytest.raises(ValueError, match="does not match the routes at /b"):
+        Application(name="hello", routes=routes[::-1], route_snapshot=snapshot)
+
+
+def test_route_snapshot_without_view_path():
+    snapshot = build_snapshot([Route("/hello", lambda request, app: {})])
+    assert snapshot["routes"][0]["view"] is None
+
+    with pytest.raises(ValueError, match="no view"):
+        Application(name="hello", routes=[], route_snapshot=snapshot)
+
+
+def test_snapshot_cli(tmp_path, capsys):
+    output = tmp_path / "routes.json"
+
+    main(["tests.functional.test_snapshot:ROUTES", "-o", str(output)])
+
+    assert "wrote 2 routes" in capsys.readouterr().out
+    snapshot = json.loads(output.read_text())
+    assert snapshot == build_snapshot(ROUTES)
+    assert snapshot["routes"][1] == {
+        "path": "/items/{id}",
+        "route": "/items/{id:int}",
+        "methods": ["GET"],
+        "segments": [["items", None, None], ["{id:int}", "id", "int"]],
+        "view": "tests.functional.test_snapshot:item",
+    }
+
+    app = Application(name="hello", routes=[], route_snapshot=output, debug=True)
+    response = HandlerClient(app).get("/items/{id}", uriparams={"id": "7"})
+    assert response.json() == {"id": 7, "type": "int"}
@@ -0,0 +1,139 @@
+import json
+
+import pytest
+
+from pitcher import Application, Middleware, Request, Route
+from pitcher.middleware import CompressionMiddleware, ConditionalGetMiddleware
+from pitcher.response import PlainTextResponse, StreamingResponse
+from tests.client import HandlerClient
+
+ITEMS = [{"id": i, "name": f"item {i}"} for i in range(50)]
+
+
+def export(request: Request, app) -> StreamingResponse:
+    return StreamingResponse(
+        200, iter(ITEMS), content_type="application/json", chunk_size=256
+    )
+
+
+def csv(request: Request, app) -> StreamingResponse:
+    def rows():
+        yield "id,name\n"
+        for item in ITEMS[:3]:
+            yield f"{item['id']},{item['name']}\n".encode()
+
+    response = StreamingResponse(200, rows(), content_type="text/csv")
+    response.set_cookie("export", "csv")
+    return response
+
+
+def empty(request: Request, app) -> StreamingResponse:
+    return StreamingResponse(200, [], content_type="application/json")
+
+
+def hello(request: Request, app) -> dict:
+    return {"hello": "world"}
+
+
+ROUTES = [
+    Route("/export", export),
+    Route("/csv", csv),
+    Route("/empty", empty),
+    Route("/hello", hello),
+]
+
+
+@pytest.mark.parametrize("version", [("1.0"), ("2.0")])
+def test_stream_json_array(version):
+    app = Application(
+        name="hello",
+        routes=ROUTES,
+        middleware=[
+            Middleware(CompressionMiddleware, minimum_size=0),
+            Middleware(ConditionalGetMiddleware),
+        ],
+    )
+
+    client = HandlerClient(app, version=version, stream=True)
+
+    response = client.get("/export", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers == {"content-type": "application/json"}
+    assert response.json() == ITEMS
+
+    # the prelude, then the body in chunks of about chunk_size
+    writes = response.writer.writes
+    assert writes[0].endswith(b"\x00" * 8)
+    assert json.loads(writes[0][:-8]) == {
+        "statusCode": 200,
+        "headers": {"content-type": "application/json"},
+    }
+    assert len(writes) > 5
+    assert all(256 <= len(chunk) < 300 for chunk in writes[1:-1])
+    assert response.writer.flushes == 1
+
+
+def test_stream_text_with_cookies():
+    app = Application(name="hello", routes=ROUTES)
+
+    client = HandlerClient(app, version="2.0", stream=True)
+
+    response = client.get("/csv")
+    assert response.status_code == 200
+    assert response.text == "id,name\n0,item 0\n1,item 1\n2,item 2\n"
+    assert response.cookies == ["export=csv; Secure; SameSite=Lax; HttpOnly; Path=/"]
+
+
+@pytest.mark.parametrize(
+    "route, body", [("/empty", []), ("/hello", {"hello": "world"})]
+)
+def test_stream_whole_responses(route, body):
+    app = Application(name="hello", routes=ROUTES)
+
+    response = HandlerClient(app, stream=True).get(route)
+    assert response.status_code == 200
+    assert response.json() == body
+
+
+@pytest.mark.parametrize("version", [("1.0"), ("2.0")])
+def test_streaming_response_buffered(version):
+    app = Application(name="hello", routes=ROUTES)
+
+    client = HandlerClient(app, version=version)
+
+    response = client.get("/export")
+    assert response.status_code == 200
+    assert response.json() == ITEMS
+
+    response = client.get("/csv")
+    assert response.text.startswith("id,name\n")
+
+    response = client.get("/empty")
+    assert response.json() == []
+
+
+def test_stream_error_ends_stream():
+    def broken(request: Request, app) -> StreamingResponse:
+        def items():
+            yield {"id": 1}
+            raise ValueError("lost the database")
+
+        return StreamingResponse(
+            200, items(), content_type="application/json", chunk_size=1
+        )
+
+    def missing(request: Request, app) -> PlainTextResponse:
+        return PlainTextResponse(404, "Not here")
+
+    app = Application(
+        name="hello", routes=[Route("/broken", broken), Route("/missing", missing)]
+    )
+    client = HandlerClient(app, stream=True)
+
+    response = client.get("/broken")
+    assert response.status_code == 200
+    assert response.text == '[{"id": 1}'
+
+    response = client.get("/missing")
+    assert response.status_code == 404
+    assert response.text == "Not here"
@@ -0,0 +1,170 @@
+import io
+import json
+
+import pytest
+
+from pitcher import Application, Middleware, Request, Route
+from pitcher.middleware import BaseMiddleware
+from pitcher.response import Response
+from pitcher.timing import Instrumentation, Timer
+from tests.client import HandlerClient
+
+
+class AsyncMiddleware(BaseMiddleware):
+    async def __call__(self, request: Request, app) -> Response:
+        return await self.next_func(request, app)
+
+
+class SyncMiddleware(BaseMiddleware):
+    def __call__(self, request: Request, app) -> Response:
+        response = self.next_func(request, app)
+        response.set_header("X-Sync", "1")
+        return response
+
+
+def item(request: Request, app) -> dict:
+    return {"id": request.params["id"]}
+
+
+async def async_item(request: Request, app) -> dict:
+    return {"id": request.params["id"]}
+
+
+def test_timer():
+    timer = Timer()
+    assert timer.enter("view") == "parse"
+    previous = timer.enter("inner")
+    timer.enter(previous)
+    timer.stop()
+
+    assert list(timer.durations) == ["parse", "view", "inner"]
+    assert timer.phase is None
+    assert sum(timer.durations.values()) == timer.total_ns
+    assert timer.server_timing().endswith(f"total;dur={timer.total_ns / 1e6:.3f}")
+
+
+@pytest.mark.parametrize("view", [item, async_item])
+@pytest.mark.parametrize("middleware", [SyncMiddleware, AsyncMiddleware])
+def test_on_response(view, middleware):
+    calls = []
+
+    def on_response(request, response, timer, app):
+        calls.append((request.resource_path, response.status_code, timer))
+
+    app = Application(
+        name="timed",
+        routes=[Route("/items/{id:int}", view)],
+        middleware=[Middleware(middleware)],
+        on_response=[on_response],
+    )
+
+    client = HandlerClient(app, version="2.0")
+    response = client.get("/items/1", resource="/items/{id}", uriparams={"id": "1"})
+
+    assert response.status_code == 200
+    assert response.json() == {"id": 1}
+    assert "Server-Timing" not in response.headers
+
+    [(resource_path, status_code, timer)] = calls
+    assert resource_path == "/items/{id}"
+    assert status_code == 200
+    assert list(timer.durations) == [
+        "parse",
+        f"middleware.0.{middleware.__name__}",
+        "routing",
+        "params",
+        "view",
+        "render",
+    ]
+    assert sum(timer.durations.values()) == timer.total_ns
+
+
+def test_server_timing():
+    app = Application(
+        name="timed",
+        routes=[Route("/items/{id}", item)],
+        instrumentation=Instrumentation(server_timing=True),
+    )
+
+    client = HandlerClient(app, version="2.0")
+    response = client.get("/items/1")
+
+    metrics = [
+        metric.split(";")[0] for metric in response.headers["Server-Timing"].split(", ")
+    ]
+    assert metrics == ["parse", "routing", "view", "total"]
+
+
+def test_server_timing_repeated_middleware():
+    app = Application(
+        name="timed",
+        routes=[Route("/items/{id}", item)],
+        middleware=[Middleware(SyncMiddleware), Middleware(SyncMiddleware)],
+        instrumentation=Instrumentation(server_timing=True),
+    )
+
+    client = HandlerClient(app, version="2.0")
+    response = client.get("/items/1")
+
+    metrics = [
+        metric.split(";")[0] for metric in response.headers["Server-Timing"].split(", ")
+    ]
+    assert metrics == [
+        "parse",
+        "middleware.0.SyncMiddleware",
+        "middleware.1.SyncMiddleware",
+        "routing",
+        "view",
+        "total",
+    ]
+
+
+def test_emf():
+    stream = io.StringIO()
+
+    def on_response(request, response, timer, app):
+        raise ValueError("hook errors are logged")
+
+    app = Application(
+        name="timed",
+        routes=[Route("/items/{id}", item)],
+        on_response=[on_response],
+        instrumentation=Instrumentation(
+            emf=True, namespace="shop", dimensions={"Stage": "test"}, stream=stream
+        ),
+    )
+
+    client = HandlerClient(app, version="2.0")
+    assert client.get("/items/1").status_code == 200
+    assert client.get("/missing").status_code == 404
+
+    found, missing = [json.loads(line) for line in stream.getvalue().splitlines()]
+
+    [directive] = found["_aws"]["CloudWatchMetrics"]
+    assert directive["Namespace"] == "shop"
+    assert directive["Dimensions"] == [["Service", "Stage", "Route"]]
+    assert [metric["Name"] for metric in directive["Metrics"]] == [
+        "parse",
+        "routing",
+        "view",
+        "render",
+        "total",
+    ]
+    assert found["Service"] == "timed"
+    assert found["Route"] == "/items/{id}"
+    assert found["statusCode"] == 200
+    assert found["total"] >= found["view"]
+
+    assert missing["statusCode"] == 404
+
+
+def test_uninstrumented_stack():
+    app = Application(
+        name="plain",
+        routes=[Route("/items/{id}", item)],
+        middleware=[Middleware(SyncMiddleware)],
+    )
+
+    assert app.instrumentation is None
+    assert isinstance(app.middleware_stack, SyncMiddleware)
+    assert app.middleware_stack.next_func is app.router